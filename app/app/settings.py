@@ -53,6 +53,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db.routers.ReplicaMiddleware',
+    # Removes itself unless PROFILING_ENABLED is set
+    'core.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -79,16 +82,83 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Check connections out of a per-process pool, see
+# core/db/backends/postgresql_pool
+DB_POOL = os.environ.get('DB_POOL') == '1'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql_pool' if DB_POOL
+        else 'django.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASS')
+        'PASSWORD': os.environ.get('DB_PASS'),
+        # Seconds a thread keeps its connection between requests. Off by
+        # default: Django 3.2 does not check a kept connection before
+        # reuse, only the pool pings them. With the pool, 0 gives the
+        # connection back after every request so threads share it.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'MAX_LIFETIME': int(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),
+            # Ping connections idle for longer than this on checkout
+            'PING_AFTER': int(os.environ.get('DB_POOL_PING_AFTER', 30)),
+        },
     }
 }
 
+# Read replicas, see core/db/routers.py. Each host gets a copy of the
+# primary's settings; tests read the primary instead.
+REPLICA_DATABASES = []
+for index, host in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    REPLICA_DATABASES.append(f'replica_{index}')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+# URL namespaces whose safe requests read from a replica
+REPLICA_READ_NAMESPACES = ('blog',)
+# Seconds a client reads from the primary after a write. Besides a signed
+# cookie, a marker is kept in this cache; it must be shared (Redis,
+# Memcached) for clients that drop cookies and hit several workers.
+REPLICA_STICKY_CACHE = os.environ.get('DB_REPLICA_STICKY_CACHE', 'default')
+REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 10))
+# Seconds a failed replica is left alone
+REPLICA_RETRY_SECONDS = int(os.environ.get('DB_REPLICA_RETRY_SECONDS', 30))
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blog-app',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 5000)),
+        },
+    }
+}
+
+POST_CACHE_ALIAS = 'default'
+POST_CACHE_TIMEOUT = int(os.environ.get('POST_CACHE_TIMEOUT', 300))
+
+# Per-endpoint request profiling, see core/profiling.py
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED') == '1'
+
+# In-process cache of API token lookups, see user/authentication.py
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 60))
+# Shared cache holding the generation that revokes those lookups in every
+# process; must be shared across workers, e.g. Redis or Memcached
+TOKEN_CACHE_ALIAS = os.environ.get('TOKEN_CACHE_ALIAS', 'default')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -132,9 +202,75 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# How core.views.serve_media hands files to the client: '' streams them
+# from Django, 'x-sendfile' (Apache, lighttpd) or 'x-accel-redirect'
+# (nginx, with an internal location at MEDIA_ACCEL_PREFIX) offload the
+# transfer to the front server
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE', '')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 24 * 60 * 60))
+
+# Resized copies of post images, see blog/images.py
+IMAGE_VARIANT_WIDTHS = tuple(
+    int(width) for width in
+    os.environ.get('IMAGE_VARIANT_WIDTHS', '320,640,1280').split(',')
+)
+IMAGE_VARIANT_FORMAT = os.environ.get('IMAGE_VARIANT_FORMAT', 'WEBP')
+IMAGE_VARIANT_QUALITY = int(os.environ.get('IMAGE_VARIANT_QUALITY', 80))
+# Generate variants on the saving thread instead of the worker queue
+IMAGE_VARIANTS_SYNC = os.environ.get('IMAGE_VARIANTS_SYNC') == '1'
+
+# Limits of the streaming image upload endpoint
+IMAGE_UPLOAD_MAX_BYTES = int(
+    os.environ.get('IMAGE_UPLOAD_MAX_BYTES', 10 * 1024 * 1024)
+)
+IMAGE_UPLOAD_MAX_DIMENSION = int(
+    os.environ.get('IMAGE_UPLOAD_MAX_DIMENSION', 8000)
+)
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+# Scheduled publishing worker, see blog/scheduler.py
+SCHEDULER_BATCH_SIZE = int(os.environ.get('SCHEDULER_BATCH_SIZE', 500))
+# Seconds between checks for changed drafts
+SCHEDULER_RECONCILE_SECONDS = int(
+    os.environ.get('SCHEDULER_RECONCILE_SECONDS', 60)
+)
+# Longest sleep, and so the delay before a change mark is noticed
+SCHEDULER_POLL_SECONDS = int(os.environ.get('SCHEDULER_POLL_SECONDS', 5))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
+
+AUTHENTICATION_BACKENDS = ['user.backends.HashLimitedModelBackend']
+
+# Password hashing. The preferred hasher comes first; the others are kept
+# so existing hashes verify and get re-encoded on the next login.
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'core.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'core.hashers.ScryptPasswordHasher',
+    # Needs the argon2-cffi package
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CHOICES.items()
+    if name != PASSWORD_HASHER
+]
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 260000)
+)
+PASSWORD_SCRYPT_N = int(os.environ.get('PASSWORD_SCRYPT_N', 2 ** 14))
+PASSWORD_SCRYPT_R = int(os.environ.get('PASSWORD_SCRYPT_R', 8))
+PASSWORD_SCRYPT_P = int(os.environ.get('PASSWORD_SCRYPT_P', 1))
+# Logins per process that may hash a password at the same time
+LOGIN_HASH_CONCURRENCY = int(
+    os.environ.get('LOGIN_HASH_CONCURRENCY', os.cpu_count() or 1)
+)
+# Processes used to hash passwords when users are created in bulk
+PASSWORD_HASH_PROCESSES = int(
+    os.environ.get('PASSWORD_HASH_PROCESSES', os.cpu_count() or 1)
+)
@@ -13,13 +13,29 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path, include
-from django.conf.urls.static import static
+from django.urls import path, re_path, include
 from django.conf import settings
 
+from core.views import serve_media, ProfilingStatsAPIView, \
+    ProfilingMetricsAPIView, DatabasePoolStatsAPIView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/user/', include('user.urls')),
     path('api/blog/', include('blog.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('api/profiling/',
+         ProfilingStatsAPIView.as_view(),
+         name='profiling-stats'),
+    path('api/profiling/metrics/',
+         ProfilingMetricsAPIView.as_view(),
+         name='profiling-metrics'),
+    path('api/db/pools/',
+         DatabasePoolStatsAPIView.as_view(),
+         name='db-pools'),
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+            serve_media,
+            name='media'),
+]
@@ -0,0 +1,59 @@
+"""Set-based write helpers shared by the bulk endpoints and importers"""
+from django.db.models.signals import post_save
+
+
+def create(model, objs, lookup_field, batch_size=None):
+    """Insert `objs` with bulk_create and make sure they all have a pk.
+
+    Backends that cannot return ids from a bulk insert get them back with
+    one query on `lookup_field`, which must be unique.
+    """
+    objs = model.objects.bulk_create(objs, batch_size=batch_size)
+    missing = [obj for obj in objs if obj.pk is None]
+    if missing:
+        ids = dict(model.objects.filter(**{
+            f'{lookup_field}__in': [getattr(obj, lookup_field)
+                                    for obj in missing]
+        }).values_list(lookup_field, 'pk'))
+        for obj in missing:
+            obj.pk = ids[getattr(obj, lookup_field)]
+    return objs
+
+
+def set_relations(through, source, target, mapping, replace=False,
+                  batch_size=None):
+    """Link many-to-many rows in bulk.
+
+    `mapping` maps source ids to iterables of target ids. With `replace`
+    the existing links of those sources are deleted first. Returns the
+    ids of all targets whose links may have changed.
+    """
+    if not mapping:
+        return set()
+    affected = {target_id for target_ids in mapping.values()
+                for target_id in target_ids}
+    if replace:
+        links = through.objects.filter(**{f'{source}__in': list(mapping)})
+        affected.update(links.values_list(target, flat=True))
+        links.delete()
+    through.objects.bulk_create([
+        through(**{source: source_id, target: target_id})
+        for source_id, target_ids in mapping.items()
+        for target_id in set(target_ids)
+    ], batch_size=batch_size, ignore_conflicts=True)
+    return affected
+
+
+def send_saved(model, objs, created):
+    """Send post_save for objects written in bulk.
+
+    bulk_create and bulk_update skip model signals, so they are sent
+    afterwards with `bulk=True`. Receivers that would query per object
+    skip those and the caller does their work once for the batch, as
+    BulkPostListSerializer does for the published counts.
+    """
+    for obj in objs:
+        post_save.send(
+            sender=model, instance=obj, created=created,
+            update_fields=None, raw=False, using=obj._state.db, bulk=True,
+        )
@@ -0,0 +1,104 @@
+"""Response cache for post detail lookups.
+
+Entries are stored under a per-slug generation token, so a single delete
+of that token invalidates every variant of the post (one per site root the
+absolute image URLs were built for). Eviction is left to the configured
+cache backend: the default local-memory cache is bounded with LRU culling
+and every entry expires after POST_CACHE_TIMEOUT seconds.
+"""
+import threading
+import uuid
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from core.models import Post
+
+
+def get_cache():
+    return caches[settings.POST_CACHE_ALIAS]
+
+
+class CacheStats:
+    """Per-process hit, miss and invalidation counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+stats = CacheStats()
+
+
+def generation_key(slug):
+    return f'blog:post:{slug}:generation'
+
+
+def detail_key(slug, generation, variant):
+    digest = md5(variant.encode()).hexdigest()
+    return f'blog:post:{slug}:{generation}:{digest}'
+
+
+def get_detail(slug, variant):
+    """Return cached post data for `slug`, or None on a miss"""
+    cache = get_cache()
+    generation = cache.get(generation_key(slug))
+    data = None
+    if generation is not None:
+        data = cache.get(detail_key(slug, generation, variant))
+    stats.incr('misses' if data is None else 'hits')
+    return data
+
+
+def set_detail(slug, variant, data):
+    """Store post data for `slug` under its current generation"""
+    cache = get_cache()
+    timeout = settings.POST_CACHE_TIMEOUT
+    generation = cache.get_or_set(
+        generation_key(slug), uuid.uuid4().hex, timeout
+    )
+    cache.set(detail_key(slug, generation, variant), data, timeout)
+
+
+def invalidate(*slugs):
+    """Drop cached data for the given slugs now and again on commit.
+
+    The second pass stops a concurrent request from caching rows that
+    were read before this transaction committed.
+    """
+    keys = [generation_key(slug) for slug in slugs if slug]
+    if not keys:
+        return
+    get_cache().delete_many(keys)
+    stats.incr('invalidations', len(keys))
+    transaction.on_commit(lambda: get_cache().delete_many(keys))
+
+
+def invalidate_posts(post_ids):
+    """Drop cached data for the posts with the given ids"""
+    if post_ids:
+        invalidate(*Post.objects.filter(
+            pk__in=post_ids
+        ).values_list('slug', flat=True))
@@ -0,0 +1,41 @@
+"""ETag and Last-Modified helpers for the post views"""
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def is_conditional(request):
+    """Return True if the request carries a validator to check"""
+    return ('HTTP_IF_NONE_MATCH' in request.META
+            or 'HTTP_IF_MODIFIED_SINCE' in request.META)
+
+
+def make_etag(*parts):
+    digest = md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def post_validators(post_id, date_modified, variant):
+    """Return the (etag, last_modified timestamp) pair of a post"""
+    etag = make_etag('post', post_id, date_modified.isoformat(), variant)
+    return etag, int(date_modified.timestamp())
+
+
+def not_modified(request, etag, last_modified=None):
+    """Return a 304 response if the client copy is current, else None"""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
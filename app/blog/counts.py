@@ -0,0 +1,119 @@
+"""Denormalised post counts on tags and categories"""
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Tag, Category, Post
+
+
+# Model counted -> (link table, link column)
+LINKS = {
+    Tag: (Post.tags.through, 'tag_id'),
+    Category: (Post.categories.through, 'category_id'),
+}
+THROUGH = {through: (model, column) for model, (through, column)
+           in LINKS.items()}
+
+
+def adjust(model, ids, total=0, published=0):
+    """Add `total` and `published` to the counts of rows `ids`"""
+    if not ids or not (total or published):
+        return
+    model.objects.filter(pk__in=ids).update(
+        post_count=F('post_count') + total,
+        published_post_count=F('published_post_count') + published,
+    )
+
+
+def adjust_for_post(post, model, ids, sign):
+    """Count `post` in (sign 1) or out of (sign -1) the rows `ids`"""
+    adjust(model, ids, sign, sign if post.published else 0)
+
+
+def counted(model):
+    """Return rows of `model` annotated with the counts computed from the
+    link table"""
+    through, column = LINKS[model]
+    links = through.objects.filter(
+        **{column: OuterRef('pk')}
+    ).order_by().values(column)
+
+    def total(queryset):
+        return Coalesce(
+            Subquery(queryset.annotate(n=Count('pk')).values('n')), 0
+        )
+
+    return model.objects.annotate(
+        actual_count=total(links),
+        actual_published_count=total(links.filter(post__published=True)),
+    )
+
+
+def recount(model, ids=None):
+    """Set the counts of rows `ids`, or of all rows, from the link table.
+    Used after writes that bypass m2m_changed."""
+    queryset = model.objects.all()
+    if ids is not None:
+        if not ids:
+            return 0
+        queryset = queryset.filter(pk__in=ids)
+    actual = counted(model).filter(pk=OuterRef('pk'))
+    return queryset.update(
+        post_count=Subquery(actual.values('actual_count')),
+        published_post_count=Subquery(actual.values('actual_published_count')),
+    )
+
+
+def drifted(model):
+    """Return rows whose stored counts differ from the link table"""
+    return counted(model).filter(
+        ~Q(post_count=F('actual_count')) |
+        ~Q(published_post_count=F('actual_published_count'))
+    )
+
+
+def linked_ids(post_ids):
+    """Return {model: ids} of the tags and categories of `post_ids`"""
+    return {
+        model: set(through.objects.filter(
+            post_id__in=post_ids
+        ).values_list(column, flat=True))
+        for model, (through, column) in LINKS.items()
+    }
+
+
+def links_changed(through, instance, action, reverse, pk_set):
+    """Apply an m2m_changed event of a post relation to the counts.
+
+    Django only reports links that are really added, but removals carry
+    the ids asked for, so the links that exist are read in pre_remove and
+    pre_clear and applied once the change is done.
+    """
+    model, column = THROUGH[through]
+    pending = instance.__dict__.setdefault('_pending_links', {})
+    if not reverse:
+        links = through.objects.filter(post_id=instance.pk)
+        if action == 'pre_remove':
+            links = links.filter(**{f'{column}__in': pk_set})
+        if action in ('pre_remove', 'pre_clear'):
+            pending[through] = set(links.values_list(column, flat=True))
+        elif action == 'post_add':
+            adjust_for_post(instance, model, pk_set, 1)
+        elif action in ('post_remove', 'post_clear'):
+            adjust_for_post(instance, model, pending.pop(through, ()), -1)
+        return
+
+    links = through.objects.filter(**{column: instance.pk})
+    if action == 'pre_remove':
+        links = links.filter(post_id__in=pk_set)
+    if action in ('pre_remove', 'pre_clear'):
+        pending[through] = list(
+            links.values_list('post__published', flat=True)
+        )
+    elif action == 'post_add':
+        published = list(Post.objects.filter(
+            pk__in=pk_set
+        ).values_list('published', flat=True))
+        adjust(model, [instance.pk], len(published), sum(published))
+    elif action in ('post_remove', 'post_clear'):
+        published = pending.pop(through, [])
+        adjust(model, [instance.pk], -len(published), -sum(published))
@@ -0,0 +1,82 @@
+"""Streaming export of the post table as NDJSON or CSV"""
+import csv
+import json
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.models import Post
+
+
+COLUMNS = ('id', 'title', 'subtitle', 'slug', 'body', 'meta_description',
+           'date_created', 'date_modified', 'publish_date', 'published',
+           'image')
+# Relation -> (id column, field of the link table). Names are portable
+# between databases; the ids only mean something in this one.
+RELATIONS = {
+    'tags': ('tag_ids', 'tag'),
+    'categories': ('category_ids', 'category'),
+}
+CHUNK_SIZE = 1000
+
+
+def iter_posts(queryset=None, chunk_size=CHUNK_SIZE):
+    """Yield every post as a dict with its tag and category names and ids.
+
+    Rows are read through a server-side cursor where the backend has one,
+    and relations are fetched with one query per relation and chunk, so
+    memory use depends on `chunk_size` only.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    rows = queryset.order_by('id').values(*COLUMNS).iterator(chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        ids = [row['id'] for row in chunk]
+        for name, (id_column, field) in RELATIONS.items():
+            related = {post_id: ([], []) for post_id in ids}
+            links = getattr(Post, name).through.objects.filter(
+                post_id__in=ids
+            ).order_by('post_id', f'{field}_id').values_list(
+                'post_id', f'{field}_id', f'{field}__name'
+            )
+            for post_id, target_id, target_name in links:
+                related[post_id][0].append(target_name)
+                related[post_id][1].append(target_id)
+            for row in chunk:
+                row[name], row[id_column] = related[row['id']]
+        yield from chunk
+
+
+def ndjson_lines(posts):
+    """Render posts as one JSON document per line"""
+    for post in posts:
+        yield json.dumps(post, cls=DjangoJSONEncoder) + '\n'
+
+
+class Echo:
+    """File-like object whose write returns the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(posts):
+    """Render posts as CSV with a header row, relation names and ids
+    joined by commas as the importer reads them"""
+    writer = csv.writer(Echo())
+    relations = tuple(RELATIONS) + tuple(c for c, _ in RELATIONS.values())
+    header = COLUMNS + relations
+    yield writer.writerow(header)
+    for post in posts:
+        for name in relations:
+            post[name] = ','.join(str(value) for value in post[name])
+        yield writer.writerow([post[name] for name in header])
+
+
+FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
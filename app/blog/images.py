@@ -0,0 +1,150 @@
+"""Resized variants of post images, generated off the request thread"""
+import hashlib
+import logging
+import os
+import queue
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, features
+
+from core.models import Post
+from . import cache
+
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+
+def variant_format():
+    """Return the configured output format, or JPEG when Pillow was built
+    without WebP"""
+    fmt = settings.IMAGE_VARIANT_FORMAT.upper()
+    if fmt == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return fmt
+
+
+def content_hash(field_file):
+    """Return the sha256 of a stored file, read in chunks"""
+    digest = hashlib.sha256()
+    with field_file.open('rb') as f:
+        for chunk in f.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def variant_name(digest, width, fmt):
+    return os.path.join(
+        'uploads/blog/variants', digest, f'{width}.{EXTENSIONS[fmt]}'
+    )
+
+
+def render_variants(field_file, digest):
+    """Write one resized copy per configured width narrower than the
+    original and return {width: storage name}. Names depend on the content
+    hash, so variants already stored are reused."""
+    fmt = variant_format()
+    # Variant names are already derived from the content hash
+    storage = default_storage
+    variants = {}
+    with field_file.open('rb') as f, Image.open(f) as original:
+        original.load()
+        widths = [w for w in settings.IMAGE_VARIANT_WIDTHS
+                  if w < original.width] or [original.width]
+        for width in widths:
+            name = variant_name(digest, width, fmt)
+            if not storage.exists(name):
+                image = original.copy()
+                image.thumbnail((width, original.height * width))
+                if fmt == 'JPEG' and image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+                buffer = BytesIO()
+                image.save(buffer, fmt,
+                           quality=settings.IMAGE_VARIANT_QUALITY)
+                name = storage.save(name, ContentFile(buffer.getvalue()))
+            variants[str(width)] = name
+    return variants
+
+
+def generate(post_id):
+    """Bring the variants of a post in line with its current image.
+
+    Skips the work when the image content has not changed since the last
+    run. The row is only updated if its image is still the one processed,
+    so a newer upload is never overwritten with stale variants.
+    """
+    post = Post.objects.filter(pk=post_id).only(
+        'id', 'slug', 'image', 'image_hash', 'image_variants'
+    ).first()
+    if post is None:
+        return
+    if not post.image:
+        changes = {'image_hash': '', 'image_variants': {}}
+    else:
+        digest = content_hash(post.image)
+        if digest == post.image_hash and post.image_variants:
+            return
+        changes = {
+            'image_hash': digest,
+            'image_variants': render_variants(post.image, digest),
+        }
+    if post.image_hash == changes['image_hash'] \
+            and post.image_variants == changes['image_variants']:
+        return
+    updated = Post.objects.filter(pk=post.pk, image=post.image.name).update(
+        date_modified=timezone.now(), **changes
+    )
+    if updated:
+        cache.invalidate(post.slug)
+
+
+class Worker:
+    """Single background thread that generates variants in order"""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def put(self, post_id):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='image-variants', daemon=True
+                )
+                self.thread.start()
+        self.queue.put(post_id)
+
+    def run(self):
+        while True:
+            post_id = self.queue.get()
+            try:
+                generate(post_id)
+            except Exception:
+                logger.exception('Could not build variants of post %s',
+                                 post_id)
+            finally:
+                # This thread owns its connection; do not leak it
+                close_old_connections()
+                self.queue.task_done()
+
+
+worker = Worker()
+
+
+def schedule(post_id):
+    """Generate variants once the current transaction commits, inline
+    when IMAGE_VARIANTS_SYNC is set"""
+    def run():
+        if settings.IMAGE_VARIANTS_SYNC:
+            generate(post_id)
+        else:
+            worker.put(post_id)
+    transaction.on_commit(run)
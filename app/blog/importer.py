@@ -0,0 +1,273 @@
+"""Batched import of posts from NDJSON or CSV files"""
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from core.models import Tag, Category, Post
+from . import bulk, counts
+
+
+BATCH_SIZE = 1000
+SLUG_LENGTH = Post._meta.get_field('slug').max_length
+TEXT_FIELDS = ('title', 'subtitle', 'slug', 'body', 'meta_description')
+RELATIONS = {
+    'tags': (Tag, 'tag_id'),
+    'categories': (Category, 'category_id'),
+}
+# Relation -> column of ids, read only for rows that give no names
+ID_COLUMNS = {
+    'tags': 'tag_ids',
+    'categories': 'category_ids',
+}
+
+
+def read_ndjson(lines):
+    """Yield one dict per non-blank line"""
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(lines):
+    """Yield one dict per row, splitting relation columns on commas"""
+    for row in csv.DictReader(lines):
+        for name in (*RELATIONS, *ID_COLUMNS.values()):
+            row[name] = (row.get(name) or '').split(',')
+        yield row
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+def parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+def is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def clean_names(names):
+    """Normalise relation names the way the tag and category
+    serializers do"""
+    if isinstance(names, (str, int)):
+        names = [names]
+    return [str(name).strip().lower() for name in names or ()
+            if str(name).strip()]
+
+
+def clean_ids(ids):
+    """Return relation ids as integers; raises ValueError on anything
+    else"""
+    if isinstance(ids, (str, int)):
+        ids = [ids]
+    cleaned = []
+    for value in ids or ():
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+            if not value.isdigit():
+                raise ValueError(value)
+            value = int(value)
+        elif not is_id(value):
+            raise ValueError(value)
+        cleaned.append(value)
+    return cleaned
+
+
+def max_length(model, name):
+    return model._meta.get_field(name).max_length
+
+
+class NameMap:
+    """Maps tag or category names to ids, creating missing names in bulk"""
+
+    def __init__(self, model, user):
+        self.model = model
+        self.user = user
+        self.ids = dict(
+            (name.lower(), pk)
+            for name, pk in model.objects.values_list('name', 'pk')
+        )
+        self.pks = set(self.ids.values())
+        self.unknown = 0
+
+    def resolve(self, values):
+        """Return the ids of names and ids in `values`, creating the names
+        not seen yet. Ids of missing rows give None."""
+        missing = sorted({value for value in values if not is_id(value)}
+                         - set(self.ids))
+        if missing:
+            objs = bulk.create(
+                self.model,
+                [self.model(user=self.user, name=name) for name in missing],
+                'name',
+            )
+            bulk.send_saved(self.model, objs, created=True)
+            self.ids.update((obj.name, obj.pk) for obj in objs)
+            self.pks.update(obj.pk for obj in objs)
+        ids = []
+        for value in values:
+            if not is_id(value):
+                ids.append(self.ids[value])
+            elif value in self.pks:
+                ids.append(value)
+            else:
+                self.unknown += 1
+                ids.append(None)
+        return ids
+
+
+def unique_slugs(bases, reserved=()):
+    """Return one slug per base, adding -2, -3... where a slug is taken by
+    an existing post, an earlier base or `reserved`. Runs one query per
+    round of new candidates, usually one or two in total."""
+    taken = set(reserved)
+    checked = set()
+    while True:
+        slugs = []
+        used = set()
+        for base in bases:
+            slug, suffix = base, 1
+            while slug in taken or slug in used:
+                suffix += 1
+                slug = f'{base}-{suffix}'
+            used.add(slug)
+            slugs.append(slug)
+        unchecked = used - checked
+        if not unchecked:
+            return slugs
+        taken.update(Post.objects.filter(
+            slug__in=unchecked
+        ).order_by().values_list('slug', flat=True))
+        checked |= unchecked
+
+
+class Importer:
+    """Writes posts read from a stream of dicts in batches.
+
+    Each batch costs a fixed number of queries: one for existing titles,
+    one or two for slugs, one bulk insert for posts and one per relation,
+    plus one insert per relation if new names appear. Rows that would not
+    fit the columns are left out and listed in `errors` as (row number,
+    message) pairs.
+    """
+
+    def __init__(self, user, batch_size=BATCH_SIZE):
+        self.user = user
+        self.batch_size = batch_size
+        self.names = {
+            name: NameMap(model, user)
+            for name, (model, _) in RELATIONS.items()
+        }
+        self.created = 0
+        self.skipped = 0
+        self.rows = 0
+        self.errors = []
+
+    def run(self, rows, progress=None):
+        """Import every row; `progress` is called after each batch"""
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return
+            self.write(batch)
+            if progress is not None:
+                progress(self)
+
+    def parse(self, row):
+        """Return model attributes, relation names or ids and the errors of
+        one row"""
+        errors = []
+        attrs = {name: (row.get(name) or '').strip() for name in TEXT_FIELDS}
+        for name, value in attrs.items():
+            limit = max_length(Post, name)
+            if limit and len(value) > limit:
+                errors.append(f'{name}: Ensure this value has at most '
+                              f'{limit} characters.')
+        publish_date = row.get('publish_date')
+        try:
+            attrs['publish_date'] = parse_datetime(publish_date) \
+                if publish_date else None
+        except ValueError:
+            attrs['publish_date'] = None
+        if publish_date and attrs['publish_date'] is None:
+            errors.append('publish_date: Invalid datetime.')
+        attrs['published'] = parse_bool(row.get('published', False))
+
+        relations = {}
+        for name, (model, _) in RELATIONS.items():
+            names = clean_names(row.get(name))
+            limit = max_length(model, 'name')
+            for value in names:
+                if len(value) > limit:
+                    errors.append(f'{name}: "{value[:limit]}..." is longer '
+                                  f'than {limit} characters.')
+            if names:
+                relations[name] = names
+                continue
+            try:
+                relations[name] = clean_ids(row.get(ID_COLUMNS[name]))
+            except ValueError as exc:
+                relations[name] = []
+                errors.append(f'{ID_COLUMNS[name]}: "{exc}" is not an id.')
+        return attrs, relations, errors
+
+    def write(self, batch):
+        parsed = []
+        for row in batch:
+            self.rows += 1
+            attrs, relations, errors = self.parse(row)
+            if errors:
+                self.errors += [(self.rows, error) for error in errors]
+            else:
+                parsed.append((attrs, relations))
+        titles = [attrs['title'] for attrs, _ in parsed]
+        existing = set(Post.objects.filter(
+            title__in=titles
+        ).order_by().values_list('title', flat=True))
+        items = []
+        for attrs, relations in parsed:
+            if not attrs['title'] or attrs['title'] in existing:
+                self.skipped += 1
+                continue
+            existing.add(attrs['title'])
+            items.append((attrs, relations))
+        if not items:
+            return
+
+        slugs = unique_slugs([
+            slugify(attrs['slug'] or attrs['title'])[:SLUG_LENGTH - 10]
+            or 'post'
+            for attrs, _ in items
+        ])
+        with transaction.atomic():
+            posts = bulk.create(Post, [
+                Post(user=self.user, **dict(attrs, slug=slug))
+                for (attrs, _), slug in zip(items, slugs)
+            ], 'slug', self.batch_size)
+            for name, (model, target) in RELATIONS.items():
+                names = self.names[name]
+                wanted = list({n for _, rel in items for n in rel[name]})
+                ids = dict(zip(wanted, names.resolve(wanted)))
+                affected = bulk.set_relations(
+                    getattr(Post, name).through, 'post_id', target,
+                    {post.pk: [ids[n] for n in rel[name]
+                               if ids[n] is not None]
+                     for post, (_, rel) in zip(posts, items)},
+                    batch_size=self.batch_size,
+                )
+                counts.recount(model, affected)
+        bulk.send_saved(Post, posts, created=True)
+        self.created += len(posts)
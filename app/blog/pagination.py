@@ -0,0 +1,203 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import reduce
+import operator
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(pagination.BasePagination):
+    """Cursor pagination that seeks on the ordering columns instead of
+    counting rows, so every page costs the same no matter how deep it is.
+
+    `ordering` must end in a unique column to give a total order. Nullable
+    columns are handled with the null placement of the database in use,
+    which keeps the ORDER BY identical to the one the index is built on.
+    """
+    ordering = ('-id',)
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = self.prepare(queryset)
+        limit = self.page_size + 1
+        position = self.decode_cursor(request)
+        if position is None:
+            results = list(queryset[:limit])
+        else:
+            seek, tail = self.get_seek_filters(position)
+            results = list(queryset.filter(seek)[:limit])
+            if tail is not None and len(results) < limit:
+                remaining = limit - len(results)
+                results += list(queryset.filter(tail)[:remaining])
+
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def prepare(self, queryset):
+        """Resolve the ordering columns and return the ordered queryset"""
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in self.ordering
+        ]
+        opts = queryset.model._meta
+        self.model_fields = [opts.get_field(name) for name, _ in self.fields]
+        self.nulls_largest = connections[
+            queryset.db
+        ].features.nulls_order_largest
+        return queryset.order_by(*self.ordering)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.get_cursor(self.page[-1])
+        )
+
+    def get_cursor(self, obj):
+        """Return the cursor that continues the listing after `obj`"""
+        position = [
+            None if field.value_from_object(obj) is None
+            else field.value_to_string(obj)
+            for field in self.model_fields
+        ]
+        return self.encode_cursor(position)
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, separators=(',', ':')).encode()
+        return urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padding = '=' * (-len(encoded) % 4)
+            position = json.loads(urlsafe_b64decode(encoded + padding))
+            return self.parse_position(position)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def parse_position(self, position):
+        if len(position) != len(self.model_fields):
+            raise ValueError
+        return [
+            None if value is None else field.to_python(value)
+            for field, value in zip(self.model_fields, position)
+        ]
+
+    def nulls_first(self, descending):
+        return descending == self.nulls_largest
+
+    def get_seek_filters(self, position):
+        """Return the WHERE clauses selecting rows strictly after `position`.
+
+        The second clause is only set when nulls in the leading column sort
+        after the cursor. Those rows are fetched by a separate query so the
+        first one stays a plain index range scan.
+        """
+        (lead, lead_descending), lead_value = self.fields[0], position[0]
+        tail = None
+        if (lead_value is not None and self.model_fields[0].null
+                and not self.nulls_first(lead_descending)):
+            tail = Q(**{f'{lead}__isnull': True})
+
+        branches = []
+        equal = Q()
+        columns = zip(self.fields, self.model_fields, position)
+        for index, ((name, descending), field, value) in enumerate(columns):
+            nullable = field.null and not (index == 0 and tail is not None)
+            after = self.get_after_filter(name, descending, value, nullable)
+            if after is not None:
+                branches.append(equal & after)
+            if value is None:
+                equal &= Q(**{f'{name}__isnull': True})
+            else:
+                equal &= Q(**{name: value})
+        if not branches:
+            return Q(pk__in=[]), tail
+
+        seek = reduce(operator.or_, branches)
+        if lead_value is not None:
+            # Bound the leading column on its own too, so the database can
+            # start an index range scan at the cursor.
+            lookup = 'lte' if lead_descending else 'gte'
+            seek &= Q(**{f'{lead}__{lookup}': lead_value})
+        return seek, tail
+
+    def get_after_filter(self, name, descending, value, nullable):
+        nulls_first = self.nulls_first(descending)
+        if value is None:
+            if nulls_first:
+                return Q(**{f'{name}__isnull': False})
+            return None
+        after = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+        if nullable and not nulls_first:
+            after |= Q(**{f'{name}__isnull': True})
+        return after
+
+
+class PostPagination(KeysetPagination):
+    """Follows Post.Meta.ordering with the primary key as tie-breaker"""
+    ordering = ('-publish_date', '-id')
+
+
+class NamePagination(KeysetPagination):
+    """Tags and categories have unique names, which is enough to seek on"""
+    ordering = ('-name',)
+
+
+class SearchPagination(KeysetPagination):
+    """Pages through ranked search results.
+
+    Ranks are computed per query and cannot be seeked on an index, so the
+    cursor carries the offset into the ranked matches instead.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+        self.offset = position[0] if position else 0
+
+        results = list(queryset[self.offset:self.offset + self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_cursor(self, obj):
+        return self.encode_cursor([self.offset + len(self.page)])
+
+    def parse_position(self, position):
+        offset, = position
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError
+        return [offset]
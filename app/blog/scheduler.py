@@ -0,0 +1,169 @@
+"""Publishes posts when their publish_date arrives.
+
+The worker keeps the upcoming dates of unpublished posts in a min-heap and
+sleeps until the earliest one is due. It learns about new and moved dates
+from an incremental read of recently modified drafts, run periodically and
+as soon as a saved draft marks the schedule as changed. Entries are not
+removed when a post changes; the publishing UPDATE checks every row again,
+so a stale entry publishes nothing.
+"""
+import heapq
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from core.models import Post
+from . import cache, counts
+
+
+logger = logging.getLogger(__name__)
+
+CHANGED_KEY = 'blog:scheduler:changed'
+# Read changes this far back again, for transactions that committed after
+# the previous read had started
+OVERLAP = timedelta(minutes=1)
+
+
+def mark_changed():
+    """Tell running schedulers to read changed drafts now. Only reaches
+    other processes when POST_CACHE_ALIAS is a shared cache."""
+    cache.get_cache().set(CHANGED_KEY, time.time_ns(), None)
+
+
+def publish(post_ids, now=None):
+    """Publish the posts among `post_ids` that are still drafts and due,
+    in one UPDATE, and return their ids"""
+    now = now or timezone.now()
+    with transaction.atomic():
+        rows = list(Post.objects.select_for_update().filter(
+            pk__in=post_ids, published=False, publish_date__lte=now,
+        ).order_by().values_list('id', 'slug'))
+        if not rows:
+            return []
+        ids = [pk for pk, _ in rows]
+        Post.objects.filter(pk__in=ids).update(
+            published=True, date_modified=now
+        )
+        # The UPDATE bypasses the signals that keep the counts
+        for model, linked in counts.linked_ids(ids).items():
+            counts.recount(model, linked)
+        cache.invalidate(*[slug for _, slug in rows])
+    return ids
+
+
+class Scheduler:
+    """Min-heap of (publish_date, post id) for the drafts to publish"""
+
+    def __init__(self, batch_size=None, reconcile_interval=None,
+                 poll_interval=None):
+        self.batch_size = settings.SCHEDULER_BATCH_SIZE \
+            if batch_size is None else batch_size
+        if self.batch_size < 1:
+            raise ValueError('Scheduler batch size must be at least 1.')
+        self.reconcile_interval = settings.SCHEDULER_RECONCILE_SECONDS \
+            if reconcile_interval is None else reconcile_interval
+        self.poll_interval = settings.SCHEDULER_POLL_SECONDS \
+            if poll_interval is None else poll_interval
+        self.heap = []
+        # Latest known date per post; heap entries that differ are stale
+        self.dates = {}
+        self.since = None
+        self.marker = None
+        self.next_reconcile = 0
+
+    def __len__(self):
+        return len(self.dates)
+
+    def push(self, post_id, publish_date):
+        if self.dates.get(post_id) != publish_date:
+            self.dates[post_id] = publish_date
+            heapq.heappush(self.heap, (publish_date, post_id))
+
+    def reconcile(self):
+        """Read the drafts changed since the last call, all of them on the
+        first, and return how many were read"""
+        started = timezone.now()
+        drafts = Post.objects.filter(
+            published=False, publish_date__isnull=False
+        )
+        if self.since is not None:
+            drafts = drafts.filter(date_modified__gt=self.since - OVERLAP)
+        read = 0
+        for post_id, publish_date in drafts.order_by().values_list(
+                'id', 'publish_date').iterator():
+            self.push(post_id, publish_date)
+            read += 1
+        self.since = started
+        self.next_reconcile = time.monotonic() + self.reconcile_interval
+        return read
+
+    def due(self, now):
+        """Pop and return the (publish_date, post id) entries due at
+        `now`"""
+        entries = []
+        while self.heap and self.heap[0][0] <= now:
+            publish_date, post_id = heapq.heappop(self.heap)
+            if self.dates.get(post_id) == publish_date:
+                del self.dates[post_id]
+                entries.append((publish_date, post_id))
+        return entries
+
+    def run_pending(self):
+        """Publish every due post, a batch per UPDATE, and return the
+        number published. Entries not yet published when an UPDATE fails
+        go back on the heap for the next tick."""
+        now = timezone.now()
+        entries = self.due(now)
+        published = start = 0
+        try:
+            for start in range(0, len(entries), self.batch_size):
+                batch = entries[start:start + self.batch_size]
+                published += len(publish([pk for _, pk in batch], now))
+        except Exception:
+            for publish_date, post_id in entries[start:]:
+                self.push(post_id, publish_date)
+            raise
+        return published
+
+    def changed(self):
+        marker = cache.get_cache().get(CHANGED_KEY)
+        if marker == self.marker:
+            return False
+        self.marker = marker
+        return True
+
+    def tick(self):
+        """Read changes when marked or due, then publish due posts"""
+        if self.changed() or time.monotonic() >= self.next_reconcile:
+            self.reconcile()
+        return self.run_pending()
+
+    def timeout(self):
+        """Seconds to sleep before the next tick"""
+        timeout = min(self.poll_interval,
+                      max(self.next_reconcile - time.monotonic(), 0))
+        if self.heap:
+            wait = (self.heap[0][0] - timezone.now()).total_seconds()
+            timeout = min(timeout, max(wait, 0))
+        return timeout
+
+    def run(self):
+        """Publish posts as they fall due until interrupted"""
+        while True:
+            timeout = None
+            try:
+                published = self.tick()
+            except Exception:
+                logger.exception('Scheduled publishing failed')
+                published = 0
+                # Failed entries are due again at once; do not spin
+                timeout = self.poll_interval
+            finally:
+                close_old_connections()
+            if published:
+                logger.info('Published %d scheduled posts', published)
+            time.sleep(self.timeout() if timeout is None else timeout)
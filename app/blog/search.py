@@ -0,0 +1,158 @@
+"""Ranked full-text search over posts.
+
+PostgreSQL keeps a weighted `search_vector` column on core_post up to date
+with a trigger and answers queries from its GIN index. Other backends
+(SQLite in tests and local development) use an in-process inverted index
+that is loaded on first use and kept current by the post signals.
+"""
+import math
+import re
+import threading
+from collections import defaultdict
+
+from django.db import connections
+from django.db.models import Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+
+from core.models import Post
+
+
+SEARCH_CONFIG = 'english'
+
+# Same weights PostgreSQL's ts_rank gives to the A, B, C and D labels
+FIELD_WEIGHTS = {
+    'title': 1.0,
+    'subtitle': 0.4,
+    'meta_description': 0.2,
+    'body': 0.1,
+}
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Split text into lower-cased search terms"""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    """Term to posting list index with weighted term frequencies"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        """Drop everything; the index reloads from the database on demand"""
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._documents = {}
+            self.loaded = False
+
+    def load(self):
+        """Build the index from every post in the database"""
+        with self._lock:
+            self.clear()
+            rows = Post.objects.values_list('id', *FIELD_WEIGHTS)
+            for row in rows.iterator():
+                self._add(row[0], dict(zip(FIELD_WEIGHTS, row[1:])))
+            self.loaded = True
+
+    def add(self, post):
+        """Index or re-index a post, if the index is in use"""
+        with self._lock:
+            if not self.loaded:
+                return
+            self._remove(post.pk)
+            self._add(post.pk, {
+                name: getattr(post, name) for name in FIELD_WEIGHTS
+            })
+
+    def remove(self, post_id):
+        """Remove a post, if the index is in use"""
+        with self._lock:
+            if self.loaded:
+                self._remove(post_id)
+
+    def _add(self, post_id, fields):
+        scores = defaultdict(float)
+        for name, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(fields.get(name)):
+                scores[term] += weight
+        for term, score in scores.items():
+            self._postings[term][post_id] = score
+        self._documents[post_id] = tuple(scores)
+
+    def _remove(self, post_id):
+        for term in self._documents.pop(post_id, ()):
+            postings = self._postings[term]
+            postings.pop(post_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def search(self, text, limit=None):
+        """Return (post_id, score) pairs matching every term, best first.
+
+        Work is proportional to the posting lists of the query terms, not
+        to the number of indexed posts.
+        """
+        terms = set(tokenize(text))
+        if not terms:
+            return []
+        with self._lock:
+            if not self.loaded:
+                self.load()
+            postings = [self._postings.get(term, {}) for term in terms]
+            postings.sort(key=len)
+            total = len(self._documents)
+            results = []
+            for post_id in postings[0]:
+                score = 0.0
+                for posting in postings:
+                    if post_id not in posting:
+                        break
+                    idf = math.log(1 + total / len(posting))
+                    score += posting[post_id] * idf
+                else:
+                    results.append((post_id, score))
+        results.sort(key=lambda item: (-item[1], -item[0]))
+        return results[:limit] if limit else results
+
+
+index = InvertedIndex()
+
+
+def uses_postgres(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def search_posts(queryset, text, max_results=1000):
+    """Filter `queryset` to posts matching `text`, ranked best first.
+
+    Matching posts are annotated with `search_rank`. `max_results` only
+    bounds the in-process fallback.
+    """
+    if uses_postgres(queryset):
+        table = connections[queryset.db].ops.quote_name(Post._meta.db_table)
+        tsquery = 'plainto_tsquery(%s, %s)'
+        return queryset.annotate(
+            search_rank=RawSQL(
+                f'ts_rank({table}.search_vector, {tsquery})',
+                (SEARCH_CONFIG, text),
+                output_field=FloatField(),
+            )
+        ).extra(
+            where=[f'{table}.search_vector @@ {tsquery}'],
+            params=[SEARCH_CONFIG, text],
+        ).order_by('-search_rank', '-id')
+
+    ranked = index.search(text, limit=max_results)
+    if not ranked:
+        return queryset.none()
+    return queryset.filter(id__in=[post_id for post_id, _ in ranked]).annotate(
+        search_rank=Case(
+            *[When(id=post_id, then=Value(score))
+              for post_id, score in ranked],
+            output_field=FloatField(),
+        )
+    ).order_by('-search_rank', '-id')
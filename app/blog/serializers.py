@@ -1,21 +1,120 @@
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.text import slugify
 from rest_framework import serializers
 
 from core.models import Tag, Category, Post
+from core.profiling import ProfiledSerializerMixin
+from . import bulk, counts, importer
 
 
-class TagSerializer(serializers.ModelSerializer):
+class BulkListSerializer(serializers.ListSerializer):
+    """Writes a validated batch with one bulk query per table"""
+    batch_size = 500
+
+    @property
+    def model(self):
+        return self.child.Meta.model
+
+    def own_ids(self, attrs):
+        """Return the pk of the instance each item updates, None when
+        creating"""
+        if self.instance is None:
+            return [None] * len(attrs)
+        return [instance.pk for instance in self.instance]
+
+    def create(self, validated_data):
+        model = self.model
+        with transaction.atomic():
+            objs = bulk.create(
+                model,
+                [model(**attrs) for attrs in validated_data],
+                self.child.Meta.bulk_lookup_field,
+                self.batch_size,
+            )
+        bulk.send_saved(model, objs, created=True)
+        return objs
+
+    def update(self, instances, validated_data):
+        fields = set()
+        for instance, attrs in zip(instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+                fields.add(attr)
+        with transaction.atomic():
+            if fields:
+                self.model.objects.bulk_update(
+                    instances, fields, batch_size=self.batch_size
+                )
+        bulk.send_saved(self.model, instances, created=False)
+        return instances
+
+
+def lower_names(model):
+    """Return rows of `model` annotated with their lower-cased name, the
+    expression covered by the case-insensitive unique index"""
+    return model.objects.annotate(lower_name=Lower('name'))
+
+
+class UniqueNameListSerializer(BulkListSerializer):
+    """Checks the names of a whole batch with a single query"""
+
+    def to_internal_value(self, data):
+        attrs = super().to_internal_value(data)
+        errors = [{} for _ in attrs]
+        seen = {}
+        for index, item in enumerate(attrs):
+            name = item.get('name')
+            if name is None:
+                continue
+            if name in seen:
+                errors[index]['name'] = ['Duplicate name in this batch']
+            else:
+                seen[name] = index
+
+        # A row only conflicts with another item than the one updating
+        # it; rows renamed in the same batch still hold their old name
+        # while bulk_update runs
+        own_ids = self.own_ids(attrs)
+        taken = lower_names(self.model).filter(
+            lower_name__in=list(seen)
+        ).values_list('pk', 'lower_name')
+        for pk, name in taken:
+            if pk != own_ids[seen[name]]:
+                errors[seen[name]]['name'] = [
+                    f'{self.model.__name__} with this name already exists'
+                ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
+class TagSerializer(ProfiledSerializerMixin,
+                    serializers.ModelSerializer):
     """Serializer for Tag object"""
 
     class Meta:
         model = Tag
-        fields = ('id', 'name')
+        fields = ('id', 'name', 'post_count', 'published_post_count')
+        read_only_fields = ('post_count', 'published_post_count')
         read_only_field = ('id',)
         ordering = ('-name',)
+        list_serializer_class = UniqueNameListSerializer
+        bulk_lookup_field = 'name'
+        # Uniqueness is case-insensitive and checked in validate_name
+        extra_kwargs = {'name': {'validators': []}}
 
     def validate_name(self, attrs):
         """Validate name field for duplicate case"""
         name = attrs.lower()
-        qs = Tag.objects.filter(name__iexact=name)
+        if isinstance(self.parent, serializers.ListSerializer):
+            # Checked for the whole batch by the list serializer
+            return name
+        qs = lower_names(Tag).filter(lower_name=name)
+        if self.instance is not None:
+            qs = qs.exclude(pk=self.instance.pk)
         if qs.exists():
             raise serializers.ValidationError(
                 "Tag with this name already exists"
@@ -23,19 +122,30 @@ class TagSerializer(serializers.ModelSerializer):
         return name
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(ProfiledSerializerMixin,
+                         serializers.ModelSerializer):
     """Serializer for Category object"""
 
     class Meta:
         model = Category
-        fields = ('id', 'name')
+        fields = ('id', 'name', 'post_count', 'published_post_count')
+        read_only_fields = ('post_count', 'published_post_count')
         read_only_field = ('id',)
         ordering = ('-name',)
+        list_serializer_class = UniqueNameListSerializer
+        bulk_lookup_field = 'name'
+        # Uniqueness is case-insensitive and checked in validate_name
+        extra_kwargs = {'name': {'validators': []}}
 
     def validate_name(self, attrs):
         """Validate name field for duplicate case"""
         name = attrs.lower()
-        qs = Category.objects.filter(name__iexact=name)
+        if isinstance(self.parent, serializers.ListSerializer):
+            # Checked for the whole batch by the list serializer
+            return name
+        qs = lower_names(Category).filter(lower_name=name)
+        if self.instance is not None:
+            qs = qs.exclude(pk=self.instance.pk)
         if qs.exists():
             raise serializers.ValidationError(
                 "Category with this name already exists"
@@ -43,8 +153,41 @@ class CategorySerializer(serializers.ModelSerializer):
         return name
 
 
-class PostSerializer(serializers.ModelSerializer):
+class SparseFieldsSerializerMixin:
+    """Drops fields not named in the `fields` argument or named in
+    `exclude`"""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        exclude = kwargs.pop('exclude', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in exclude or ():
+            self.fields.pop(name, None)
+
+
+class SrcsetField(serializers.ReadOnlyField):
+    """Maps the widths of the resized image copies to their URLs"""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'image_variants'
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        request = self.context.get('request')
+        urls = {}
+        for width, name in sorted(variants.items(), key=lambda i: int(i[0])):
+            url = default_storage.url(name)
+            urls[width] = request.build_absolute_uri(url) if request else url
+        return urls
+
+
+class PostSerializer(ProfiledSerializerMixin, SparseFieldsSerializerMixin,
+                     serializers.ModelSerializer):
     """Serializer for Post object"""
+    image_srcset = SrcsetField()
     tags = serializers.PrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
@@ -59,7 +202,7 @@ class PostSerializer(serializers.ModelSerializer):
         fields = ('id', 'tags', 'categories', 'title',
                   'subtitle', 'slug', 'body', 'meta_description',
                   'date_created', 'date_modified', 'publish_date',
-                  'published', 'image'
+                  'published', 'image', 'image_srcset'
                   )
         read_only_field = (
             'id', 'date_created', 'date_modified',
@@ -69,3 +212,173 @@ class PostSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'url': {'lookup_field': 'slug'}
         }
+
+
+class PostSummarySerializer(PostSerializer):
+    """Compact serializer for post lists, without the body"""
+
+    class Meta(PostSerializer.Meta):
+        fields = tuple(
+            name for name in PostSerializer.Meta.fields if name != 'body'
+        )
+
+
+class BatchPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field whose existence check is left to the list
+    serializer, so a batch costs one query instead of one per id"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class BulkPostListSerializer(BulkListSerializer):
+    """Validates and writes a batch of posts with set-based queries"""
+    relations = {
+        'tags': (Tag, 'tag_id'),
+        'categories': (Category, 'category_id'),
+    }
+    unique_fields = ('title', 'slug')
+
+    def to_internal_value(self, data):
+        # Raised here rather than in validate() so the errors keep their
+        # per-item list shape
+        attrs = super().to_internal_value(data)
+        errors = [{} for _ in attrs]
+        if self.instance is None:
+            self.fill_slugs(attrs)
+        self.check_unique(attrs, errors)
+        self.check_relations(attrs, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def fill_slugs(self, attrs):
+        """Give new posts sent without a slug one made from their title,
+        as the importer does"""
+        missing = [item for item in attrs if not item.get('slug')]
+        if not missing:
+            return
+        slugs = importer.unique_slugs(
+            [slugify(item['title'])[:importer.SLUG_LENGTH - 10] or 'post'
+             for item in missing],
+            reserved={item['slug'] for item in attrs if item.get('slug')},
+        )
+        for item, slug in zip(missing, slugs):
+            item['slug'] = slug
+
+    def check_unique(self, attrs, errors):
+        """Check title and slug against the batch and the database"""
+        own_ids = self.own_ids(attrs)
+        for name in self.unique_fields:
+            seen = {}
+            for index, item in enumerate(attrs):
+                if name not in item:
+                    continue
+                if item[name] in seen:
+                    errors[index][name] = [
+                        f'Duplicate {name} in this batch.'
+                    ]
+                seen.setdefault(item[name], index)
+            taken = Post.objects.filter(
+                **{f'{name}__in': list(seen)}
+            ).order_by().values_list('pk', name)
+            for pk, value in taken:
+                if pk != own_ids[seen[value]]:
+                    errors[seen[value]][name] = [
+                        f'post with this {name} already exists.'
+                    ]
+
+    def check_relations(self, attrs, errors):
+        """Check that every referenced tag and category exists"""
+        for name, (model, _) in self.relations.items():
+            wanted = {pk for item in attrs for pk in item.get(name, ())}
+            existing = set(model.objects.filter(
+                pk__in=wanted
+            ).values_list('pk', flat=True))
+            for index, item in enumerate(attrs):
+                missing = sorted(set(item.get(name, ())) - existing)
+                if missing:
+                    errors[index][name] = [
+                        f'Invalid pk "{pk}" - object does not exist.'
+                        for pk in missing
+                    ]
+
+    def pop_relations(self, validated_data):
+        return [
+            {name: attrs.pop(name) for name in self.relations if name in attrs}
+            for attrs in validated_data
+        ]
+
+    def set_relations(self, posts, relations, replace, published=()):
+        """Write the links of `posts` and recount the tags and categories
+        they touch, along with those of the posts `published` changed"""
+        linked = counts.linked_ids(published) if published else {}
+        for name, (model, target) in self.relations.items():
+            affected = bulk.set_relations(
+                getattr(Post, name).through, 'post_id', target,
+                {post.pk: rel[name] for post, rel in zip(posts, relations)
+                 if name in rel},
+                replace=replace,
+                batch_size=self.batch_size,
+            )
+            # Bulk link writes send no m2m_changed
+            counts.recount(model, affected | linked.get(model, set()))
+
+    def create(self, validated_data):
+        relations = self.pop_relations(validated_data)
+        with transaction.atomic():
+            posts = bulk.create(
+                Post,
+                [Post(**attrs) for attrs in validated_data],
+                'slug',
+                self.batch_size,
+            )
+            self.set_relations(posts, relations, replace=False)
+        bulk.send_saved(Post, posts, created=True)
+        return posts
+
+    def update(self, instances, validated_data):
+        relations = self.pop_relations(validated_data)
+        # bulk_update does not run auto_now
+        now = timezone.now()
+        for attrs in validated_data:
+            attrs['date_modified'] = now
+        # Read before the save signals reset _original_published
+        published = [
+            instance.pk for instance, attrs in zip(instances, validated_data)
+            if 'published' in attrs
+            and attrs['published'] != instance._original_published
+        ]
+        with transaction.atomic():
+            instances = super().update(instances, validated_data)
+            self.set_relations(instances, relations, replace=True,
+                               published=published)
+        return instances
+
+
+class BulkPostSerializer(PostSerializer):
+    """Serializer for Post objects written through the bulk endpoint"""
+    tags = BatchPrimaryKeyRelatedField(
+        many=True,
+        queryset=Tag.objects.all(),
+        required=False
+    )
+    categories = BatchPrimaryKeyRelatedField(
+        many=True,
+        queryset=Category.objects.all(),
+        required=False
+    )
+
+    class Meta(PostSerializer.Meta):
+        list_serializer_class = BulkPostListSerializer
+        read_only_fields = ('image',)
+        # Uniqueness is checked once per batch by the list serializer
+        extra_kwargs = {
+            'title': {'validators': []},
+            'slug': {'validators': []},
+        }
@@ -0,0 +1,170 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete, \
+    pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Tag, Category, Post, ImageBlob
+from . import cache, counts, images, scheduler, search, typeahead
+
+
+@receiver(post_init, sender=Post)
+def remember_post_slug(sender, instance, **kwargs):
+    """Keep the loaded slug so a rename can invalidate the old one"""
+    instance._original_slug = instance.__dict__.get('slug')
+    instance._original_image = instance.__dict__.get('image')
+    instance._original_published = instance.__dict__.get('published')
+
+
+@receiver(post_save, sender=Post)
+def post_image_changed(sender, instance, raw=False, **kwargs):
+    """Move the stored file reference and queue variant generation when a
+    post gets a different image"""
+    if raw or 'image' not in instance.__dict__:
+        return
+    name = instance.image.name or None
+    # A file assigned before the first save is not a stored name yet
+    original = instance._original_image
+    original = original if isinstance(original, str) and original else None
+    if name != original:
+        instance._original_image = name
+        if name:
+            ImageBlob.objects.retain(name)
+        if original:
+            ImageBlob.objects.release(original)
+        images.schedule(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, **kwargs):
+    """Drop the deleted post's reference to its stored file"""
+    if 'image' in instance.__dict__ and instance.image:
+        ImageBlob.objects.release(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    """Keep the in-process search index in step with saved posts"""
+    search.index.add(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_cache(sender, instance, **kwargs):
+    """Drop cached responses for a changed or deleted post"""
+    cache.invalidate(instance.slug, instance._original_slug)
+    instance._original_slug = instance.slug
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    """Drop deleted posts from the in-process search index"""
+    search.index.remove(instance.pk)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+@receiver(m2m_changed, sender=Post.categories.through)
+def post_relations_changed(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Mark posts whose tags or categories changed as modified"""
+    if reverse and action == 'pre_clear':
+        instance._cleared_post_ids = list(
+            instance.post_set.values_list('id', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    now = timezone.now()
+    if not reverse:
+        Post.objects.filter(pk=instance.pk).update(date_modified=now)
+        instance.date_modified = now
+        cache.invalidate(instance.slug)
+        return
+    if action == 'post_clear':
+        post_ids = getattr(instance, '_cleared_post_ids', [])
+    else:
+        post_ids = pk_set
+    if post_ids:
+        Post.objects.filter(pk__in=post_ids).update(date_modified=now)
+        cache.invalidate_posts(post_ids)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+@receiver(m2m_changed, sender=Post.categories.through)
+def count_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep tag and category post counts in step with link changes"""
+    counts.links_changed(sender, instance, action, reverse, pk_set)
+
+
+@receiver(post_save, sender=Post)
+def count_publish_change(sender, instance, created, raw=False, bulk=False,
+                         **kwargs):
+    """Move a post between the published counts of its tags and
+    categories when it is published or withdrawn. Batches recount their
+    tags and categories once instead."""
+    if raw or 'published' not in instance.__dict__:
+        return
+    original = instance._original_published
+    instance._original_published = instance.published
+    if created or bulk or original is None \
+            or original == instance.published:
+        return
+    sign = 1 if instance.published else -1
+    for model, ids in counts.linked_ids([instance.pk]).items():
+        counts.adjust(model, ids, published=sign)
+
+
+@receiver(post_save, sender=Post)
+def schedule_post(sender, instance, raw=False, **kwargs):
+    """Wake the publishing scheduler when a draft with a date is saved"""
+    fields = instance.__dict__
+    if raw or 'published' not in fields or 'publish_date' not in fields:
+        return
+    if not instance.published and instance.publish_date is not None:
+        transaction.on_commit(scheduler.mark_changed)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_post_links(sender, instance, **kwargs):
+    """Read the links a post delete will cascade away without m2m_changed"""
+    instance._deleted_links = counts.linked_ids([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def count_post_delete(sender, instance, **kwargs):
+    for model, ids in getattr(instance, '_deleted_links', {}).items():
+        counts.adjust_for_post(instance, model, ids, -1)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Category)
+def related_posts_changed(sender, instance, **kwargs):
+    """Deleting a tag or category removes it from posts without m2m_changed"""
+    posts = instance.post_set.all()
+    cache.invalidate(*posts.values_list('slug', flat=True))
+    posts.update(date_modified=timezone.now())
+
+
+@receiver(post_save, sender=Tag)
+def index_tag(sender, instance, **kwargs):
+    """Keep the tag typeahead index in step with saved tags"""
+    typeahead.tags.add(instance)
+
+
+@receiver(post_delete, sender=Tag)
+def unindex_tag(sender, instance, **kwargs):
+    """Drop deleted tags from the typeahead index"""
+    typeahead.tags.remove(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def index_category(sender, instance, **kwargs):
+    """Keep the category typeahead index in step with saved categories"""
+    typeahead.categories.add(instance)
+
+
+@receiver(post_delete, sender=Category)
+def unindex_category(sender, instance, **kwargs):
+    """Drop deleted categories from the typeahead index"""
+    typeahead.categories.remove(instance.pk)
@@ -0,0 +1,242 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Category, Post
+
+
+TAG_BULK_URL = reverse('blog:tag-bulk')
+CATEGORY_BULK_URL = reverse('blog:category-bulk')
+POST_BULK_URL = reverse('blog:post-bulk')
+
+
+class BulkApiTests(TestCase):
+    """Test the batch create, update and delete endpoints"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_does_not_shadow_post_slug(self):
+        """Test a post with the slug bulk stays reachable"""
+        post = Post.objects.create(user=self.user, title='bulk', slug='bulk')
+        url = reverse('blog:post-detail-slug', args=[post.slug])
+
+        res = self.client.patch(url, {'subtitle': 'changed'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        post.refresh_from_db()
+        self.assertEqual(post.subtitle, 'changed')
+
+        res = self.client.delete(url)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_bulk_create_tags(self):
+        """Test creating several tags in one request"""
+        payload = [{'name': 'news'}, {'name': 'tech'}, {'name': 'sport'}]
+
+        res = self.client.post(TAG_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 3)
+        self.assertTrue(all(item['id'] for item in res.data))
+
+    def test_bulk_create_categories(self):
+        """Test creating several categories in one request"""
+        payload = [{'name': 'backend'}, {'name': 'frontend'}]
+
+        res = self.client.post(CATEGORY_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Category.objects.count(), 2)
+
+    def test_bulk_create_posts_with_relations(self):
+        """Test creating posts and their tags with batched queries"""
+        tags = [Tag.objects.create(user=self.user, name=f'tag{i}')
+                for i in range(3)]
+        category = Category.objects.create(user=self.user, name='backend')
+        payload = [
+            {
+                'title': f'post {i}',
+                'slug': f'post-{i}',
+                'tags': [tag.id for tag in tags],
+                'categories': [category.id],
+            }
+            for i in range(10)
+        ]
+
+        res = self.client.post(POST_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Post.objects.count(), 10)
+        for post in Post.objects.all():
+            self.assertEqual(post.tags.count(), 3)
+            self.assertEqual(list(post.categories.all()), [category])
+
+    def test_bulk_create_query_count_is_constant(self):
+        """Test that a larger batch does not run more queries"""
+        tag = Tag.objects.create(user=self.user, name='news')
+
+        def payload(start, count):
+            return [{'title': f'post {i}', 'slug': f'post-{i}',
+                     'tags': [tag.id], 'categories': []}
+                    for i in range(start, start + count)]
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(POST_BULK_URL, payload(0, 2), format='json')
+        with self.assertNumQueries(len(small.captured_queries)):
+            self.client.post(POST_BULK_URL, payload(2, 50), format='json')
+
+    def test_bulk_create_reports_errors_per_item(self):
+        """Test that invalid items are reported and nothing is written"""
+        Post.objects.create(user=self.user, title='taken', slug='taken')
+        payload = [
+            {'title': 'fine', 'slug': 'fine'},
+            {'title': 'taken', 'slug': 'other'},
+            {'title': 'again', 'slug': 'fine', 'tags': [999]},
+        ]
+
+        res = self.client.post(POST_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('title', res.data[1])
+        self.assertIn('slug', res.data[2])
+        self.assertIn('tags', res.data[2])
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_bulk_update_posts(self):
+        """Test updating several posts and replacing their tags"""
+        old_tag = Tag.objects.create(user=self.user, name='old')
+        new_tag = Tag.objects.create(user=self.user, name='new')
+        posts = [Post.objects.create(user=self.user, title=f'post {i}',
+                                     slug=f'post-{i}') for i in range(3)]
+        for post in posts:
+            post.tags.add(old_tag)
+        payload = [{'id': post.id, 'subtitle': 'updated',
+                    'tags': [new_tag.id]} for post in posts]
+
+        res = self.client.patch(POST_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for post in posts:
+            post.refresh_from_db()
+            self.assertEqual(post.subtitle, 'updated')
+            self.assertEqual(list(post.tags.all()), [new_tag])
+
+    def test_bulk_update_unknown_id(self):
+        """Test that updating a missing object is reported per item"""
+        post = Post.objects.create(user=self.user, title='a', slug='a')
+        payload = [{'id': post.id, 'subtitle': 'x'},
+                   {'id': 12345, 'subtitle': 'y'}]
+
+        res = self.client.patch(POST_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('id', res.data[1])
+
+    def test_bulk_delete_tags(self):
+        """Test deleting several tags by id"""
+        tags = [Tag.objects.create(user=self.user, name=f'tag{i}')
+                for i in range(3)]
+        ids = [tags[0].id, tags[1].id, 12345]
+
+        res = self.client.delete(TAG_BULK_URL, {'ids': ids}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['deleted'], ids[:2])
+        self.assertEqual(res.data['not_found'], [12345])
+        self.assertEqual(list(Tag.objects.all()), [tags[2]])
+
+    def test_bulk_requires_list(self):
+        """Test that a single object is rejected"""
+        res = self.client.post(TAG_BULK_URL, {'name': 'x'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_tag_names_checked_in_one_query(self):
+        """Test that a batch of names is validated with one query"""
+        payload = [{'name': f'tag{i}'} for i in range(20)]
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(TAG_BULK_URL, payload, format='json')
+
+        lookups = [q for q in ctx.captured_queries
+                   if 'LOWER' in q['sql'].upper()]
+        self.assertEqual(len(lookups), 1)
+
+    def test_bulk_tag_duplicates_reported(self):
+        """Test duplicates within the batch and against the database"""
+        Tag.objects.create(user=self.user, name='news')
+        payload = [{'name': 'Tech'}, {'name': 'NEWS'}, {'name': 'tech'}]
+
+        res = self.client.post(TAG_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('name', res.data[1])
+        self.assertIn('name', res.data[2])
+        self.assertEqual(Tag.objects.count(), 1)
+
+    def test_bulk_rename_categories(self):
+        """Test renaming categories, keeping one name unchanged"""
+        first = Category.objects.create(user=self.user, name='backend')
+        second = Category.objects.create(user=self.user, name='frontend')
+        payload = [{'id': first.id, 'name': 'Backend'},
+                   {'id': second.id, 'name': 'design'}]
+
+        res = self.client.patch(CATEGORY_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = set(Category.objects.values_list('name', flat=True))
+        self.assertEqual(names, {'backend', 'design'})
+
+    def test_bulk_rename_to_name_of_other_item(self):
+        """Test that taking the name of another row in the batch is
+        reported rather than failing on the unique index"""
+        first = Tag.objects.create(user=self.user, name='news')
+        second = Tag.objects.create(user=self.user, name='tech')
+        payload = [{'id': first.id, 'name': 'tech'},
+                   {'id': second.id, 'name': 'sport'}]
+
+        res = self.client.patch(TAG_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', res.data[0])
+        self.assertEqual(res.data[1], {})
+
+    def test_bulk_retitle_to_title_of_other_item(self):
+        """Test that post titles and slugs are checked against the other
+        posts of the batch"""
+        first = Post.objects.create(user=self.user, title='a', slug='a')
+        second = Post.objects.create(user=self.user, title='b', slug='b')
+        payload = [{'id': first.id, 'title': 'b', 'slug': 'b'},
+                   {'id': second.id, 'subtitle': 'x'}]
+
+        res = self.client.patch(POST_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('title', res.data[0])
+        self.assertIn('slug', res.data[0])
+        self.assertEqual(res.data[1], {})
+
+    def test_bulk_create_posts_without_slug(self):
+        """Test that posts sent without a slug get one from their title"""
+        Post.objects.create(user=self.user, title='taken', slug='hello')
+        payload = [{'title': 'Hello'}, {'title': 'hello!'},
+                   {'title': 'other', 'slug': 'hello-2'}]
+
+        res = self.client.post(POST_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['slug'] for item in res.data],
+                         ['hello-3', 'hello-4', 'hello-2'])
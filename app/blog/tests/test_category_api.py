@@ -56,7 +56,7 @@ class PrivateCategoryApiTest(TestCase):
         categories = Category.objects.all().order_by('-name')
         serializer = CategorySerializer(categories, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_create_category_successful(self):
         """Test creating a new category"""
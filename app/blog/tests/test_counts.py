@@ -0,0 +1,155 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Tag, Category, Post
+
+
+class PostCountTests(TestCase):
+    """Test the post counts stored on tags and categories"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.tag = Tag.objects.create(user=self.user, name='news')
+        self.other = Tag.objects.create(user=self.user, name='tech')
+        self.category = Category.objects.create(user=self.user, name='dev')
+
+    def create_post(self, i, **params):
+        return Post.objects.create(user=self.user, title=f'post {i}',
+                                   slug=f'post-{i}', **params)
+
+    def assertCounts(self, obj, total, published):
+        obj.refresh_from_db()
+        self.assertEqual((obj.post_count, obj.published_post_count),
+                         (total, published))
+
+    def test_add_and_remove_from_post(self):
+        """Test counts follow links changed from the post side"""
+        post = self.create_post(1, published=True)
+        post.tags.add(self.tag, self.other)
+        post.categories.add(self.category)
+        self.assertCounts(self.tag, 1, 1)
+        self.assertCounts(self.category, 1, 1)
+
+        post.tags.remove(self.tag)
+        post.tags.remove(self.tag)
+        self.assertCounts(self.tag, 0, 0)
+        self.assertCounts(self.other, 1, 1)
+
+        post.tags.clear()
+        self.assertCounts(self.other, 0, 0)
+
+    def test_add_and_clear_from_tag(self):
+        """Test counts follow links changed from the tag side"""
+        posts = [self.create_post(i, published=i % 2 == 0) for i in range(3)]
+
+        self.tag.post_set.add(*posts)
+        self.assertCounts(self.tag, 3, 2)
+
+        self.tag.post_set.remove(posts[0])
+        self.assertCounts(self.tag, 2, 1)
+
+        self.tag.post_set.clear()
+        self.assertCounts(self.tag, 0, 0)
+
+    def test_set_counts_only_changes(self):
+        """Test set() counts the links it adds and removes"""
+        post = self.create_post(1)
+        post.tags.set([self.tag])
+
+        post.tags.set([self.tag, self.other])
+
+        self.assertCounts(self.tag, 1, 0)
+        self.assertCounts(self.other, 1, 0)
+
+    def test_publish_transition(self):
+        """Test publishing and withdrawing a post moves its counts"""
+        post = self.create_post(1)
+        post.tags.add(self.tag)
+
+        post.published = True
+        post.save()
+        self.assertCounts(self.tag, 1, 1)
+
+        post.published = False
+        post.save()
+        self.assertCounts(self.tag, 1, 0)
+
+    def test_delete_post(self):
+        """Test deleting a post removes it from the counts"""
+        post = self.create_post(1, published=True)
+        post.tags.add(self.tag)
+
+        post.delete()
+
+        self.assertCounts(self.tag, 0, 0)
+
+    def test_bulk_endpoints_recount(self):
+        """Test posts written in bulk are counted"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        payload = [{'title': f'post {i}', 'slug': f'post-{i}',
+                    'tags': [self.tag.id]} for i in range(3)]
+
+        res = client.post(reverse('blog:post-bulk'), payload, format='json')
+        self.assertCounts(self.tag, 3, 0)
+
+        client.patch(reverse('blog:post-bulk'), [
+            {'id': item['id'], 'tags': [self.other.id]} for item in res.data
+        ], format='json')
+        self.assertCounts(self.tag, 0, 0)
+        self.assertCounts(self.other, 3, 0)
+
+    def test_bulk_publish_recounts_once(self):
+        """Test publishing posts in bulk moves their counts with a query
+        count that does not grow with the batch"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        posts = [self.create_post(i) for i in range(55)]
+        for post in posts:
+            post.tags.add(self.tag)
+            post.categories.add(self.category)
+
+        def publish(batch):
+            return client.patch(reverse('blog:post-bulk'), [
+                {'id': post.id, 'published': True} for post in batch
+            ], format='json')
+
+        with CaptureQueriesContext(connection) as small:
+            publish(posts[:5])
+        with self.assertNumQueries(len(small.captured_queries)):
+            publish(posts[5:])
+        self.assertCounts(self.tag, 55, 55)
+        self.assertCounts(self.category, 55, 55)
+
+    def test_counts_in_tag_api(self):
+        """Test the tag detail exposes the counts"""
+        self.create_post(1, published=True).tags.add(self.tag)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(reverse('blog:tag-detail', args=[self.tag.id]))
+
+        self.assertEqual(res.data['post_count'], 1)
+        self.assertEqual(res.data['published_post_count'], 1)
+
+    def test_reconcile_command(self):
+        """Test the reconcile command fixes drifted counts"""
+        self.create_post(1, published=True).tags.add(self.tag)
+        Tag.objects.filter(pk=self.tag.pk).update(post_count=7)
+        out = StringIO()
+
+        call_command('reconcile_counts', stdout=out)
+
+        self.assertCounts(self.tag, 1, 1)
+        self.assertIn('news: 7 -> 1 posts', out.getvalue())
@@ -0,0 +1,117 @@
+import csv
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Category, Post
+from blog import export
+
+
+EXPORT_URL = reverse('blog:post-export')
+
+
+class PostExportTests(TestCase):
+    """Test streaming the post table out"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tags = [Tag.objects.create(user=self.user, name=f'tag{i}')
+                     for i in range(2)]
+        self.category = Category.objects.create(user=self.user, name='dev')
+
+    def create_posts(self, count):
+        posts = [Post.objects.create(user=self.user, title=f'post {i}',
+                                     slug=f'post-{i}', body='body')
+                 for i in range(count)]
+        for post in posts:
+            post.tags.set(self.tags)
+            post.categories.set([self.category])
+        return posts
+
+    def test_export_does_not_shadow_post_slug(self):
+        """Test a post with the slug export stays reachable"""
+        post = Post.objects.create(user=self.user, title='export',
+                                   slug='export')
+        url = reverse('blog:post-detail-slug', args=[post.slug])
+
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['id'], post.id)
+
+        res = self.client.delete(url)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertNotEqual(EXPORT_URL, url)
+
+    def test_export_ndjson(self):
+        """Test the endpoint streams one JSON document per post"""
+        posts = self.create_posts(3)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        rows = [json.loads(line) for line in
+                b''.join(res.streaming_content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows],
+                         [post.id for post in posts])
+        self.assertEqual(rows[0]['tags'], [tag.name for tag in self.tags])
+        self.assertEqual(rows[0]['tag_ids'], [tag.id for tag in self.tags])
+        self.assertEqual(rows[0]['categories'], ['dev'])
+        self.assertEqual(rows[0]['category_ids'], [self.category.id])
+
+    def test_export_csv(self):
+        """Test the endpoint streams CSV with a header row"""
+        self.create_posts(2)
+
+        res = self.client.get(EXPORT_URL, {'type': 'csv'})
+
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['tags'], 'tag0,tag1')
+        self.assertEqual(rows[0]['tag_ids'],
+                         ','.join(str(tag.id) for tag in self.tags))
+
+    def test_export_unknown_type(self):
+        """Test that an unknown output type is rejected"""
+        res = self.client.get(EXPORT_URL, {'type': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_queries_per_chunk(self):
+        """Test relations are read once per chunk rather than per post"""
+        self.create_posts(6)
+
+        with CaptureQueriesContext(connection) as ctx:
+            rows = list(export.iter_posts(chunk_size=2))
+
+        self.assertEqual(len(rows), 6)
+        # One for the posts, then one per relation for each of 3 chunks
+        self.assertEqual(len(ctx.captured_queries), 1 + 3 * 2)
+
+    def test_export_command(self):
+        """Test the management command writes the same export"""
+        self.create_posts(2)
+        out = StringIO()
+
+        call_command('export_posts', '--chunk-size', '1', stdout=out,
+                     stderr=StringIO())
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]['category_ids'], [self.category.id])
@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Post
+from blog.pagination import PostPagination
+from blog.views import feed_queryset
+
+
+FEED_URL = reverse('blog:post-feed')
+FEED_INDEX = 'core_post_published_feed_idx'
+
+
+class PostFeedTests(TestCase):
+    """Test the public feed of published posts"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+
+    def create_post(self, i, **params):
+        params.setdefault('slug', f'post-{i}')
+        return Post.objects.create(user=self.user, title=f'post {i}',
+                                   **params)
+
+    def test_feed_is_public(self):
+        """Test the feed needs no credentials"""
+        res = self.client.get(FEED_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [])
+
+    def test_feed_does_not_shadow_post_slug(self):
+        """Test a post with the slug feed can be deleted"""
+        post = self.create_post(1, slug='feed')
+        self.client.force_authenticate(self.user)
+
+        res = self.client.delete(
+            reverse('blog:post-detail-slug', args=[post.slug])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+
+    def test_feed_is_read_only(self):
+        """Test posts cannot be created through the feed"""
+        self.client.force_authenticate(self.user)
+
+        res = self.client.post(FEED_URL, {'title': 'new'})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_feed_lists_published_posts_only(self):
+        """Test drafts and scheduled posts are left out, newest first"""
+        now = timezone.now()
+        old = self.create_post(1, published=True,
+                               publish_date=now - timedelta(days=2))
+        new = self.create_post(2, published=True,
+                               publish_date=now - timedelta(days=1))
+        self.create_post(3, published=False, publish_date=now)
+        self.create_post(4, published=True,
+                         publish_date=now + timedelta(days=1))
+        self.create_post(5, published=True)
+
+        res = self.client.get(FEED_URL)
+
+        self.assertEqual([item['slug'] for item in res.data['results']],
+                         [new.slug, old.slug])
+        self.assertNotIn('body', res.data['results'][0])
+
+    def test_feed_pages(self):
+        """Test the feed follows its cursor to the end"""
+        now = timezone.now()
+        for i in range(5):
+            self.create_post(i, published=True,
+                             publish_date=now - timedelta(hours=i))
+
+        slugs = []
+        url = FEED_URL + '?page_size=2'
+        while url:
+            res = self.client.get(url)
+            slugs += [item['slug'] for item in res.data['results']]
+            url = res.data['next']
+
+        self.assertEqual(slugs, [f'post-{i}' for i in range(5)])
+
+    def test_feed_does_not_select_body(self):
+        """Test the feed only selects the columns it renders"""
+        self.create_post(1, published=True, body='a long body',
+                         publish_date=timezone.now() - timedelta(hours=1))
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(FEED_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('body', res.data['results'][0])
+        sql = [q['sql'] for q in ctx.captured_queries
+               if '"core_post"."title"' in q['sql']]
+        self.assertEqual(len(sql), 1)
+        self.assertNotIn('"core_post"."body"', sql[0])
+
+    def test_feed_query_uses_partial_index(self):
+        """Test the feed page query is answered from the feed index"""
+        now = timezone.now()
+        for i in range(20):
+            self.create_post(i, published=i % 2 == 0,
+                             publish_date=now - timedelta(hours=i))
+        queryset = feed_queryset().order_by(*PostPagination.ordering)[:21]
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Small tables are scanned whatever the indexes
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            else:
+                cursor.execute('ANALYZE')
+            plan = queryset.explain()
+
+        self.assertIn(FEED_INDEX, plan)
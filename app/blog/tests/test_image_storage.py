@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.management.commands.gc_images import Command
+from core.models import ImageBlob, Post
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def sample_image(color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', (50, 50), color).save(buffer, 'PNG')
+    return SimpleUploadedFile('sample.png', buffer.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ContentAddressedImageTests(TestCase):
+    """Test that identical images are stored once and reference counted"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+
+    def create_post(self, i, image):
+        return Post.objects.create(user=self.user, title=f'post {i}',
+                                   slug=f'post-{i}', image=image)
+
+    def test_same_content_stored_once(self):
+        """Test two posts with the same image share one file"""
+        first = self.create_post(1, sample_image())
+        second = self.create_post(2, sample_image())
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name,
+                         r'^uploads/blog/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        directory = os.path.dirname(first.image.path)
+        self.assertEqual(len(os.listdir(directory)), 1)
+        self.assertEqual(ImageBlob.objects.get().refcount, 2)
+
+    def test_references_released(self):
+        """Test replacing and deleting images lower the count"""
+        first = self.create_post(1, sample_image())
+        second = self.create_post(2, sample_image())
+        name = first.image.name
+
+        second.image = sample_image(color='blue')
+        second.save()
+        first.delete()
+
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 0)
+        self.assertEqual(
+            ImageBlob.objects.get(name=second.image.name).refcount, 1
+        )
+
+    def test_gc_deletes_orphans(self):
+        """Test the gc command removes only unreferenced files"""
+        kept = self.create_post(1, sample_image())
+        dropped = self.create_post(2, sample_image(color='blue'))
+        orphan = dropped.image.path
+        dropped.delete()
+
+        call_command('gc_images', '--min-age', '0', stdout=StringIO())
+
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(kept.image.path))
+        blobs = ImageBlob.objects.values_list('name', 'refcount')
+        self.assertEqual(list(blobs), [(kept.image.name, 1)])
+
+    def test_gc_dry_run(self):
+        """Test a dry run deletes nothing"""
+        post = self.create_post(1, sample_image())
+        path = post.image.path
+        post.delete()
+
+        call_command('gc_images', '--min-age', '0', '--dry-run',
+                     stdout=StringIO())
+
+        self.assertTrue(os.path.exists(path))
+
+    def test_same_content_refreshes_modified_time(self):
+        """Test storing known content again marks the file as recent"""
+        path = self.create_post(1, sample_image()).image.path
+        os.utime(path, (0, 0))
+
+        self.create_post(2, sample_image())
+
+        self.assertGreater(os.path.getmtime(path), 0)
+
+    def test_gc_keeps_file_referenced_after_reconcile(self):
+        """Test a file a post starts using during the gc run is kept"""
+        dropped = self.create_post(1, sample_image())
+        name, path = dropped.image.name, dropped.image.path
+        dropped.delete()
+        reconcile = Command.reconcile
+
+        def reconcile_then_reference(command):
+            referenced = reconcile(command)
+            self.create_post(2, name)
+            return referenced
+
+        with patch.object(Command, 'reconcile', reconcile_then_reference):
+            call_command('gc_images', '--min-age', '0', stdout=StringIO())
+
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue(ImageBlob.objects.filter(name=name).exists())
@@ -0,0 +1,109 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Post
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_bytes(fmt='PNG', size=(200, 100)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def image_url(slug):
+    return reverse('blog:post-image', args=[slug])
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_UPLOAD_MAX_BYTES=200_000,
+                   IMAGE_UPLOAD_MAX_DIMENSION=1000)
+class ImageUploadTests(TestCase):
+    """Test the streaming post image upload"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(user=self.user, title='sample',
+                                        slug='sample')
+
+    def upload(self, data, content_type='image/png'):
+        return self.client.put(image_url(self.post.slug), data,
+                               content_type=content_type)
+
+    def test_upload_image(self):
+        """Test the raw body is stored as the post image"""
+        res = self.upload(image_bytes())
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.image.name.endswith('.png'))
+        with Image.open(self.post.image.path) as image:
+            self.assertEqual(image.size, (200, 100))
+
+    def test_extension_follows_content(self):
+        """Test the stored name uses the detected format"""
+        self.upload(image_bytes('JPEG'), content_type='image/png')
+
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.image.name.endswith('.jpg'))
+
+    def test_declared_size_rejected_early(self):
+        """Test a too large Content-Length is refused before reading"""
+        res = self.client.generic(
+            'PUT', image_url(self.post.slug), image_bytes(),
+            content_type='image/png', CONTENT_LENGTH='300000',
+        )
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_streamed_size_rejected(self):
+        """Test a body over the limit is refused while streaming"""
+        data = image_bytes() + b'\0' * 250_000
+
+        res = self.upload(data)
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.image)
+
+    def test_dimensions_rejected(self):
+        """Test an image wider than the limit is refused"""
+        res = self.upload(image_bytes(size=(1200, 10)))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_not_an_image(self):
+        """Test a body that is not an image is refused"""
+        res = self.upload(b'plain text, not an image')
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_unknown_post(self):
+        """Test uploading to a missing post returns 404"""
+        res = self.client.put(image_url('missing'), image_bytes(),
+                              content_type='image/png')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
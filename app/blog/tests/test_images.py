@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from rest_framework.test import APIClient
+
+from core.models import Post
+from blog import cache, images
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def sample_image(color='red', size=(800, 600)):
+    """Return an uploaded PNG file"""
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile('sample.png', buffer.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_VARIANTS_SYNC=True,
+                   IMAGE_VARIANT_WIDTHS=(320, 640, 1280),
+                   IMAGE_VARIANT_FORMAT='WEBP')
+class ImageVariantTests(TestCase):
+    """Test generating resized copies of post images"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+
+    def create_post(self, **params):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(user=self.user, title='sample',
+                                       slug='sample', **params)
+        post.refresh_from_db()
+        return post
+
+    def test_variants_generated_on_save(self):
+        """Test narrower copies are stored for a new image"""
+        post = self.create_post(image=sample_image())
+
+        self.assertEqual(set(post.image_variants), {'320', '640'})
+        self.assertEqual(len(post.image_hash), 64)
+        path = os.path.join(MEDIA_ROOT, post.image_variants['320'])
+        with Image.open(path) as variant:
+            self.assertEqual(variant.format, 'WEBP')
+            self.assertEqual(variant.size, (320, 240))
+
+    def test_unchanged_image_skipped(self):
+        """Test a second run on the same content renders nothing"""
+        post = self.create_post(image=sample_image())
+
+        with patch('blog.images.render_variants') as render:
+            images.generate(post.id)
+
+        render.assert_not_called()
+
+    def test_save_without_new_image_not_scheduled(self):
+        """Test saving other fields does not queue the post again"""
+        post = self.create_post(image=sample_image())
+
+        with patch('blog.images.schedule') as schedule:
+            post.subtitle = 'changed'
+            post.save()
+
+        schedule.assert_not_called()
+
+    def test_image_replaced(self):
+        """Test a new image replaces the variants"""
+        post = self.create_post(image=sample_image())
+        old = post.image_variants
+
+        post.image = sample_image(color='blue')
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        post.refresh_from_db()
+
+        self.assertNotEqual(post.image_variants, old)
+
+    def test_srcset_in_detail(self):
+        """Test the post detail maps widths to absolute URLs"""
+        post = self.create_post(image=sample_image())
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(reverse('blog:post-detail-slug', args=[post.slug]))
+
+        self.assertEqual(list(res.data['image_srcset']), ['320', '640'])
+        self.assertTrue(res.data['image_srcset']['320'].startswith(
+            'http://testserver/media/uploads/blog/variants/'
+        ))
+
+    def test_worker_runs_jobs_off_thread(self):
+        """Test the worker queue hands posts to generate"""
+        worker = images.Worker()
+
+        with patch('blog.images.generate') as generate:
+            worker.put(42)
+            worker.queue.join()
+
+        generate.assert_called_once_with(42)
@@ -0,0 +1,188 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Tag, Category, Post
+from blog import importer
+
+
+class PostImportTests(TestCase):
+    """Test importing posts in batches"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+
+    def write_file(self, suffix, content):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w') as out:
+            out.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_import_ndjson(self):
+        """Test importing posts with tags and categories by name"""
+        Tag.objects.create(user=self.user, name='news')
+        rows = [
+            {'title': 'First post', 'tags': ['News', 'tech'],
+             'categories': ['backend'], 'published': True},
+            {'title': 'Second post', 'tags': ['tech']},
+        ]
+        path = self.write_file('.ndjson', ''.join(
+            json.dumps(row) + '\n' for row in rows
+        ))
+
+        call_command('import_posts', path, '--user', self.user.email,
+                     stdout=StringIO())
+
+        first = Post.objects.get(title='First post')
+        self.assertEqual(first.slug, 'first-post')
+        self.assertTrue(first.published)
+        self.assertEqual(sorted(t.name for t in first.tags.all()),
+                         ['news', 'tech'])
+        self.assertEqual(Tag.objects.count(), 2)
+        self.assertEqual(Category.objects.get().name, 'backend')
+
+    def test_import_csv(self):
+        """Test importing a CSV file with comma separated relations"""
+        path = self.write_file('.csv', (
+            'title,body,tags\n'
+            'Hello,some text,"a,b"\n'
+        ))
+
+        call_command('import_posts', path, '--user', self.user.email,
+                     stdout=StringIO())
+
+        post = Post.objects.get()
+        self.assertEqual(post.body, 'some text')
+        self.assertEqual(post.tags.count(), 2)
+
+    def test_existing_titles_skipped(self):
+        """Test that titles already present are not imported again"""
+        Post.objects.create(user=self.user, title='Taken', slug='taken')
+        job = importer.Importer(self.user)
+
+        job.run([{'title': 'Taken'}, {'title': 'New'}, {'title': 'New'}])
+
+        self.assertEqual(job.created, 1)
+        self.assertEqual(job.skipped, 2)
+
+    def test_slugs_made_unique(self):
+        """Test generated slugs avoid existing and in-batch clashes"""
+        Post.objects.create(user=self.user, title='x', slug='hello')
+        Post.objects.create(user=self.user, title='y', slug='hello-2')
+
+        importer.Importer(self.user).run([
+            {'title': 'Hello'}, {'title': 'hello!'},
+        ])
+
+        self.assertEqual(
+            sorted(Post.objects.values_list('slug', flat=True)),
+            ['hello', 'hello-2', 'hello-3', 'hello-4'],
+        )
+
+    def test_queries_do_not_grow_with_batch(self):
+        """Test a batch costs the same queries whatever its size"""
+        Tag.objects.create(user=self.user, name='news')
+
+        def rows(start, count):
+            return [{'title': f'post {i}', 'tags': ['news']}
+                    for i in range(start, start + count)]
+
+        job = importer.Importer(self.user, batch_size=100)
+        with CaptureQueriesContext(connection) as small:
+            job.run(rows(0, 2))
+        with self.assertNumQueries(len(small.captured_queries)):
+            job.run(rows(2, 50))
+
+    def test_export_round_trip(self):
+        """Test that files written by export_posts import into another
+        database by tag and category name, in both formats"""
+        tags = [Tag.objects.create(user=self.user, name=name)
+                for name in ('news', '2024')]
+        category = Category.objects.create(user=self.user, name='dev')
+        post = Post.objects.create(user=self.user, title='Hello',
+                                   slug='hello')
+        post.tags.set(tags)
+        post.categories.set([category])
+
+        for kind in ('ndjson', 'csv'):
+            path = self.write_file(f'.{kind}', '')
+            call_command('export_posts', '--format', kind, '--output', path,
+                         stderr=StringIO())
+            # Same names under other ids, as in a fresh database
+            Post.objects.all().delete()
+            Tag.objects.all().delete()
+            Category.objects.all().delete()
+            Tag.objects.create(user=self.user, name='other')
+
+            call_command('import_posts', path, '--user', self.user.email,
+                         stdout=StringIO())
+
+            post = Post.objects.get()
+            self.assertEqual(post.slug, 'hello')
+            self.assertEqual(sorted(t.name for t in post.tags.all()),
+                             ['2024', 'news'])
+            self.assertEqual([c.name for c in post.categories.all()],
+                             ['dev'])
+
+    def test_numeric_names_stay_names(self):
+        """Test that a tag named with digits is not read as an id"""
+        other = Tag.objects.create(user=self.user, name='other')
+        path = self.write_file('.csv', (
+            'title,tags\n'
+            f'Hello,"2024,{other.id}"\n'
+        ))
+
+        call_command('import_posts', path, '--user', self.user.email,
+                     stdout=StringIO())
+
+        post = Post.objects.get()
+        self.assertEqual(sorted(t.name for t in post.tags.all()),
+                         sorted(['2024', str(other.id)]))
+
+    def test_ids_used_without_names(self):
+        """Test that rows without names link by id, dropping unknown ids"""
+        tag = Tag.objects.create(user=self.user, name='news')
+        path = self.write_file('.ndjson', json.dumps(
+            {'title': 'Hello', 'tag_ids': [tag.id, 12345]}
+        ) + '\n')
+        err = StringIO()
+
+        call_command('import_posts', path, '--user', self.user.email,
+                     stdout=StringIO(), stderr=err)
+
+        self.assertEqual(list(Post.objects.get().tags.all()), [tag])
+        self.assertIn('Dropped 1 links to missing tags ids', err.getvalue())
+
+    def test_invalid_rows_reported(self):
+        """Test that values too long for their column are reported per
+        row and the rest of the batch is imported"""
+        rows = [
+            {'title': 'x' * 256},
+            {'title': 'Fine', 'tags': ['t' * 51]},
+            {'title': 'Also fine', 'tags': ['news'], 'tag_ids': ['a']},
+            {'title': 'Bad ids', 'category_ids': ['a']},
+        ]
+        path = self.write_file('.ndjson', ''.join(
+            json.dumps(row) + '\n' for row in rows
+        ))
+        err = StringIO()
+
+        call_command('import_posts', path, '--user', self.user.email,
+                     stdout=StringIO(), stderr=err)
+
+        self.assertEqual(list(Post.objects.values_list('title', flat=True)),
+                         ['Also fine'])
+        self.assertIn('Row 1: title:', err.getvalue())
+        self.assertIn('Row 2: tags:', err.getvalue())
+        self.assertIn('Row 4: category_ids:', err.getvalue())
@@ -1,12 +1,15 @@
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Post
-from blog.serializers import PostSerializer
+from blog.serializers import PostSerializer, PostSummarySerializer
 
 
 POST_URL = reverse('blog:post-list')
@@ -71,10 +74,10 @@ class PrivatePostApiTests(TestCase):
 
         res = self.client.get(POST_URL)
 
-        posts = Post.objects.all().order_by('-publish_date')
-        serializer = PostSerializer(posts, many=True)
+        posts = Post.objects.all().order_by('-publish_date', '-id')
+        serializer = PostSummarySerializer(posts, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_create_post_successful(self):
         """Test creating a new post"""
@@ -106,3 +109,33 @@ class PrivatePostApiTests(TestCase):
 
         serializer = PostSerializer(post)
         self.assertEqual(res.data, serializer.data)
+
+    def test_posts_paginated_by_cursor(self):
+        """Test walking post pages in order with ties and missing dates"""
+        now = timezone.now()
+        dates = [now, now, None, now - timedelta(days=1), None, now]
+        for i, date in enumerate(dates):
+            sample_post(
+                self.user,
+                title=f'post {i}',
+                slug=f'post-{i}',
+                publish_date=date
+            )
+
+        seen = []
+        url = POST_URL + '?page_size=2'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            seen.extend(post['id'] for post in res.data['results'])
+            url = res.data['next']
+
+        expected = Post.objects.order_by('-publish_date', '-id')
+        self.assertEqual(seen, [post.id for post in expected])
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        res = self.client.get(POST_URL, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Post
+from blog import cache
+
+
+CACHE_STATS_URL = reverse('blog:post-cache-stats')
+
+
+def detail_url_with_slug(post_slug):
+    """Return post detail URL with slug"""
+    return reverse('blog:post-detail-slug', args=[post_slug])
+
+
+class PostDetailCacheTests(TestCase):
+    """Test the per-slug post detail cache"""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        cache.stats.reset()
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(
+            user=self.user,
+            title='cached post',
+            slug='cached-post'
+        )
+        self.url = detail_url_with_slug(self.post.slug)
+
+    def test_second_request_is_served_from_cache(self):
+        """Test that a repeated GET skips the database"""
+        first = self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_save_invalidates(self):
+        """Test that saving a post drops its cached response"""
+        self.client.get(self.url)
+
+        self.post.subtitle = 'updated'
+        self.post.save()
+        res = self.client.get(self.url)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['subtitle'], 'updated')
+
+    def test_slug_change_invalidates_old_slug(self):
+        """Test that renaming the slug stops serving the old one"""
+        self.client.get(self.url)
+
+        self.post.slug = 'renamed-post'
+        self.post.save()
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tag_changes_invalidate(self):
+        """Test that adding, removing and deleting tags drop the cache"""
+        tag = Tag.objects.create(user=self.user, name='news')
+        self.client.get(self.url)
+
+        self.post.tags.add(tag)
+        res = self.client.get(self.url)
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['tags'], [tag.id])
+
+        tag.post_set.remove(self.post)
+        res = self.client.get(self.url)
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['tags'], [])
+
+        self.post.tags.add(tag)
+        self.client.get(self.url)
+        tag.delete()
+        res = self.client.get(self.url)
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['tags'], [])
+
+    def test_delete_invalidates(self):
+        """Test that deleting a post stops serving it"""
+        self.client.get(self.url)
+
+        self.post.delete()
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cache_stats(self):
+        """Test that hit and miss counters are exposed"""
+        self.client.get(self.url)
+        self.client.get(self.url)
+
+        res = self.client.get(CACHE_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['hits'], 1)
+        self.assertEqual(res.data['misses'], 1)
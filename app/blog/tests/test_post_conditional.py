@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Post
+from blog import cache
+
+
+POST_URL = reverse('blog:post-list')
+
+
+def detail_url_with_slug(post_slug):
+    """Return post detail URL with slug"""
+    return reverse('blog:post-detail-slug', args=[post_slug])
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag and Last-Modified handling on the post endpoints"""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(
+            user=self.user,
+            title='conditional post',
+            slug='conditional-post'
+        )
+        self.url = detail_url_with_slug(self.post.slug)
+
+    def test_detail_not_modified(self):
+        """Test that a matching ETag gets a 304 without a body"""
+        res = self.client.get(self.url)
+        self.assertIn('Last-Modified', res)
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    def test_detail_not_modified_without_cache(self):
+        """Test that a cache miss answers 304 from one cheap query"""
+        etag = self.client.get(self.url)['ETag']
+        cache.get_cache().clear()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_modified_after_tag_change(self):
+        """Test that changing tags gives the post a new ETag"""
+        etag = self.client.get(self.url)['ETag']
+
+        self.post.tags.add(Tag.objects.create(user=self.user, name='news'))
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_not_modified(self):
+        """Test that an unchanged list answers 304 from one query"""
+        etag = self.client.get(POST_URL)['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(POST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_modified_after_delete(self):
+        """Test that deleting a post changes the list ETag"""
+        Post.objects.create(user=self.user, title='other', slug='other')
+        etag = self.client.get(POST_URL)['ETag']
+
+        self.post.delete()
+        res = self.client.get(POST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_list_modified_after_edit(self):
+        """Test that editing a post on the page changes the list ETag"""
+        etag = self.client.get(POST_URL)['ETag']
+
+        self.post.title = 'changed'
+        self.post.save()
+        res = self.client.get(POST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_etag_depends_on_query(self):
+        """Test that different pages do not share an ETag"""
+        first = self.client.get(POST_URL)['ETag']
+        second = self.client.get(POST_URL, {'page_size': 1})['ETag']
+
+        self.assertNotEqual(first, second)
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Category, Post
+
+
+POST_URL = reverse('blog:post-list')
+
+
+def detail_url_with_slug(post_slug):
+    """Return post detail URL with slug"""
+    return reverse('blog:post-detail-slug', args=[post_slug])
+
+
+class PostQueryCountTests(TestCase):
+    """Test that post endpoints do not issue queries per row"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tags = [
+            Tag.objects.create(user=self.user, name=f'tag{i}')
+            for i in range(3)
+        ]
+        self.categories = [
+            Category.objects.create(user=self.user, name=f'category{i}')
+            for i in range(3)
+        ]
+
+    def create_posts(self, count):
+        """Create posts that each have every tag and category"""
+        start = Post.objects.count()
+        for i in range(start, start + count):
+            post = Post.objects.create(
+                user=self.user,
+                title=f'post {i}',
+                slug=f'post-{i}'
+            )
+            post.tags.set(self.tags)
+            post.categories.set(self.categories)
+
+    def count_queries(self, url, **params):
+        """Return the number of queries a GET request runs"""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        """Test that listing more posts runs the same number of queries"""
+        self.create_posts(2)
+        few = self.count_queries(POST_URL)
+
+        self.create_posts(18)
+        many = self.count_queries(POST_URL)
+
+        self.assertEqual(few, many)
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        """Test that larger pages run the same number of queries"""
+        self.create_posts(20)
+
+        small = self.count_queries(POST_URL, page_size=2)
+        large = self.count_queries(POST_URL, page_size=20)
+
+        self.assertEqual(small, large)
+
+    def test_list_loads_relations_in_batches(self):
+        """Test the list needs one query for posts and one per relation"""
+        self.create_posts(5)
+
+        self.assertEqual(self.count_queries(POST_URL), 3)
+
+    def test_detail_loads_relations_in_batches(self):
+        """Test the detail view needs one query for the post and relations"""
+        self.create_posts(1)
+        post = Post.objects.get()
+
+        url = detail_url_with_slug(post.slug)
+        self.assertEqual(self.count_queries(url), 3)
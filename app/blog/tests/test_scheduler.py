@@ -0,0 +1,189 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import Tag, Post
+from blog import scheduler
+from blog.scheduler import Scheduler
+
+
+class SchedulerTests(TestCase):
+    """Test publishing posts when their publish date arrives"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.now = timezone.now()
+        scheduler.cache.get_cache().delete(scheduler.CHANGED_KEY)
+
+    def create_post(self, i, hours=None, **params):
+        if hours is not None:
+            params['publish_date'] = self.now + timedelta(hours=hours)
+        return Post.objects.create(user=self.user, title=f'post {i}',
+                                   slug=f'post-{i}', **params)
+
+    def published(self):
+        return set(Post.objects.filter(
+            published=True
+        ).values_list('slug', flat=True))
+
+    def test_reconcile_reads_dated_drafts(self):
+        """Test only unpublished posts with a date are scheduled"""
+        draft = self.create_post(1, hours=1)
+        self.create_post(2, hours=-1, published=True)
+        self.create_post(3)
+        queue = Scheduler()
+
+        queue.reconcile()
+
+        self.assertEqual(list(queue.dates), [draft.id])
+
+    def test_reconcile_reads_changes_only(self):
+        """Test later reconciles only read recently modified drafts"""
+        for i in range(3):
+            self.create_post(i, hours=i + 1)
+        Post.objects.update(date_modified=self.now - timedelta(hours=1))
+        queue = Scheduler()
+        self.assertEqual(queue.reconcile(), 3)
+
+        self.create_post(3, hours=4)
+
+        self.assertEqual(queue.reconcile(), 1)
+        self.assertEqual(len(queue), 4)
+
+    def test_publishes_due_posts(self):
+        """Test due posts are published and future ones are kept"""
+        tag = Tag.objects.create(user=self.user, name='news')
+        self.create_post(1, hours=-1).tags.add(tag)
+        self.create_post(2, hours=1).tags.add(tag)
+        queue = Scheduler()
+        queue.reconcile()
+
+        self.assertEqual(queue.run_pending(), 1)
+
+        self.assertEqual(self.published(), {'post-1'})
+        self.assertEqual(len(queue), 1)
+        tag.refresh_from_db()
+        self.assertEqual((tag.post_count, tag.published_post_count), (2, 1))
+
+    def test_publishes_in_batches(self):
+        """Test due posts are published with one UPDATE per batch"""
+        for i in range(5):
+            self.create_post(i, hours=-i - 1)
+        queue = Scheduler(batch_size=2)
+        queue.reconcile()
+
+        with CaptureQueriesContext(connection) as ctx:
+            queue.run_pending()
+
+        updates = [q for q in ctx.captured_queries
+                   if q['sql'].startswith('UPDATE "core_post"')]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(len(self.published()), 5)
+
+    def test_failed_publish_is_retried(self):
+        """Test posts whose UPDATE failed are published on a later tick"""
+        for i in range(3):
+            self.create_post(i, hours=-i - 1)
+        queue = Scheduler(batch_size=2)
+        queue.reconcile()
+        real_publish = scheduler.publish
+        calls = []
+
+        def flaky(post_ids, now=None):
+            calls.append(post_ids)
+            if len(calls) == 2:
+                raise OperationalError('connection lost')
+            return real_publish(post_ids, now)
+
+        with patch('blog.scheduler.publish', side_effect=flaky):
+            with self.assertRaises(OperationalError):
+                queue.run_pending()
+            self.assertEqual(len(self.published()), 2)
+
+            self.assertEqual(queue.tick(), 1)
+
+        self.assertEqual(len(self.published()), 3)
+        self.assertEqual(len(queue), 0)
+
+    def test_entries_requeued_when_batching_fails(self):
+        """Test due posts go back on the heap whatever step fails"""
+        self.create_post(1, hours=-1)
+        queue = Scheduler()
+        queue.reconcile()
+        queue.batch_size = 0
+
+        with self.assertRaises(ValueError):
+            queue.run_pending()
+
+        self.assertEqual(len(queue), 1)
+        queue.batch_size = 10
+        self.assertEqual(queue.run_pending(), 1)
+
+    def test_batch_size_must_be_positive(self):
+        """Test a batch size below 1 is rejected up front"""
+        with self.assertRaises(ValueError):
+            Scheduler(batch_size=0)
+        with self.assertRaises(CommandError):
+            call_command('run_scheduler', '--once', '--batch-size', '0')
+
+    def test_zero_intervals_are_kept(self):
+        """Test explicit zero intervals do not fall back to the defaults"""
+        queue = Scheduler(reconcile_interval=0, poll_interval=0)
+
+        self.assertEqual(queue.reconcile_interval, 0)
+        self.assertEqual(queue.poll_interval, 0)
+
+    def test_moved_date_is_not_published_early(self):
+        """Test a stale heap entry does not publish a rescheduled post"""
+        post = self.create_post(1, hours=-1)
+        queue = Scheduler()
+        queue.reconcile()
+        Post.objects.filter(pk=post.pk).update(
+            publish_date=self.now + timedelta(days=1)
+        )
+
+        self.assertEqual(queue.run_pending(), 0)
+        self.assertEqual(self.published(), set())
+
+    def test_saved_draft_wakes_scheduler(self):
+        """Test saving a dated draft makes the next tick read it"""
+        queue = Scheduler(reconcile_interval=3600)
+        queue.tick()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_post(1, hours=-1)
+
+        self.assertEqual(queue.tick(), 1)
+        self.assertEqual(self.published(), {'post-1'})
+
+    def test_timeout_waits_for_next_post(self):
+        """Test the sleep ends when the next post is due"""
+        queue = Scheduler(poll_interval=30)
+        self.create_post(1, hours=1)
+        queue.reconcile()
+        self.assertEqual(queue.timeout(), 30)
+
+        self.create_post(2, hours=-1)
+        queue.reconcile()
+        self.assertEqual(queue.timeout(), 0)
+
+    def test_run_once_command(self):
+        """Test the command publishes due posts and exits with --once"""
+        self.create_post(1, hours=-1)
+        out = StringIO()
+
+        call_command('run_scheduler', '--once', stdout=out)
+
+        self.assertEqual(self.published(), {'post-1'})
+        self.assertIn('Published 1 posts', out.getvalue())
@@ -0,0 +1,115 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Post
+from blog import search
+
+
+POST_URL = reverse('blog:post-list')
+
+
+def sample_post(user, title, **params):
+    """Create and return sample post"""
+    return Post.objects.create(
+        user=user,
+        title=title,
+        slug=title.replace(' ', '-'),
+        **params
+    )
+
+
+class InvertedIndexTests(TestCase):
+    """Test the in-process search index"""
+
+    def setUp(self):
+        search.index.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+
+    def test_title_match_ranks_above_body_match(self):
+        """Test that hits in the title outrank hits in the body"""
+        body_hit = sample_post(self.user, 'first', body='django tips')
+        title_hit = sample_post(self.user, 'django in depth')
+
+        ids = [post_id for post_id, _ in search.index.search('django')]
+
+        self.assertEqual(ids, [title_hit.id, body_hit.id])
+
+    def test_all_terms_required(self):
+        """Test that every query term must match"""
+        both = sample_post(self.user, 'python web', subtitle='framework')
+        sample_post(self.user, 'python snakes')
+
+        ids = [post_id for post_id, _ in search.index.search('python web')]
+
+        self.assertEqual(ids, [both.id])
+
+    def test_index_follows_saves_and_deletes(self):
+        """Test that the loaded index is updated from post signals"""
+        post = sample_post(self.user, 'release notes')
+        self.assertTrue(search.index.search('release'))
+
+        post.title = 'changelog'
+        post.save()
+        self.assertFalse(search.index.search('release'))
+        self.assertTrue(search.index.search('changelog'))
+
+        post.delete()
+        self.assertFalse(search.index.search('changelog'))
+
+
+class PostSearchApiTests(TestCase):
+    """Test searching posts through the API"""
+
+    def setUp(self):
+        search.index.clear()
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_search_returns_ranked_posts(self):
+        """Test that q filters posts and orders them by relevance"""
+        body_hit = sample_post(self.user, 'monday', body='docker compose')
+        title_hit = sample_post(self.user, 'docker basics')
+        sample_post(self.user, 'unrelated')
+
+        res = self.client.get(POST_URL, {'q': 'docker'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [post['id'] for post in res.data['results']]
+        self.assertEqual(ids, [title_hit.id, body_hit.id])
+
+    def test_search_results_paginated(self):
+        """Test walking through ranked results with the cursor"""
+        for i in range(5):
+            sample_post(self.user, f'kubernetes part {i}')
+
+        seen = []
+        url = POST_URL + '?q=kubernetes&page_size=2'
+        while url:
+            res = self.client.get(url)
+            seen.extend(post['id'] for post in res.data['results'])
+            url = res.data['next']
+
+        self.assertEqual(sorted(seen), sorted(
+            Post.objects.values_list('id', flat=True)
+        ))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_search_without_match(self):
+        """Test that an unmatched query returns an empty page"""
+        sample_post(self.user, 'something')
+
+        res = self.client.get(POST_URL, {'q': 'nothing'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [])
@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Post
+from blog import cache
+
+
+POST_URL = reverse('blog:post-list')
+
+
+def detail_url_with_slug(post_slug):
+    """Return post detail URL with slug"""
+    return reverse('blog:post-detail-slug', args=[post_slug])
+
+
+class SparseFieldsTests(TestCase):
+    """Test the fields and exclude parameters of the post endpoints"""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(
+            user=self.user,
+            title='feedback',
+            slug='this-is-feedback',
+            body='a long body'
+        )
+        self.post.tags.add(Tag.objects.create(user=self.user, name='news'))
+
+    def get_with_sql(self, url, **params):
+        """Return the response and the SQL of the post query"""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, params)
+        sql = [q['sql'] for q in ctx.captured_queries
+               if '"core_post"."title"' in q['sql']]
+        return res, sql
+
+    def test_list_omits_body_by_default(self):
+        """Test the default list neither returns nor selects the body"""
+        res, sql = self.get_with_sql(POST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('body', res.data['results'][0])
+        self.assertNotIn('"core_post"."body"', sql[0])
+
+    def test_list_fields(self):
+        """Test listing only the requested fields"""
+        res, sql = self.get_with_sql(POST_URL, fields='slug,body')
+
+        self.assertEqual(set(res.data['results'][0]), {'slug', 'body'})
+        self.assertEqual(res.data['results'][0]['body'], 'a long body')
+
+    def test_list_fields_skips_relations(self):
+        """Test that relations not asked for are not prefetched"""
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(POST_URL, {'fields': 'title'})
+
+        self.assertFalse(any('core_tag' in q['sql']
+                             for q in ctx.captured_queries))
+
+    def test_detail_exclude(self):
+        """Test excluding fields from the post detail"""
+        url = detail_url_with_slug(self.post.slug)
+
+        res, sql = self.get_with_sql(url, exclude='body,tags')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('body', res.data)
+        self.assertNotIn('tags', res.data)
+        self.assertIn('categories', res.data)
+        self.assertNotIn('"core_post"."body"', sql[0])
+
+    def test_detail_cached_per_selection(self):
+        """Test that a sparse detail does not answer a full request"""
+        url = detail_url_with_slug(self.post.slug)
+
+        self.client.get(url, {'fields': 'slug'})
+        res = self.client.get(url)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['body'], 'a long body')
+
+    def test_unknown_field_rejected(self):
+        """Test that unknown field names are a bad request"""
+        res = self.client.get(POST_URL, {'fields': 'slug,password'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
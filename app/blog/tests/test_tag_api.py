@@ -56,7 +56,7 @@ class PrivateTagApiTest(TestCase):
         tags = Tag.objects.all().order_by('-name')
         serializer = TagSerializer(tags, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_create_tag_successful(self):
         """Test creating a new tag"""
@@ -98,3 +98,26 @@ class PrivateTagApiTest(TestCase):
 
         res = self.client.post(TAG_URL, {'user': self.user, 'name': 'Laptop'})
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_tags_paginated_by_name(self):
+        """Test that tag pages follow the name ordering"""
+        for name in ('alpha', 'beta', 'gamma'):
+            sample_tag(self.user, name=name)
+
+        res = self.client.get(TAG_URL, {'page_size': 2})
+        names = [tag['name'] for tag in res.data['results']]
+        res = self.client.get(res.data['next'])
+        names += [tag['name'] for tag in res.data['results']]
+
+        self.assertEqual(names, ['gamma', 'beta', 'alpha'])
+        self.assertIsNone(res.data['next'])
+
+    def test_filter_tags_by_name(self):
+        """Test that q filters tags by name"""
+        sample_tag(self.user, name='django')
+        sample_tag(self.user, name='flask')
+
+        res = self.client.get(TAG_URL, {'q': 'jan'})
+
+        names = [tag['name'] for tag in res.data['results']]
+        self.assertEqual(names, ['django'])
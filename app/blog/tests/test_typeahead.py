@@ -0,0 +1,123 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Category
+from blog import cache, typeahead
+
+
+TAG_TYPEAHEAD_URL = reverse('blog:tag-typeahead')
+CATEGORY_TYPEAHEAD_URL = reverse('blog:category-typeahead')
+
+
+class PrefixIndexTests(TestCase):
+    """Test the in-process prefix index"""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        typeahead.tags.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+
+    def test_prefix_search_is_sorted_and_limited(self):
+        """Test that matches come back sorted and capped at the limit"""
+        for name in ('python', 'pytest', 'pyramid', 'rust'):
+            Tag.objects.create(user=self.user, name=name)
+
+        names = [name for _, name in typeahead.tags.search('Py', limit=2)]
+
+        self.assertEqual(names, ['pyramid', 'pytest'])
+
+    def test_index_follows_saves_and_deletes(self):
+        """Test that the loaded index is updated from tag signals"""
+        tag = Tag.objects.create(user=self.user, name='golang')
+        self.assertEqual(typeahead.tags.search('go'), [(tag.id, 'golang')])
+
+        tag.name = 'rust'
+        tag.save()
+        self.assertEqual(typeahead.tags.search('go'), [])
+        self.assertEqual(typeahead.tags.search('ru'), [(tag.id, 'rust')])
+
+        tag.delete()
+        self.assertEqual(typeahead.tags.search('ru'), [])
+
+    def test_index_reloads_after_change_elsewhere(self):
+        """Test that a change committed by another process is picked up,
+        while the process that made it keeps its index"""
+        here = typeahead.PrefixIndex(Tag)
+        elsewhere = typeahead.PrefixIndex(Tag)
+        self.assertEqual(here.search('go'), [])
+        self.assertEqual(elsewhere.search('go'), [])
+
+        # Saved outside the captured block, so only `here` bumps
+        tag = Tag.objects.create(user=self.user, name='golang')
+        with self.captureOnCommitCallbacks(execute=True):
+            here.add(tag)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(here.search('go'), [(tag.id, 'golang')])
+        with self.assertNumQueries(1):
+            self.assertEqual(elsewhere.search('go'), [(tag.id, 'golang')])
+
+    def test_lookup_speed_with_many_names(self):
+        """Test that prefix lookups stay well under a millisecond"""
+        index = typeahead.PrefixIndex(Tag)
+        index.load((i, f'name{i:06d}') for i in range(100000))
+
+        start = time.perf_counter()
+        for i in range(1000):
+            index.search(f'name{i * 97 % 100000:06d}'[:7])
+        average = (time.perf_counter() - start) / 1000
+
+        self.assertLess(average, 0.001)
+
+
+class TypeaheadApiTests(TestCase):
+    """Test the typeahead endpoints"""
+
+    def setUp(self):
+        typeahead.tags.clear()
+        typeahead.categories.clear()
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_tag_typeahead(self):
+        """Test completing tag names"""
+        tag = Tag.objects.create(user=self.user, name='django')
+        Tag.objects.create(user=self.user, name='flask')
+
+        res = self.client.get(TAG_TYPEAHEAD_URL, {'q': 'dj'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'id': tag.id, 'name': 'django'}])
+
+    def test_category_typeahead(self):
+        """Test completing category names"""
+        category = Category.objects.create(user=self.user, name='backend')
+
+        res = self.client.get(CATEGORY_TYPEAHEAD_URL, {'q': 'back'})
+
+        self.assertEqual(res.data, [{'id': category.id, 'name': 'backend'}])
+
+    def test_typeahead_requires_staff(self):
+        """Test that regular users cannot use typeahead"""
+        user = get_user_model().objects.create_user(
+            email='other@gmail.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(TAG_TYPEAHEAD_URL, {'q': 'dj'})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,109 @@
+"""In-process prefix indexes for tag and category autocomplete.
+
+Each index is a sorted array of lower-cased names searched with bisect. It
+is loaded from the database on first use and then kept current by the
+save and delete signals of its model, so lookups never touch the database.
+Every committed change also bumps a generation counter in the
+POST_CACHE_ALIAS cache; an index that finds the counter moved by another
+process reloads on its next search. That only works across processes
+when the cache is shared.
+"""
+import threading
+from bisect import bisect_left, insort
+
+from django.db import transaction
+
+from core.models import Tag, Category
+from . import cache
+
+
+class PrefixIndex:
+    """Sorted (name, id) array answering case-insensitive prefix queries"""
+
+    def __init__(self, model):
+        self.model = model
+        self.key = f'blog:typeahead:{model._meta.label_lower}'
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        """Drop everything; the index reloads from the database on demand"""
+        with self._lock:
+            self._entries = []
+            self._names = {}
+            self.loaded = False
+            self.generation = None
+
+    def load(self, rows=None):
+        """Build the index from (id, name) rows, by default every object"""
+        # Read first, so a change committed during the load reloads again
+        generation = cache.get_cache().get(self.key, 0)
+        if rows is None:
+            rows = self.model.objects.values_list('id', 'name').iterator()
+        with self._lock:
+            self._names = dict(rows)
+            self._entries = sorted(
+                (name.lower(), pk) for pk, name in self._names.items()
+            )
+            self.loaded = True
+            self.generation = generation
+
+    def changed(self):
+        """Bump the shared generation once the current transaction
+        commits"""
+        transaction.on_commit(self._bump)
+
+    def _bump(self):
+        store = cache.get_cache()
+        store.add(self.key, 0, None)
+        generation = store.incr(self.key)
+        with self._lock:
+            # Already applied here, unless another process changed too
+            if self.generation == generation - 1:
+                self.generation = generation
+
+    def add(self, obj):
+        """Index or re-index an object, if the index is in use"""
+        self.changed()
+        with self._lock:
+            if not self.loaded:
+                return
+            self._remove(obj.pk)
+            self._names[obj.pk] = obj.name
+            insort(self._entries, (obj.name.lower(), obj.pk))
+
+    def remove(self, pk):
+        """Remove an object, if the index is in use"""
+        self.changed()
+        with self._lock:
+            if self.loaded:
+                self._remove(pk)
+
+    def _remove(self, pk):
+        name = self._names.pop(pk, None)
+        if name is None:
+            return
+        entry = (name.lower(), pk)
+        position = bisect_left(self._entries, entry)
+        if (position < len(self._entries)
+                and self._entries[position] == entry):
+            del self._entries[position]
+
+    def search(self, prefix, limit=10):
+        """Return up to `limit` (id, name) pairs starting with `prefix`"""
+        prefix = prefix.lower()
+        with self._lock:
+            if not self.loaded \
+                    or cache.get_cache().get(self.key, 0) != self.generation:
+                self.load()
+            position = bisect_left(self._entries, (prefix,))
+            results = []
+            for key, pk in self._entries[position:position + limit]:
+                if not key.startswith(prefix):
+                    break
+                results.append((pk, self._names[pk]))
+        return results
+
+
+tags = PrefixIndex(Tag)
+categories = PrefixIndex(Category)
@@ -0,0 +1,108 @@
+"""Streaming parser for raw image uploads"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from PIL import Image
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError, \
+    UnsupportedMediaType
+from rest_framework.parsers import BaseParser
+
+
+CHUNK_SIZE = 64 * 1024
+# Give up looking for an image header after this many bytes
+HEADER_LIMIT = 1024 * 1024
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+
+class RequestEntityTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Uploaded file is too large.'
+    default_code = 'too_large'
+
+
+def read_header(file):
+    """Return (format, (width, height)) from the start of an image file,
+    or None while no header can be recognised. Pillow only reads the
+    header here; pixel data is never decoded."""
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            return image.format, image.size
+    except Image.DecompressionBombError:
+        raise ParseError('Image has too many pixels.')
+    except Exception:
+        # A partial header fails in format-specific ways; try again
+        # once more bytes have arrived
+        return None
+    finally:
+        file.seek(0, 2)
+
+
+def check_header(header):
+    fmt, (width, height) = header
+    if fmt not in settings.IMAGE_UPLOAD_FORMATS:
+        raise UnsupportedMediaType(f'image/{fmt.lower()}')
+    limit = settings.IMAGE_UPLOAD_MAX_DIMENSION
+    if width > limit or height > limit:
+        raise ParseError(
+            f'Image is {width}x{height}; at most {limit} pixels per side.'
+        )
+
+
+class ImageUploadParser(BaseParser):
+    """Streams a raw image body to a temporary file in fixed-size chunks.
+
+    The declared length is checked before anything is read, the running
+    total while reading, and the format and dimensions as soon as the
+    header has arrived, so bad uploads are rejected without reading them
+    in full. Returns the file as a TemporaryUploadedFile carrying the
+    sha256 of its content.
+    """
+    media_type = 'image/*'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        max_bytes = settings.IMAGE_UPLOAD_MAX_BYTES
+        declared = int(request.META.get('CONTENT_LENGTH') or 0)
+        if declared > max_bytes:
+            raise RequestEntityTooLarge()
+        if stream is None:
+            raise ParseError('Empty upload.')
+
+        upload = TemporaryUploadedFile(
+            'upload', media_type, declared, None
+        )
+        header = None
+        size = 0
+        digest = hashlib.sha256()
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise RequestEntityTooLarge()
+                upload.write(chunk)
+                digest.update(chunk)
+                if header is None:
+                    header = read_header(upload.file)
+                    if header is not None:
+                        check_header(header)
+                    elif size > HEADER_LIMIT:
+                        raise UnsupportedMediaType(media_type)
+            if header is None:
+                raise UnsupportedMediaType(media_type)
+        except Exception:
+            upload.close()
+            raise
+
+        upload.size = size
+        # Lets the content addressed storage skip hashing the file again
+        upload.content_hash = digest.hexdigest()
+        upload.name = f'upload.{EXTENSIONS[header[0]]}'
+        upload.content_type = f'image/{header[0].lower()}'
+        upload.seek(0)
+        return upload
@@ -8,12 +8,34 @@ app_name = 'blog'
 
 urlpatterns = [
     path('tag/', views.TagAPIView.as_view(), name='tag-list'),
+    path('tag/bulk/', views.TagBulkAPIView.as_view(), name='tag-bulk'),
+    path('tag/typeahead/',
+         views.TagTypeaheadAPIView.as_view(),
+         name='tag-typeahead'),
     path('tag/<int:pk>/', views.TagDetailAPIView.as_view(), name='tag-detail'),
     path('category/', views.CategoryAPIView.as_view(), name='category-list'),
+    path('category/bulk/',
+         views.CategoryBulkAPIView.as_view(),
+         name='category-bulk'),
+    path('category/typeahead/',
+         views.CategoryTypeaheadAPIView.as_view(),
+         name='category-typeahead'),
     path('category/<int:pk>/',
          views.CategoryDetailAPIView.as_view(),
          name='category-detail'),
     path('post/', views.PostAPIView.as_view(), name='post-list'),
+    # Collection endpoints live outside post/ so they cannot shadow slugs
+    path('posts/feed/', views.PostFeedAPIView.as_view(), name='post-feed'),
+    path('posts/bulk/', views.PostBulkAPIView.as_view(), name='post-bulk'),
+    path('posts/export/',
+         views.PostExportAPIView.as_view(),
+         name='post-export'),
+    path('cache/stats/',
+         views.PostCacheStatsAPIView.as_view(),
+         name='post-cache-stats'),
+    path('post/<str:slug>/image/',
+         views.PostImageAPIView.as_view(),
+         name='post-image'),
     path('post/<str:slug>/',
          views.PostDetailAPIView.as_view(),
          name='post-detail-slug'),
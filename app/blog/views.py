@@ -1,20 +1,202 @@
-from rest_framework import generics, mixins, authentication, permissions
+from urllib.parse import urlencode
 
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import generics, mixins, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.db import routers
 from core.models import Tag, Category, Post
-from .serializers import TagSerializer, CategorySerializer, PostSerializer
+from user.authentication import CachedTokenAuthentication
+from . import cache, conditional, export, search, typeahead
+from .pagination import PostPagination, NamePagination, SearchPagination
+from .serializers import TagSerializer, CategorySerializer, \
+    PostSerializer, PostSummarySerializer, BulkPostSerializer
+from .uploads import ImageUploadParser
+
+
+POST_RELATIONS = {
+    'tags': Tag,
+    'categories': Category,
+}
+
+
+def post_queryset(relations=tuple(POST_RELATIONS)):
+    """Return posts with their tag and category ids loaded in batches"""
+    return Post.objects.prefetch_related(*[
+        Prefetch(name, queryset=POST_RELATIONS[name].objects.only('id'))
+        for name in relations
+    ])
+
+
+def feed_queryset():
+    """Return the posts public readers may see, in the order of the
+    partial index core_post_published_feed_idx"""
+    return post_queryset().filter(
+        published=True, publish_date__lte=timezone.now()
+    )
+
+
+class SparseFieldsMixin:
+    """Picks post fields from the `fields` and `exclude` query parameters
+    and loads only the columns and relations those fields need"""
+    summary_serializer_class = None
+    # Read by the keyset cursor and the detail validators
+    required_columns = ('id', 'publish_date', 'date_modified')
+
+    def is_read(self):
+        return self.request.method in ('GET', 'HEAD')
+
+    def get_field_selection(self):
+        if not hasattr(self, '_field_selection'):
+            selection = {}
+            for param in ('fields', 'exclude'):
+                value = self.request.query_params.get(param)
+                if value:
+                    selection[param] = [
+                        name.strip() for name in value.split(',')
+                        if name.strip()
+                    ]
+            known = set(PostSerializer.Meta.fields)
+            for param, names in selection.items():
+                unknown = sorted(set(names) - known)
+                if unknown:
+                    raise ValidationError({param: [
+                        f'Unknown field(s): {", ".join(unknown)}'
+                    ]})
+            self._field_selection = selection
+        return self._field_selection
+
+    def get_serializer_class(self):
+        if (self.is_read() and self.summary_serializer_class is not None
+                and 'fields' not in self.get_field_selection()):
+            return self.summary_serializer_class
+        return super().get_serializer_class()
+
+    def get_serializer(self, *args, **kwargs):
+        if self.is_read():
+            kwargs.update(self.get_field_selection())
+        return super().get_serializer(*args, **kwargs)
+
+    def select_columns(self, queryset):
+        """Restrict `queryset` to what the selected fields read"""
+        if not self.is_read():
+            return queryset
+        fields = self.get_serializer().fields.values()
+        sources = {field.source for field in fields}
+        concrete = {field.name for field in Post._meta.concrete_fields}
+        relations = [name for name in POST_RELATIONS if name in sources]
+        return queryset.prefetch_related(None).prefetch_related(*[
+            Prefetch(name, queryset=POST_RELATIONS[name].objects.only('id'))
+            for name in relations
+        ]).only(*self.required_columns, *(sources & concrete))
+
+
+class BulkAPIView(generics.GenericAPIView):
+    """Create, update or delete a batch of objects in one transaction.
+
+    POST takes a list of new objects, PATCH a list of partial objects that
+    each carry an `id`, and DELETE an object with a list of `ids`. Errors
+    are reported per item, in the order the items were sent.
+    """
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
+    max_batch_size = 1000
+
+    def get_batch(self, request):
+        data = request.data
+        if not isinstance(data, list):
+            raise ValidationError({'non_field_errors': [
+                'Expected a list of items.'
+            ]})
+        if len(data) > self.max_batch_size:
+            raise ValidationError({'non_field_errors': [
+                f'Ensure this batch has no more than '
+                f'{self.max_batch_size} items.'
+            ]})
+        return data
+
+    def serialize(self, objs):
+        """Re-read written objects through the view queryset, so related
+        ids come from batched prefetches"""
+        found = self.get_queryset().in_bulk([obj.pk for obj in objs])
+        return self.get_serializer(
+            [found[obj.pk] for obj in objs], many=True
+        ).data
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(
+            data=self.get_batch(request), many=True
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save(user=request.user)
+        return Response(
+            self.serialize(serializer.instance),
+            status=status.HTTP_201_CREATED
+        )
+
+    def patch(self, request, *args, **kwargs):
+        data = self.get_batch(request)
+        ids = [item.get('id') if isinstance(item, dict) else None
+               for item in data]
+        found = self.get_queryset().in_bulk(
+            [pk for pk in ids if isinstance(pk, int)]
+        )
+        errors = [{} if pk in found else {'id': ['Object not found.']}
+                  for pk in ids]
+        if any(errors):
+            raise ValidationError(errors)
+
+        serializer = self.get_serializer(
+            [found[pk] for pk in ids], data=data, many=True, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save()
+        return Response(self.serialize(serializer.instance))
+
+    def delete(self, request, *args, **kwargs):
+        ids = request.data.get('ids') if isinstance(
+            request.data, dict
+        ) else None
+        if not isinstance(ids, list) or not all(
+            isinstance(pk, int) for pk in ids
+        ):
+            raise ValidationError({'ids': ['Expected a list of ids.']})
+        if len(ids) > self.max_batch_size:
+            raise ValidationError({'ids': [
+                f'Ensure this batch has no more than '
+                f'{self.max_batch_size} items.'
+            ]})
+
+        with transaction.atomic():
+            queryset = self.get_queryset().filter(pk__in=ids)
+            deleted = set(queryset.values_list('pk', flat=True))
+            queryset.delete()
+        return Response({
+            'deleted': [pk for pk in ids if pk in deleted],
+            'not_found': [pk for pk in ids if pk not in deleted],
+        })
 
 
 class TagAPIView(generics.CreateAPIView, generics.ListAPIView):
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
     serializer_class = TagSerializer
+    pagination_class = NamePagination
 
     def get_queryset(self):
         request = self.request
         qs = Tag.objects.all()
         query = request.GET.get('q')
         if query is not None:
-            qs = qs.filter(content__icontains=query)
+            qs = qs.filter(name__icontains=query)
         return qs
 
     def perform_create(self, serializer):
@@ -24,7 +206,7 @@ class TagAPIView(generics.CreateAPIView, generics.ListAPIView):
 class TagDetailAPIView(mixins.DestroyModelMixin,
                        mixins.UpdateModelMixin,
                        generics.RetrieveAPIView):
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
@@ -39,17 +221,42 @@ class TagDetailAPIView(mixins.DestroyModelMixin,
         return self.destroy(request, *args, **kwargs)
 
 
+class TypeaheadAPIView(APIView):
+    """Autocomplete names from an in-process prefix index"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
+    index = None
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request, *args, **kwargs):
+        prefix = request.GET.get('q', '')
+        try:
+            limit = int(request.GET.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+
+        results = self.index.search(prefix, limit) if prefix else []
+        return Response([{'id': pk, 'name': name} for pk, name in results])
+
+
+class TagTypeaheadAPIView(TypeaheadAPIView):
+    index = typeahead.tags
+
+
 class CategoryAPIView(generics.CreateAPIView, generics.ListAPIView):
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
     serializer_class = CategorySerializer
+    pagination_class = NamePagination
 
     def get_queryset(self):
         request = self.request
         qs = Category.objects.all()
         query = request.GET.get('q')
         if query is not None:
-            qs = qs.filter(content__icontains=query)
+            qs = qs.filter(name__icontains=query)
         return qs
 
     def perform_create(self, serializer):
@@ -59,7 +266,7 @@ class CategoryAPIView(generics.CreateAPIView, generics.ListAPIView):
 class CategoryDetailAPIView(mixins.DestroyModelMixin,
                             mixins.UpdateModelMixin,
                             generics.RetrieveAPIView):
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
     serializer_class = CategorySerializer
     queryset = Category.objects.all()
@@ -74,32 +281,144 @@ class CategoryDetailAPIView(mixins.DestroyModelMixin,
         return self.destroy(request, *args, **kwargs)
 
 
-class PostAPIView(generics.CreateAPIView, generics.ListAPIView):
-    authentication_classes = (authentication.TokenAuthentication,)
+class CategoryTypeaheadAPIView(TypeaheadAPIView):
+    index = typeahead.categories
+
+
+class PostAPIView(SparseFieldsMixin,
+                  generics.CreateAPIView,
+                  generics.ListAPIView):
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
     serializer_class = PostSerializer
+    summary_serializer_class = PostSummarySerializer
+
+    @property
+    def pagination_class(self):
+        if self.request.GET.get('q'):
+            return SearchPagination
+        return PostPagination
 
     def get_queryset(self):
         request = self.request
-        qs = Post.objects.all()
+        qs = post_queryset()
         query = request.GET.get('q')
-        if query is not None:
-            qs = qs.filter(content__icontains=query)
-        return qs
+        if query:
+            qs = search.search_posts(qs, query)
+        return self.select_columns(qs)
+
+    def list(self, request, *args, **kwargs):
+        """List posts, answering 304 when the page is unchanged.
+
+        The ETag covers the id and modification date of every post on the
+        page and whether a next page exists, so edits, additions and
+        deletions that touch the page all change it. A conditional request
+        first reads just those columns of the page, one query whatever the
+        table size. No Last-Modified is sent because deletions cannot
+        move it.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        url = request.build_absolute_uri()
+        if conditional.is_conditional(request):
+            paginator = self.pagination_class()
+            rows = paginator.paginate_queryset(
+                queryset.prefetch_related(None).values_list(
+                    'id', 'date_modified'
+                ),
+                request, view=self,
+            )
+            etag = conditional.make_etag(
+                'posts', url, rows, paginator.has_next
+            )
+            response = conditional.not_modified(request, etag)
+            if response is not None:
+                return response
+
+        page = self.paginate_queryset(queryset)
+        etag = conditional.make_etag(
+            'posts', url, [(post.id, post.date_modified) for post in page],
+            self.paginator.has_next,
+        )
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        return conditional.set_validators(response, etag)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class PostDetailAPIView(mixins.DestroyModelMixin,
+class PostFeedAPIView(SparseFieldsMixin, generics.ListAPIView):
+    """Public, read-only list of published posts"""
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+    serializer_class = PostSummarySerializer
+    pagination_class = PostPagination
+
+    def get_queryset(self):
+        return self.select_columns(feed_queryset())
+
+
+class PostDetailAPIView(SparseFieldsMixin,
+                        mixins.DestroyModelMixin,
                         mixins.UpdateModelMixin,
                         generics.RetrieveAPIView):
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
     serializer_class = PostSerializer
-    queryset = Post.objects.all()
+    queryset = post_queryset()
     lookup_field = 'slug'
 
+    def get_queryset(self):
+        return self.select_columns(super().get_queryset())
+
+    def retrieve(self, request, *args, **kwargs):
+        """Serve the post from the per-slug cache when possible.
+
+        A conditional request that misses the cache is checked against
+        the post's modification date before anything is serialized.
+        Misses read from the primary: cached entries outlive the request
+        and must not be filled from a replica lagging behind a write.
+        """
+        slug = self.kwargs[self.lookup_field]
+        variant = request.build_absolute_uri('/') + urlencode(
+            sorted(self.get_field_selection().items()), doseq=True
+        )
+        entry = cache.get_detail(slug, variant)
+        hit = entry is not None
+        if not hit:
+            with routers.use_primary():
+                if conditional.is_conditional(request):
+                    row = Post.objects.filter(slug=slug).values_list(
+                        'id', 'date_modified'
+                    ).first()
+                    if row is not None:
+                        response = conditional.not_modified(
+                            request,
+                            *conditional.post_validators(*row, variant)
+                        )
+                        if response is not None:
+                            return response
+                instance = self.get_object()
+                etag, last_modified = conditional.post_validators(
+                    instance.id, instance.date_modified, variant
+                )
+                entry = {
+                    'data': self.get_serializer(instance).data,
+                    'etag': etag,
+                    'last_modified': last_modified,
+                }
+            cache.set_detail(slug, variant, entry)
+
+        response = conditional.not_modified(
+            request, entry['etag'], entry['last_modified']
+        )
+        if response is None:
+            response = conditional.set_validators(
+                Response(entry['data']), entry['etag'], entry['last_modified']
+            )
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
     def put(self, request, *args, **kwargs):
         return self.update(request, *args, **kwargs)
 
@@ -108,3 +427,66 @@ class PostDetailAPIView(mixins.DestroyModelMixin,
 
     def delete(self, request, *args, **kwargs):
         return self.destroy(request, *args, **kwargs)
+
+
+class PostImageAPIView(APIView):
+    """Replace the image of a post with the raw request body"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
+    parser_classes = (ImageUploadParser,)
+
+    def put(self, request, slug, *args, **kwargs):
+        post = get_object_or_404(Post, slug=slug)
+        upload = request.data
+        try:
+            post.image.save(upload.name, upload, save=False)
+        finally:
+            upload.close()
+        post.save(update_fields=['image', 'date_modified'])
+        return Response({'image': request.build_absolute_uri(post.image.url)})
+
+
+class PostCacheStatsAPIView(APIView):
+    """Report hit and miss counters of the post detail cache"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
+
+    def get(self, request, *args, **kwargs):
+        return Response(cache.stats.as_dict())
+
+
+class PostExportAPIView(APIView):
+    """Stream every post as NDJSON or CSV, chosen with `type`"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
+
+    def get(self, request, *args, **kwargs):
+        # `format` is taken by DRF's renderer override
+        kind = request.query_params.get('type', 'ndjson')
+        if kind not in export.FORMATS:
+            raise ValidationError({'type': [
+                f'Expected one of: {", ".join(export.FORMATS)}'
+            ]})
+        render, content_type = export.FORMATS[kind]
+        response = StreamingHttpResponse(
+            render(export.iter_posts()), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="posts.{kind}"'
+        )
+        return response
+
+
+class TagBulkAPIView(BulkAPIView):
+    serializer_class = TagSerializer
+    queryset = Tag.objects.all()
+
+
+class CategoryBulkAPIView(BulkAPIView):
+    serializer_class = CategorySerializer
+    queryset = Category.objects.all()
+
+
+class PostBulkAPIView(BulkAPIView):
+    serializer_class = BulkPostSerializer
+    queryset = post_queryset()
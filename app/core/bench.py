@@ -0,0 +1,159 @@
+"""Synthetic corpus and latency statistics for the benchmark commands"""
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from blog import counts
+from core.models import Tag, Category, Post
+
+
+PASSWORD = 'benchpass123'
+WORDS = (
+    'django api query index cache latency server client token request '
+    'response model view field row table page cursor batch worker image '
+    'python thread process memory network storage stream header commit '
+    'schema signal publish draft feed search vector count relation'
+).split()
+
+
+def user_email(prefix, n):
+    """Seeded user `n`; user 0 is staff"""
+    return f'{prefix}-user-{n}@example.com'
+
+
+def sentence(rng, low, high):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def seed(prefix='bench', users=20, tags=200, categories=20, posts=5000,
+         tags_per_post=3, categories_per_post=1, body_words=300,
+         random_seed=0, batch_size=1000):
+    """Insert a reproducible corpus with bulk inserts and return the number
+    of rows written per table.
+
+    The same arguments always produce the same rows. Every user shares
+    PASSWORD, hashed once; most posts are published with dates over the
+    past year, the rest are drafts or scheduled.
+    """
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    User = get_user_model()
+    password = make_password(PASSWORD)
+    User.objects.bulk_create([
+        User(email=user_email(prefix, n), password=password,
+             first_name='Bench', last_name=f'User {n}', is_staff=n == 0)
+        for n in range(users)
+    ], batch_size=batch_size)
+    authors = list(User.objects.filter(
+        email__startswith=f'{prefix}-user-'
+    ).order_by('id').values_list('id', flat=True))
+
+    def names(model, label, count):
+        model.objects.bulk_create([
+            model(user_id=authors[0], name=f'{prefix}-{label}-{n}')
+            for n in range(count)
+        ], batch_size=batch_size)
+        return list(model.objects.filter(
+            name__startswith=f'{prefix}-{label}-'
+        ).order_by('id').values_list('id', flat=True))
+
+    tag_ids = names(Tag, 'tag', tags)
+    category_ids = names(Category, 'category', categories)
+
+    links = 0
+    for batch in chunks(range(posts), batch_size):
+        objs = []
+        for n in batch:
+            state = rng.random()
+            publish_date = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+            if state > 0.95:
+                publish_date = now + timedelta(days=rng.randint(1, 30))
+            objs.append(Post(
+                user_id=rng.choice(authors),
+                title=f'{prefix} {sentence(rng, 3, 8)} {n}',
+                slug=f'{prefix}-post-{n}',
+                subtitle=sentence(rng, 4, 10),
+                meta_description=sentence(rng, 8, 16)[:150],
+                body=sentence(rng, body_words // 2, body_words * 3 // 2),
+                publish_date=None if 0.9 < state <= 0.95 else publish_date,
+                published=state <= 0.9,
+            ))
+        Post.objects.bulk_create(objs)
+        post_ids = Post.objects.filter(
+            slug__in=[post.slug for post in objs]
+        ).order_by('id').values_list('id', flat=True)
+        # Links are written per batch too, so memory does not grow with
+        # the corpus
+        tag_links = []
+        category_links = []
+        for post_id in post_ids:
+            tag_links += [
+                Post.tags.through(post_id=post_id, tag_id=tag_id)
+                for tag_id in rng.sample(tag_ids, min(tags_per_post, tags))
+            ]
+            category_links += [
+                Post.categories.through(post_id=post_id,
+                                        category_id=category_id)
+                for category_id in rng.sample(
+                    category_ids, min(categories_per_post, categories)
+                )
+            ]
+        Post.tags.through.objects.bulk_create(tag_links,
+                                              batch_size=batch_size)
+        Post.categories.through.objects.bulk_create(category_links,
+                                                    batch_size=batch_size)
+        links += len(tag_links) + len(category_links)
+
+    # Bulk inserts bypass the signals that keep the counts
+    counts.recount(Tag, tag_ids)
+    counts.recount(Category, category_ids)
+    return {
+        'users': users,
+        'tags': tags,
+        'categories': categories,
+        'posts': posts,
+        'links': links,
+    }
+
+
+def flush(prefix='bench'):
+    """Delete the corpus seeded under `prefix`"""
+    Post.objects.filter(slug__startswith=f'{prefix}-post-').delete()
+    Tag.objects.filter(name__startswith=f'{prefix}-tag-').delete()
+    Category.objects.filter(name__startswith=f'{prefix}-category-').delete()
+    get_user_model().objects.filter(
+        email__startswith=f'{prefix}-user-'
+    ).delete()
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of sorted values"""
+    if not ordered:
+        return None
+    return ordered[max(math.ceil(len(ordered) * q) - 1, 0)]
+
+
+def summarize(timings, queries, elapsed, errors=0):
+    """Return the statistics of one scenario; timings in seconds"""
+    ordered = sorted(t * 1000 for t in timings)
+    count = len(ordered)
+    return {
+        'requests': count,
+        'errors': errors,
+        'mean_ms': sum(ordered) / count if count else None,
+        'p50_ms': percentile(ordered, 0.50),
+        'p95_ms': percentile(ordered, 0.95),
+        'p99_ms': percentile(ordered, 0.99),
+        'max_ms': ordered[-1] if ordered else None,
+        'queries_per_request': queries / count if count else None,
+        'throughput_rps': count / elapsed if elapsed else None,
+    }
@@ -0,0 +1,112 @@
+"""PostgreSQL backend that checks connections out of a per-process pool.
+
+Django opens a connection per thread and closes it when CONN_MAX_AGE runs
+out. With this backend that close gives the connection back to the pool,
+so threads share at most POOL['MAX_SIZE'] server connections and a
+request only pays for a connect when the pool has none idle. Set in
+DATABASES[alias]['POOL']: MAX_SIZE, TIMEOUT, MAX_LIFETIME and PING_AFTER.
+"""
+import os
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+Database = base.Database
+
+# (alias, database, host, port, user) -> ConnectionPool of this process
+pools = {}
+pools_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    # Sockets inherited from the parent must not be shared with it
+    os.register_at_fork(after_in_child=pools.clear)
+
+
+def check(connection):
+    """Cheap checkout check that needs no round trip"""
+    return not connection.closed and connection.get_transaction_status() \
+        == extensions.TRANSACTION_STATUS_IDLE
+
+
+def ping(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    # Leaves no transaction open when autocommit is off
+    connection.rollback()
+
+
+def reset(connection):
+    """Roll back whatever a returned connection left open"""
+    if connection.closed:
+        raise Database.InterfaceError('connection already closed')
+    if connection.get_transaction_status() != \
+            extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+def get_pool(alias, settings_dict):
+    # Django also connects to the maintenance database under the same alias
+    key = (alias,) + tuple(
+        settings_dict.get(name) for name in ('NAME', 'HOST', 'PORT', 'USER')
+    )
+    with pools_lock:
+        pool = pools.get(key)
+        if pool is None:
+            options = settings_dict.get('POOL', {})
+            pool = pools[key] = ConnectionPool(
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 10),
+                max_lifetime=options.get('MAX_LIFETIME', 1800),
+                ping_after=options.get('PING_AFTER', 30),
+                check=check,
+                ping=ping,
+                reset=reset,
+            )
+        return pool
+
+
+def pool_stats():
+    """Return the stats of every pool of this process"""
+    with pools_lock:
+        items = list(pools.items())
+    return [
+        {'alias': alias, 'database': name, **pool.stats()}
+        for (alias, name, *_), pool in items
+    ]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        def connect():
+            return super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            )
+
+        try:
+            connection = self.pool.getconn(connect)
+        except PoolTimeout as error:
+            raise Database.OperationalError(str(error)) from error
+        # Set by the parent on new connections; a reused one keeps the
+        # level it was given when it was opened
+        self.isolation_level = connection.isolation_level
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            # Django keeps the handle of a connection closed inside an
+            # atomic block, so it must not be handed to another thread
+            self.pool.putconn(
+                self.connection,
+                discard=self.in_atomic_block or self.errors_occurred,
+            )
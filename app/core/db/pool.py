@@ -0,0 +1,211 @@
+"""Bounded, health-checked pool of database connections.
+
+The pool knows nothing about the driver: connections are created by the
+factory passed to `getconn` and judged with the `check` and `reset`
+callables given to the pool, so it can be tested without a database.
+"""
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the checkout timeout"""
+
+
+class PooledConnection:
+    __slots__ = ('connection', 'created', 'returned')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = self.returned = time.monotonic()
+
+
+class ConnectionPool:
+    """At most `max_size` connections per process, open or checked out.
+
+    Checkout takes the most recently returned idle connection. Connections
+    past `max_lifetime` seconds are closed instead of reused. `check` runs
+    on every checkout and must return False for a broken connection;
+    connections idle longer than `ping_after` seconds are also pinged with
+    `ping`, which should raise or return False when the server has gone.
+    """
+
+    def __init__(self, max_size=10, timeout=10, max_lifetime=1800,
+                 ping_after=30, check=None, ping=None, reset=None,
+                 close=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+        self.check = check or (lambda connection: True)
+        self.ping = ping
+        self.reset = reset or (lambda connection: None)
+        self.close = close or (lambda connection: connection.close())
+        self.idle = deque()
+        self.in_use = {}
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+        self.created = 0
+        self.closed = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.failed_checks = 0
+
+    def size(self):
+        return len(self.idle) + len(self.in_use) + self.pending
+
+    def getconn(self, factory):
+        """Return a healthy connection, creating one with `factory` while
+        the pool has room. Raises PoolTimeout when the pool stays full."""
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        while True:
+            with self.available:
+                while not self.idle and self.size() >= self.max_size:
+                    now = time.monotonic()
+                    if now >= deadline:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f'No connection free in {self.timeout}s; '
+                            f'{self.max_size} in use'
+                        )
+                    if not waited:
+                        self.waits += 1
+                        waited = True
+                    self.available.wait(deadline - now)
+                    self.wait_time += time.monotonic() - now
+                entry = self.idle.pop() if self.idle else None
+                # Hold the slot while checking or connecting, which run
+                # outside the lock
+                self.pending += 1
+
+            if entry is None:
+                try:
+                    entry = PooledConnection(factory())
+                except BaseException:
+                    self.release(None)
+                    raise
+                self.release(entry, created=True)
+                return entry.connection
+            if self.usable(entry):
+                self.release(entry)
+                return entry.connection
+            self.discard(entry)
+            self.release(None, failed=True)
+
+    def putconn(self, connection, discard=False):
+        """Give a checked out connection back, closing it when `discard`
+        is set, it is too old or it cannot be reset"""
+        with self.available:
+            entry = self.in_use.pop(id(connection), None)
+            if entry is not None:
+                self.pending += 1
+        if entry is None:
+            self.close(connection)
+            return
+        if not discard and \
+                time.monotonic() - entry.created < self.max_lifetime:
+            try:
+                self.reset(connection)
+            except Exception:
+                discard = True
+        else:
+            discard = True
+        if discard:
+            self.discard(entry)
+        with self.available:
+            self.pending -= 1
+            if not discard:
+                entry.returned = time.monotonic()
+                self.idle.append(entry)
+            self.available.notify()
+
+    def closeall(self):
+        """Close the idle connections; checked out ones close on return"""
+        with self.available:
+            idle, self.idle = list(self.idle), deque()
+        for entry in idle:
+            self.discard(entry)
+
+    def usable(self, entry):
+        now = time.monotonic()
+        if now - entry.created >= self.max_lifetime:
+            return False
+        try:
+            if not self.check(entry.connection):
+                return False
+            if self.ping is not None and \
+                    now - entry.returned >= self.ping_after:
+                return self.ping(entry.connection) is not False
+        except Exception:
+            return False
+        return True
+
+    def release(self, entry, created=False, failed=False):
+        """Free the slot held while checking or connecting, checking out
+        `entry` when given"""
+        with self.available:
+            self.pending -= 1
+            if entry is None:
+                self.failed_checks += failed
+                self.available.notify()
+                return
+            self.in_use[id(entry.connection)] = entry
+            self.checkouts += 1
+            self.created += created
+
+    def discard(self, entry):
+        with self.lock:
+            self.closed += 1
+        try:
+            self.close(entry.connection)
+        except Exception:
+            pass
+
+    def stats(self):
+        with self.lock:
+            return {
+                'max_size': self.max_size,
+                'in_use': len(self.in_use),
+                'pending': self.pending,
+                'idle': len(self.idle),
+                'created': self.created,
+                'closed': self.closed,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_seconds': self.wait_time,
+                'timeouts': self.timeouts,
+                'failed_checks': self.failed_checks,
+            }
+
+
+def prometheus(entries):
+    """Render pool stats from `pool_stats()` in the Prometheus text format"""
+    lines = []
+    gauges = (('in_use', 'Connections checked out'),
+              ('idle', 'Connections waiting in the pool'),
+              ('max_size', 'Most connections the pool opens'))
+    counters = (('created', 'Connections opened'),
+                ('closed', 'Connections closed'),
+                ('checkouts', 'Connections handed out'),
+                ('waits', 'Checkouts that waited for a free connection'),
+                ('wait_seconds', 'Time spent waiting for a connection'),
+                ('timeouts', 'Checkouts that gave up waiting'),
+                ('failed_checks', 'Idle connections that failed a check'))
+    for kind, metrics in (('gauge', gauges), ('counter', counters)):
+        for key, help_text in metrics:
+            name = f'db_pool_{key}'
+            if kind == 'counter' and not key.endswith('_seconds'):
+                name += '_total'
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for entry in entries:
+                lines.append(
+                    f'{name}{{alias="{entry["alias"]}",'
+                    f'database="{entry["database"]}"}} {entry[key]}'
+                )
+    return '\n'.join(lines) + '\n' if lines else ''
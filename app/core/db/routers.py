@@ -0,0 +1,181 @@
+"""Read-replica routing.
+
+ReplicaMiddleware picks a healthy replica for safe-method requests to the
+URL namespaces in REPLICA_READ_NAMESPACES and ReplicaRouter sends the
+reads of that request there. Everything else, and every write, goes to
+the primary. A client that has just written is pinned to the primary for
+REPLICA_STICKY_SECONDS so it reads its own writes. The pin is a signed
+cookie on the response, and for clients that drop cookies also a marker
+under a hash of their Authorization header or session cookie in the
+REPLICA_STICKY_CACHE cache. That marker only reaches other worker
+processes when the cache is shared, such as Redis or Memcached.
+"""
+import hashlib
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import OperationalError
+
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_COOKIE = 'db_primary'
+STICKY_SALT = 'core.db.routers.sticky'
+# Read from the primary whatever the request; a token a replica has not
+# seen yet would fail authentication right after login
+PRIMARY_MODELS = {'authtoken.token'}
+
+current = ContextVar('replica_alias', default=None)
+
+
+@contextmanager
+def use_primary():
+    """Send the reads inside the block to the primary"""
+    token = current.set(None)
+    try:
+        yield
+    finally:
+        current.reset(token)
+
+
+class ReplicaHealth:
+    """Replicas that failed recently, skipped until their retry time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.down = {}
+
+    def mark_down(self, alias):
+        with self._lock:
+            self.down[alias] = \
+                time.monotonic() + settings.REPLICA_RETRY_SECONDS
+
+    def is_up(self, alias):
+        with self._lock:
+            retry = self.down.get(alias)
+            if retry is None:
+                return True
+            if time.monotonic() >= retry:
+                del self.down[alias]
+                return True
+            return False
+
+    def reset(self):
+        with self._lock:
+            self.down = {}
+
+
+health = ReplicaHealth()
+
+
+def check(alias):
+    """Connect to a replica unless its thread already holds a connection"""
+    connections[alias].ensure_connection()
+
+
+def choose_replica():
+    """Return a random healthy replica, or None to use the primary"""
+    replicas = [alias for alias in settings.REPLICA_DATABASES
+                if health.is_up(alias)]
+    random.shuffle(replicas)
+    for alias in replicas:
+        try:
+            check(alias)
+        except OperationalError:
+            health.mark_down(alias)
+        else:
+            return alias
+    return None
+
+
+def client_key(request):
+    """Cache key of the client sending `request`, or None when it sends
+    no credentials"""
+    credentials = request.META.get('HTTP_AUTHORIZATION') or \
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credentials:
+        return None
+    digest = hashlib.sha256(credentials.encode()).hexdigest()
+    return f'db:sticky:{digest}'
+
+
+def is_sticky(request):
+    """Return whether the client wrote within REPLICA_STICKY_SECONDS"""
+    if request.get_signed_cookie(
+            STICKY_COOKIE, default=None, salt=STICKY_SALT,
+            max_age=settings.REPLICA_STICKY_SECONDS):
+        return True
+    key = client_key(request)
+    return key is not None and \
+        bool(caches[settings.REPLICA_STICKY_CACHE].get(key))
+
+
+def make_sticky(request, response):
+    seconds = settings.REPLICA_STICKY_SECONDS
+    response.set_signed_cookie(
+        STICKY_COOKIE, '1', salt=STICKY_SALT, max_age=seconds,
+        httponly=True, samesite='Lax',
+        secure=settings.SESSION_COOKIE_SECURE,
+    )
+    key = client_key(request)
+    if key is not None:
+        caches[settings.REPLICA_STICKY_CACHE].set(key, True, seconds)
+
+
+class ReplicaMiddleware:
+    """Route the reads of safe requests to a replica"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        if request.method not in SAFE_METHODS \
+                and response.status_code < 400:
+            make_sticky(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.REPLICA_DATABASES \
+                or request.method not in SAFE_METHODS \
+                or request.resolver_match.namespace \
+                not in settings.REPLICA_READ_NAMESPACES:
+            return None
+        if is_sticky(request):
+            return None
+        current.set(choose_replica())
+        return None
+
+    def process_exception(self, request, exception):
+        alias = current.get()
+        if alias is not None and isinstance(exception, OperationalError):
+            health.mark_down(alias)
+
+
+class ReplicaRouter:
+    """Reads go to the replica chosen for the request, writes and
+    migrations to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower in PRIMARY_MODELS:
+            return DEFAULT_DB_ALIAS
+        return current.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
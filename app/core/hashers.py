@@ -0,0 +1,108 @@
+"""Password hashers whose cost is set from settings"""
+import base64
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import BasePasswordHasher, \
+    PBKDF2PasswordHasher, make_password, mask_hash
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 with the iteration count of PASSWORD_PBKDF2_ITERATIONS.
+
+    It keeps the pbkdf2_sha256 algorithm name, so existing hashes verify
+    and are re-encoded on login when the iteration count changes.
+    """
+
+    def __init__(self):
+        self.iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class ScryptPasswordHasher(BasePasswordHasher):
+    """scrypt through hashlib, with cost from the PASSWORD_SCRYPT_*
+    settings. The encoded format matches Django 4's scrypt hasher."""
+    algorithm = 'scrypt'
+
+    def __init__(self):
+        self.work_factor = settings.PASSWORD_SCRYPT_N
+        self.block_size = settings.PASSWORD_SCRYPT_R
+        self.parallelism = settings.PASSWORD_SCRYPT_P
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+            # scrypt needs 128 * n * r bytes; leave headroom over that
+            maxmem=256 * n * r * p, dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (self.algorithm, n, salt, r, p, hash_)
+
+    def decode(self, encoded):
+        algorithm, n, salt, r, p, hash_ = encoded.split('$', 5)
+        assert algorithm == self.algorithm
+        return {
+            'algorithm': algorithm,
+            'work_factor': int(n),
+            'salt': salt,
+            'block_size': int(r),
+            'parallelism': int(p),
+            'hash': hash_,
+        }
+
+    def verify(self, password, encoded):
+        decoded = self.decode(encoded)
+        encoded_2 = self.encode(
+            password, decoded['salt'], decoded['work_factor'],
+            decoded['block_size'], decoded['parallelism'],
+        )
+        return constant_time_compare(encoded, encoded_2)
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return {
+            _('algorithm'): decoded['algorithm'],
+            _('work factor'): decoded['work_factor'],
+            _('block size'): decoded['block_size'],
+            _('parallelism'): decoded['parallelism'],
+            _('salt'): mask_hash(decoded['salt']),
+            _('hash'): mask_hash(decoded['hash']),
+        }
+
+    def must_update(self, encoded):
+        decoded = self.decode(encoded)
+        return (
+            decoded['work_factor'] != self.work_factor or
+            decoded['block_size'] != self.block_size or
+            decoded['parallelism'] != self.parallelism
+        )
+
+    def harden_runtime(self, password, encoded):
+        # The cost is fixed by the settings; nothing to even out
+        pass
+
+
+# Below this many passwords starting worker processes costs more than it saves
+PROCESS_POOL_THRESHOLD = 16
+
+
+def hash_passwords(passwords, workers=None):
+    """Return make_password() of every password, hashed in a process pool
+    when there are enough of them"""
+    workers = workers or settings.PASSWORD_HASH_PROCESSES
+    if workers <= 1 or len(passwords) < PROCESS_POOL_THRESHOLD:
+        return [make_password(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=django.setup) as pool:
+        return list(pool.map(
+            make_password, passwords,
+            chunksize=max(1, len(passwords) // (workers * 4)),
+        ))
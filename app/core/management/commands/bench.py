@@ -0,0 +1,165 @@
+import json
+import platform
+import random
+import subprocess
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import bench
+from core.models import Tag, Category, Post
+
+
+SCENARIOS = ('list', 'detail', 'feed', 'create', 'login')
+
+
+class Command(BaseCommand):
+    """Django command to measure API latency and throughput in-process"""
+    help = ('Drive the post list, detail, feed and create endpoints and the '
+            'login endpoint against a corpus from seed_bench, and report '
+            'latency percentiles, queries per request and throughput. '
+            'Writes are rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS,
+                            default=list(SCENARIOS))
+        parser.add_argument('--output', help='Write the results as JSON')
+        parser.add_argument(
+            '--compare', help='JSON results of an earlier run to compare to',
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        email = bench.user_email(prefix, 0)
+        if not get_user_model().objects.filter(email=email).exists():
+            raise CommandError(f'No corpus with prefix "{prefix}"; run '
+                               f'seed_bench first')
+        self.rng = random.Random(options['seed'])
+        self.email = email
+        self.slugs = list(Post.objects.filter(
+            slug__startswith=f'{prefix}-post-'
+        ).order_by('id').values_list('slug', flat=True))
+        self.tag_ids = list(Tag.objects.filter(
+            name__startswith=f'{prefix}-tag-'
+        ).order_by('id').values_list('id', flat=True))
+        self.category_ids = list(Category.objects.filter(
+            name__startswith=f'{prefix}-category-'
+        ).order_by('id').values_list('id', flat=True))
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for name in options['scenarios']:
+                with transaction.atomic():
+                    results[name] = self.run_scenario(
+                        name, options['requests'], options['warmup']
+                    )
+                    transaction.set_rollback(True)
+                self.report(name, results[name])
+
+        data = {
+            'date': timezone.now().isoformat(),
+            'commit': self.commit(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'posts': len(self.slugs),
+            'options': {key: options[key] for key in
+                        ('prefix', 'requests', 'warmup', 'seed')},
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(data, f, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+        if options['compare']:
+            with open(options['compare']) as f:
+                self.compare(json.load(f)['results'], results)
+
+    def run_scenario(self, name, count, warmup):
+        """Return the statistics of `count` requests after `warmup`"""
+        client = APIClient()
+        user = get_user_model().objects.get(email=self.email)
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        request = getattr(self, f'request_{name}')
+
+        for n in range(warmup):
+            request(client, -n - 1)
+        timings = []
+        errors = 0
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            for n in range(count):
+                start = time.perf_counter()
+                res = request(client, n)
+                timings.append(time.perf_counter() - start)
+                errors += res.status_code >= 400
+            elapsed = time.perf_counter() - started
+        return bench.summarize(timings, len(ctx.captured_queries), elapsed,
+                               errors)
+
+    def request_list(self, client, n):
+        return client.get(reverse('blog:post-list'))
+
+    def request_detail(self, client, n):
+        slug = self.rng.choice(self.slugs)
+        return client.get(reverse('blog:post-detail-slug', args=[slug]))
+
+    def request_feed(self, client, n):
+        return client.get(reverse('blog:post-feed'))
+
+    def request_create(self, client, n):
+        return client.post(reverse('blog:post-list'), {
+            'title': f'bench create {n}',
+            'slug': f'bench-create-{n}',
+            'body': 'lorem ipsum ' * 100,
+            'tags': self.rng.sample(self.tag_ids, min(3, len(self.tag_ids))),
+            'categories': self.rng.sample(self.category_ids,
+                                          min(1, len(self.category_ids))),
+        }, format='json')
+
+    def request_login(self, client, n):
+        return client.post(reverse('user:token'), {
+            'email': self.email, 'password': bench.PASSWORD,
+        })
+
+    def report(self, name, stats):
+        self.stdout.write(
+            f'{name:>7}: p50 {stats["p50_ms"]:.2f} ms, '
+            f'p95 {stats["p95_ms"]:.2f} ms, p99 {stats["p99_ms"]:.2f} ms, '
+            f'{stats["queries_per_request"]:.1f} queries/request, '
+            f'{stats["throughput_rps"]:.0f} requests/s, '
+            f'{stats["errors"]} errors'
+        )
+
+    def compare(self, before, after):
+        """Print the change of every shared scenario against `before`"""
+        for name, stats in after.items():
+            if name not in before:
+                continue
+            changes = []
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+                old, new = before[name][key], stats[key]
+                if old:
+                    changes.append(f'{key} {(new - old) / old:+.1%}')
+            self.stdout.write(f'{name:>7}: ' + ', '.join(changes))
+
+    @staticmethod
+    def commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
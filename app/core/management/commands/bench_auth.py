@@ -0,0 +1,47 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import tokens
+
+
+class Command(BaseCommand):
+    """Django command to measure the cost of token authentication"""
+    help = ('Request the profile endpoint with a token, with a cold and a '
+            'warm token cache. All data is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        url = reverse('user:profile')
+        with override_settings(ALLOWED_HOSTS=['testserver']), \
+                transaction.atomic():
+            user = get_user_model().objects.create_user(
+                f'bench-{time.time_ns()}@example.com', None
+            )
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user)}'
+            )
+            for label, warm in (('uncached', False), ('cached', True)):
+                tokens.clear()
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    for _ in range(count):
+                        if not warm:
+                            tokens.clear()
+                        client.get(url)
+                    elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{label:>8}: {count / elapsed:.0f} requests/s, '
+                    f'{len(ctx.captured_queries) / count:.2f} queries/request'
+                )
+            transaction.set_rollback(True)
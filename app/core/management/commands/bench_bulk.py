@@ -0,0 +1,69 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Tag, Category
+
+
+class Command(BaseCommand):
+    """Django command to compare per-object and bulk post creation"""
+    help = ('Create the same posts once through the post list endpoint and '
+            'once through the bulk endpoint. All data is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500)
+        parser.add_argument('--tags', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for label, run in (('per-object', self.per_object),
+                               ('bulk', self.bulk)):
+                with transaction.atomic():
+                    client, payload = self.setup(options)
+                    with CaptureQueriesContext(connection) as ctx:
+                        start = time.perf_counter()
+                        run(client, payload)
+                        elapsed = time.perf_counter() - start
+                    transaction.set_rollback(True)
+                self.stdout.write(
+                    f'{label:>10}: {len(payload)} posts in {elapsed:.3f}s '
+                    f'({len(payload) / elapsed:.0f} posts/s, '
+                    f'{len(ctx.captured_queries)} queries)'
+                )
+
+    def setup(self, options):
+        """Create a staff user, tags and the payload to write"""
+        user = get_user_model().objects.create_staffuser(
+            f'bench-{time.time_ns()}@example.com', None
+        )
+        tags = [Tag.objects.create(user=user, name=f'bench-tag-{i}').id
+                for i in range(options['tags'])]
+        category = Category.objects.create(user=user, name='bench').id
+        client = APIClient()
+        client.force_authenticate(user)
+        payload = [
+            {
+                'title': f'bench post {i}',
+                'slug': f'bench-post-{i}',
+                'body': 'lorem ipsum ' * 50,
+                'tags': tags,
+                'categories': [category],
+            }
+            for i in range(options['count'])
+        ]
+        return client, payload
+
+    def per_object(self, client, payload):
+        url = reverse('blog:post-list')
+        for item in payload:
+            res = client.post(url, item, format='json')
+            assert res.status_code == 201, res.data
+
+    def bulk(self, client, payload):
+        res = client.post(reverse('blog:post-bulk'), payload, format='json')
+        assert res.status_code == 201, res.data
@@ -0,0 +1,127 @@
+import random
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import bench
+from core.db.backends.postgresql_pool.base import pool_stats
+from core.models import Tag
+
+
+# Mode -> (backend, CONN_MAX_AGE)
+MODES = {
+    'per-request': ('django.db.backends.postgresql', 0),
+    'persistent': ('django.db.backends.postgresql', None),
+    'pooled': ('core.db.backends.postgresql_pool', 0),
+}
+
+
+class Command(BaseCommand):
+    """Django command to compare per-request, persistent and pooled
+    database connections"""
+    help = ('Request tag details from several threads, closing old '
+            'connections around every request as the WSGI handler does, '
+            'once per connection mode. Needs a corpus from seed_bench.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Requests per thread')
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--pool-size', type=int, default=2)
+        parser.add_argument('--modes', nargs='+', choices=MODES,
+                            default=list(MODES))
+
+    def handle(self, *args, **options):
+        default = connections[DEFAULT_DB_ALIAS]
+        if default.vendor != 'postgresql':
+            raise CommandError('Connection modes need PostgreSQL')
+        user = get_user_model().objects.filter(
+            email=bench.user_email(options['prefix'], 0)
+        ).first()
+        if user is None:
+            raise CommandError('Run seed_bench first')
+        self.token = Token.objects.get_or_create(user=user)[0].key
+        self.tag_ids = list(Tag.objects.filter(
+            name__startswith=f'{options["prefix"]}-tag-'
+        ).values_list('id', flat=True))
+
+        for mode in options['modes']:
+            engine, max_age = MODES[mode]
+            settings_dict = {
+                **default.settings_dict,
+                'ENGINE': engine,
+                'CONN_MAX_AGE': max_age,
+                'POOL': {**default.settings_dict.get('POOL', {}),
+                         'MAX_SIZE': options['pool_size']},
+            }
+            stats = self.run_mode(settings_dict, options)
+            self.stdout.write(
+                f'{mode:>11}: p50 {stats["p50_ms"]:.2f} ms, '
+                f'p95 {stats["p95_ms"]:.2f} ms, '
+                f'p99 {stats["p99_ms"]:.2f} ms, '
+                f'{stats["throughput_rps"]:.0f} requests/s, '
+                f'{stats["connections"]} connections opened'
+            )
+        for entry in pool_stats():
+            self.stdout.write(f'pool {entry["alias"]}: {entry}')
+
+    def run_mode(self, settings_dict, options):
+        """Return the statistics of every thread's requests together"""
+        timings = []
+        # Pooled checkouts also send connection_created; count the
+        # server connections behind them
+        opened = set()
+        lock = threading.Lock()
+
+        def count(sender, connection, **kwargs):
+            with lock:
+                opened.add(connection.connection)
+
+        def worker(seed):
+            backend = load_backend(settings_dict['ENGINE'])
+            connections[DEFAULT_DB_ALIAS] = backend.DatabaseWrapper(
+                settings_dict, DEFAULT_DB_ALIAS
+            )
+            rng = random.Random(seed)
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+            local = []
+            for _ in range(options['requests']):
+                url = reverse('blog:tag-detail',
+                              args=[rng.choice(self.tag_ids)])
+                start = time.perf_counter()
+                close_old_connections()
+                res = client.get(url)
+                close_old_connections()
+                local.append(time.perf_counter() - start)
+                assert res.status_code == 200, res.status_code
+            connections[DEFAULT_DB_ALIAS].close()
+            with lock:
+                timings.extend(local)
+
+        connection_created.connect(count)
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                threads = [threading.Thread(target=worker, args=(n,))
+                           for n in range(options['threads'])]
+                started = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - started
+        finally:
+            connection_created.disconnect(count)
+        stats = bench.summarize(timings, 0, elapsed)
+        stats['connections'] = len(opened)
+        return stats
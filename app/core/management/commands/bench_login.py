@@ -0,0 +1,73 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from user import backends
+
+
+class Command(BaseCommand):
+    """Django command to measure login throughput of each hasher"""
+    help = ('Log in through the token endpoint with every configured '
+            'hasher, then run password checks from as many threads as '
+            'logins may hash at once. All data is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20)
+
+    def handle(self, *args, **options):
+        count = options['logins']
+        cores = os.cpu_count() or 1
+        for name, path in settings.PASSWORD_HASHER_CHOICES.items():
+            hashers = [path] + [other for other in settings.PASSWORD_HASHERS
+                                if other != path]
+            with override_settings(PASSWORD_HASHERS=hashers,
+                                   ALLOWED_HOSTS=['testserver']):
+                try:
+                    encoded = make_password('benchpass123')
+                except ValueError as error:
+                    self.stdout.write(f'{name:>7}: skipped ({error})')
+                    continue
+                serial = self.serial_logins(count)
+                parallel = self.parallel_checks(encoded, count * cores)
+            self.stdout.write(
+                f'{name:>7}: {serial:.1f} logins/s on one thread, '
+                f'{parallel:.1f} checks/s on '
+                f'{settings.LOGIN_HASH_CONCURRENCY} threads '
+                f'({parallel / cores:.1f} per core)'
+            )
+
+    def serial_logins(self, count):
+        """Return logins per second through the token endpoint"""
+        with transaction.atomic():
+            email = f'bench-{time.time_ns()}@example.com'
+            get_user_model().objects.create_user(email, 'benchpass123')
+            client = APIClient()
+            start = time.perf_counter()
+            for _ in range(count):
+                res = client.post(reverse('user:token'), {
+                    'email': email, 'password': 'benchpass123'
+                })
+                assert res.status_code == 200, res.data
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return count / elapsed
+
+    def parallel_checks(self, encoded, count):
+        """Return password checks per second with every login slot busy"""
+        with ThreadPoolExecutor(settings.LOGIN_HASH_CONCURRENCY) as pool:
+            start = time.perf_counter()
+            results = list(pool.map(
+                backends.verify, ['benchpass123'] * count, [encoded] * count
+            ))
+            elapsed = time.perf_counter() - start
+        assert all(valid for valid, _ in results)
+        return count / elapsed
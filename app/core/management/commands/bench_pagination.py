@@ -0,0 +1,94 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from blog.pagination import PostPagination
+from core.models import Post
+
+
+class Command(BaseCommand):
+    """Django command to measure post page latency as the table grows"""
+    help = ('Grow the post table to each size and time the first, middle '
+            'and last keyset page. Data is rolled back unless --keep.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int,
+            default=[1000, 10000, 100000, 1000000],
+        )
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--keep', action='store_true')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                f'bench-{time.time_ns()}@example.com'
+            )
+            self.stdout.write(
+                f'{"posts":>10} {"depth":>10} {"median ms":>10} {"p95 ms":>10}'
+            )
+            for size in sorted(options['sizes']):
+                self.grow(user, size, options['batch_size'])
+                for depth in (0, size // 2, size - options['page_size']):
+                    timings = self.time_page(
+                        factory, depth, options['page_size'],
+                        options['repeat'],
+                    )
+                    self.stdout.write(
+                        f'{size:>10} {depth:>10} '
+                        f'{statistics.median(timings):>10.3f} '
+                        f'{self.p95(timings):>10.3f}'
+                    )
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Benchmark finished'))
+
+    def grow(self, user, size, batch_size):
+        """Bulk insert posts until the table holds `size` rows"""
+        start = Post.objects.count()
+        now = timezone.now()
+        for offset in range(start, size, batch_size):
+            stop = min(offset + batch_size, size)
+            Post.objects.bulk_create([
+                Post(
+                    user=user,
+                    title=f'bench post {n}',
+                    slug=f'bench-post-{n}',
+                    # Every third post shares a date to exercise tie-breaks
+                    publish_date=now - timedelta(seconds=n // 3),
+                    published=True,
+                )
+                for n in range(offset, stop)
+            ], batch_size=batch_size)
+
+    def time_page(self, factory, depth, page_size, repeat):
+        """Return page fetch times in milliseconds at the given depth"""
+        paginator = PostPagination()
+        queryset = paginator.prepare(Post.objects.all())
+        params = {'page_size': page_size}
+        if depth > 0:
+            params['cursor'] = paginator.get_cursor(queryset[depth - 1])
+        request = Request(factory.get('/api/blog/post/', params))
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            PostPagination().paginate_queryset(Post.objects.all(), request)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    @staticmethod
+    def p95(timings):
+        ordered = sorted(timings)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from blog import export
+
+
+class Command(BaseCommand):
+    """Django command to stream every post to a file or stdout"""
+    help = 'Export all posts with their tag and category ids.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=tuple(export.FORMATS),
+                            default='ndjson', dest='export_format')
+        parser.add_argument('--output', help='File to write, default stdout')
+        parser.add_argument('--chunk-size', type=int,
+                            default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        render, _ = export.FORMATS[options['export_format']]
+        lines = render(export.iter_posts(chunk_size=options['chunk_size']))
+        count = 0
+        if options['output']:
+            with open(options['output'], 'w', newline='') as out:
+                for count, line in enumerate(lines, 1):
+                    out.write(line)
+        else:
+            for count, line in enumerate(lines, 1):
+                self.stdout.write(line, ending='')
+        self.stderr.write(f'Wrote {count} lines', style_func=None)
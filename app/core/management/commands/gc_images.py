@@ -0,0 +1,110 @@
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from core.models import ImageBlob, Post
+
+
+IMAGE_ROOT = 'uploads/blog'
+VARIANT_ROOT = 'uploads/blog/variants'
+
+
+def walk(storage, directory):
+    """Yield the names of all files below `directory`"""
+    if not storage.exists(directory):
+        return
+    dirs, files = storage.listdir(directory)
+    for name in files:
+        yield os.path.join(directory, name)
+    for name in dirs:
+        yield from walk(storage, os.path.join(directory, name))
+
+
+class Command(BaseCommand):
+    """Django command to delete stored post images no post references"""
+    help = ('Recount image references from the post table, then delete '
+            'image files and resized variants that nothing references.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Keep files younger than this many seconds, so uploads '
+                 'in progress are not collected',
+        )
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        dry_run = options['dry_run']
+
+        referenced = self.reconcile()
+        hashes = set(Post.objects.exclude(image_hash='').values_list(
+            'image_hash', flat=True
+        ))
+
+        removed = freed = 0
+        for name in walk(storage, IMAGE_ROOT):
+            if name.startswith(VARIANT_ROOT + os.sep):
+                keep = name.split(os.sep)[3] in hashes
+            else:
+                keep = name in referenced
+            if keep or storage.get_modified_time(name) > cutoff:
+                continue
+            size = storage.size(name)
+            if dry_run or self.delete(storage, name):
+                removed += 1
+                freed += size
+
+        if not dry_run:
+            missing = [blob.pk for blob in ImageBlob.objects.filter(refcount=0)
+                       if not storage.exists(blob.name)]
+            ImageBlob.objects.filter(pk__in=missing).delete()
+
+        verb = 'Would delete' if dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {removed} files ({freed / 1024 / 1024:.1f} MiB)'
+        ))
+
+    def delete(self, storage, name):
+        """Delete a file found unreferenced, unless a post has started
+        using it since reconcile()"""
+        with transaction.atomic():
+            blob = ImageBlob.objects.select_for_update().filter(
+                name=name
+            ).first()
+            if blob is not None and blob.refcount \
+                    or Post.objects.filter(image=name).exists():
+                return False
+            storage.delete(name)
+            if blob is not None:
+                blob.delete()
+        return True
+
+    def reconcile(self):
+        """Set every blob's refcount from the post table and return the
+        names still in use"""
+        counts = dict(
+            Post.objects.exclude(image='').exclude(image=None)
+            .order_by().values('image').annotate(count=Count('id'))
+            .values_list('image', 'count')
+        )
+        with transaction.atomic():
+            blobs = list(ImageBlob.objects.select_for_update())
+            stale = []
+            for blob in blobs:
+                count = counts.get(blob.name, 0)
+                if blob.refcount != count:
+                    blob.refcount = count
+                    stale.append(blob)
+            ImageBlob.objects.bulk_update(stale, ['refcount'])
+            known = {blob.name for blob in blobs}
+            ImageBlob.objects.bulk_create([
+                ImageBlob(name=name, refcount=count)
+                for name, count in counts.items() if name not in known
+            ])
+        return set(counts)
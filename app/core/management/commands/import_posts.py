@@ -0,0 +1,66 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import importer
+
+
+class Command(BaseCommand):
+    """Django command to import posts from an NDJSON or CSV file"""
+    help = ('Stream posts from a file and write them in batches. Tags and '
+            'categories are given by name and created when missing; rows '
+            'without names may give existing ids in tag_ids and '
+            'category_ids. Posts whose title already exists are skipped, '
+            'rows that do not fit the columns are reported.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True,
+                            help='Email of the user owning the new rows')
+        parser.add_argument('--format', choices=tuple(importer.READERS),
+                            dest='import_format',
+                            help='Default: guessed from the file extension')
+        parser.add_argument('--batch-size', type=int,
+                            default=importer.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["user"]}')
+        kind = options['import_format'] or (
+            'csv' if options['path'].endswith('.csv') else 'ndjson'
+        )
+        job = importer.Importer(user, options['batch_size'])
+        start = time.perf_counter()
+
+        failed = 0
+
+        def report_errors(job):
+            nonlocal failed
+            for number, error in job.errors:
+                self.stderr.write(f'Row {number}: {error}')
+            failed += len({number for number, _ in job.errors})
+            job.errors = []
+
+        def progress(job):
+            report_errors(job)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{job.created} created, {job.skipped} skipped, '
+                f'{failed} invalid ({job.created / elapsed:.0f} rows/s)'
+            )
+
+        with open(options['path'], newline='') as lines:
+            job.run(importer.READERS[kind](lines), progress)
+        report_errors(job)
+        for name, names in job.names.items():
+            if names.unknown:
+                self.stderr.write(
+                    f'Dropped {names.unknown} links to missing {name} ids'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {job.created} posts in '
+            f'{time.perf_counter() - start:.2f}s'
+        ))
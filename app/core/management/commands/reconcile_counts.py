@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from blog import counts
+
+
+class Command(BaseCommand):
+    """Django command to fix drift in tag and category post counts"""
+    help = ('Compare the stored post counts of tags and categories with '
+            'the link tables and rewrite the rows that differ.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        for model in counts.LINKS:
+            rows = list(counts.drifted(model).values(
+                'pk', 'name', 'post_count', 'actual_count',
+                'published_post_count', 'actual_published_count',
+            ))
+            for row in rows:
+                self.stdout.write(
+                    f'{model.__name__} {row["name"]}: '
+                    f'{row["post_count"]} -> {row["actual_count"]} posts, '
+                    f'{row["published_post_count"]} -> '
+                    f'{row["actual_published_count"]} published'
+                )
+            if rows and not options['dry_run']:
+                counts.recount(model, [row['pk'] for row in rows])
+            self.stdout.write(self.style.SUCCESS(
+                f'{len(rows)} {model._meta.verbose_name_plural} '
+                f'{"drifted" if options["dry_run"] else "fixed"}'
+            ))
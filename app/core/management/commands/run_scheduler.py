@@ -0,0 +1,47 @@
+from argparse import ArgumentTypeError
+
+from django.core.management.base import BaseCommand
+
+from blog.scheduler import Scheduler
+
+
+def batch_size(value):
+    size = int(value)
+    if size < 1:
+        raise ArgumentTypeError('must be at least 1')
+    return size
+
+
+class Command(BaseCommand):
+    """Django command to publish posts when their publish date arrives"""
+    help = ('Keep the upcoming publish dates of drafts in memory and '
+            'publish each post once its date has passed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Publish the posts due now and exit, e.g. from cron',
+        )
+        parser.add_argument('--batch-size', type=batch_size)
+        parser.add_argument('--reconcile-interval', type=int)
+        parser.add_argument('--poll-interval', type=int)
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler(
+            batch_size=options['batch_size'],
+            reconcile_interval=options['reconcile_interval'],
+            poll_interval=options['poll_interval'],
+        )
+        if options['once']:
+            published = scheduler.tick()
+            self.stdout.write(self.style.SUCCESS(
+                f'Published {published} posts'
+            ))
+            return
+        scheduler.reconcile()
+        self.stdout.write(f'Scheduler started with {len(scheduler)} '
+                          f'upcoming posts')
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            self.stdout.write('Scheduler stopped')
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import bench
+from core.models import Post
+
+
+class Command(BaseCommand):
+    """Django command to insert a synthetic corpus for benchmarks"""
+    help = ('Bulk insert users, tags, categories and posts with their '
+            'links. The same options always produce the same corpus.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--tags', type=int, default=200)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--tags-per-post', type=int, default=3)
+        parser.add_argument('--categories-per-post', type=int, default=1)
+        parser.add_argument('--body-words', type=int, default=300)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--flush', action='store_true',
+            help='Delete a corpus seeded with the same prefix first',
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        with transaction.atomic():
+            if options['flush']:
+                bench.flush(prefix)
+            elif Post.objects.filter(
+                    slug__startswith=f'{prefix}-post-').exists():
+                raise CommandError(
+                    f'A corpus with prefix "{prefix}" exists; use --flush'
+                )
+            start = time.perf_counter()
+            rows = bench.seed(
+                prefix=prefix,
+                users=options['users'],
+                tags=options['tags'],
+                categories=options['categories'],
+                posts=options['posts'],
+                tags_per_post=options['tags_per_post'],
+                categories_per_post=options['categories_per_post'],
+                body_words=options['body_words'],
+                random_seed=options['seed'],
+                batch_size=options['batch_size'],
+            )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{count} {name}' for name, count in rows.items())
+            + f' in {elapsed:.1f}s; log in as '
+            f'{bench.user_email(prefix, 0)} / {bench.PASSWORD}'
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_auto_20220310_0609'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-publish_date', '-id'], name='core_post_publish_id_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations
+
+
+# The search vector is maintained by PostgreSQL itself so that bulk writes
+# and raw updates keep it current. Other backends use the in-process index
+# in blog.search and skip this migration.
+FORWARD_SQL = [
+    'ALTER TABLE core_post ADD COLUMN search_vector tsvector',
+    """
+    CREATE FUNCTION core_post_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.subtitle, '')), 'B') ||
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.meta_description, '')), 'C') ||
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.body, '')), 'D');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_post_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, subtitle, meta_description, body
+    ON core_post FOR EACH ROW
+    EXECUTE PROCEDURE core_post_search_vector_update()
+    """,
+    # Fire the trigger once for existing rows
+    'UPDATE core_post SET title = title',
+    """
+    CREATE INDEX core_post_search_vector_idx
+    ON core_post USING gin (search_vector)
+    """,
+]
+
+BACKWARD_SQL = [
+    'DROP INDEX IF EXISTS core_post_search_vector_idx',
+    'DROP TRIGGER IF EXISTS core_post_search_vector_trigger ON core_post',
+    'DROP FUNCTION IF EXISTS core_post_search_vector_update()',
+    'ALTER TABLE core_post DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def run_on_postgres(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_post_publish_date_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgres(FORWARD_SQL),
+            run_on_postgres(BACKWARD_SQL),
+        ),
+    ]
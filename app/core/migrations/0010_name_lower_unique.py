@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_post_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX core_tag_name_lower_uniq '
+            'ON core_tag (lower(name))',
+            'DROP INDEX core_tag_name_lower_uniq',
+        ),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX core_category_name_lower_uniq '
+            'ON core_category (lower(name))',
+            'DROP INDEX core_category_name_lower_uniq',
+        ),
+    ]
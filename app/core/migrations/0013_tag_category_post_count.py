@@ -0,0 +1,68 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:23
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_posts(apps, schema_editor):
+    Post = apps.get_model('core', 'Post')
+    for name, column in (('Tag', 'tag_id'), ('Category', 'category_id')):
+        model = apps.get_model('core', name)
+        relation = 'tags' if name == 'Tag' else 'categories'
+        links = getattr(Post, relation).through.objects.filter(
+            **{column: OuterRef('pk')}
+        ).order_by().values(column)
+
+        def total(queryset):
+            return Coalesce(
+                Subquery(queryset.annotate(n=Count('pk')).values('n')), 0
+            )
+
+        model.objects.update(
+            post_count=total(links),
+            published_post_count=total(links.filter(post__published=True)),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_image_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='published_post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='published_post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        # SQLite rebuilds the tables to add columns, which drops the
+        # indexes of 0010 that the model state does not know about
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX IF NOT EXISTS core_tag_name_lower_uniq '
+            'ON core_tag (lower(name))',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX IF NOT EXISTS core_category_name_lower_uniq '
+            'ON core_category (lower(name))',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunPython(count_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_tag_category_post_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('published', True)), fields=['-publish_date', '-id'], name='core_post_published_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_post_published_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('published', False)), fields=['date_modified'], name='core_post_draft_modified_idx'),
+        ),
+    ]
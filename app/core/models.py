@@ -1,14 +1,19 @@
 import uuid
 import os
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractBaseUser, \
     BaseUserManager, PermissionsMixin
 from django.conf import settings
 
+from .hashers import hash_passwords
+from .storage import blog_image_storage
+
 
 def blog_image_file_path(instance, filename):
-    """Generate file path for new blog image"""
+    """Generate file path for new blog image. The content addressed
+    storage keeps the directory and extension and names the file after
+    its hash"""
     ext = filename.split('.')[-1]
     filename = f'{uuid.uuid4()}.{ext}'
 
@@ -29,20 +34,40 @@ class UserManager(BaseUserManager):
 
     def create_staffuser(self, email, password):
         """Creates and saves a new staff user"""
-        user = self.create_user(email, password)
-        user.is_staff = True
-        user.save(using=self._db)
-
-        return user
+        return self.create_user(email, password, is_staff=True)
 
     def create_superuser(self, email, password):
         """Creates and saves a new superuser"""
-        user = self.create_user(email, password)
-        user.is_staff = True
-        user.is_superuser = True
-        user.save(using=self._db)
-
-        return user
+        return self.create_user(
+            email, password, is_staff=True, is_superuser=True
+        )
+
+    def bulk_create_users(self, users, batch_size=None, workers=None):
+        """Creates and saves users from dicts of fields in one transaction.
+
+        Passwords are hashed across a process pool and rows are inserted
+        with bulk_create, so no signals are sent.
+        """
+        users = [dict(fields) for fields in users]
+        for fields in users:
+            if not fields.get('email'):
+                raise ValueError('Users must have an email address.')
+            fields['email'] = self.normalize_email(fields['email'])
+        passwords = hash_passwords(
+            [fields.pop('password', None) for fields in users], workers
+        )
+        objs = [self.model(password=password, **fields)
+                for fields, password in zip(users, passwords)]
+        with transaction.atomic(using=self._db):
+            objs = self.bulk_create(objs, batch_size=batch_size)
+        if objs and objs[0].pk is None:
+            ids = dict(self.filter(
+                email__in=[obj.email for obj in objs]
+            ).values_list('email', 'pk'))
+            for obj in objs:
+                obj.pk = ids[obj.email]
+
+        return objs
 
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -65,6 +90,9 @@ class Tag(models.Model):
         on_delete=models.PROTECT
     )
     name = models.CharField(max_length=50, unique=True)
+    # Maintained by blog.counts
+    post_count = models.PositiveIntegerField(default=0)
+    published_post_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
@@ -77,6 +105,9 @@ class Category(models.Model):
         on_delete=models.PROTECT
     )
     name = models.CharField(max_length=50, unique=True)
+    # Maintained by blog.counts
+    post_count = models.PositiveIntegerField(default=0)
+    published_post_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
@@ -99,10 +130,62 @@ class Post(models.Model):
     date_modified = models.DateTimeField(auto_now=True)
     publish_date = models.DateTimeField(blank=True, null=True)
     published = models.BooleanField(default=False)
-    image = models.ImageField(null=True, upload_to=blog_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=blog_image_file_path,
+        storage=blog_image_storage,
+    )
+    # Resized copies of image, maintained by blog.images
+    image_hash = models.CharField(max_length=64, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)
 
     class Meta:
         ordering = ["-publish_date"]
+        indexes = [
+            models.Index(
+                fields=['-publish_date', '-id'],
+                name='core_post_publish_id_idx',
+            ),
+            # Serves the public feed; drafts are left out of the index
+            models.Index(
+                fields=['-publish_date', '-id'],
+                condition=models.Q(published=True),
+                name='core_post_published_feed_idx',
+            ),
+            # Lets the publishing scheduler read recently changed drafts
+            models.Index(
+                fields=['date_modified'],
+                condition=models.Q(published=False),
+                name='core_post_draft_modified_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class ImageBlobManager(models.Manager):
+
+    def retain(self, name):
+        """Count one more post using the stored file `name`"""
+        blob, created = self.get_or_create(name=name)
+        if not created:
+            self.filter(pk=blob.pk).update(refcount=models.F('refcount') + 1)
+
+    def release(self, name):
+        """Count one post less using the stored file `name`"""
+        self.filter(name=name, refcount__gt=0).update(
+            refcount=models.F('refcount') - 1
+        )
+
+
+class ImageBlob(models.Model):
+    """Stored image file shared by the posts that reference it"""
+    name = models.CharField(max_length=255, unique=True)
+    refcount = models.PositiveIntegerField(default=1)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    objects = ImageBlobManager()
+
+    def __str__(self):
+        return self.name
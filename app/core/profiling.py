@@ -0,0 +1,249 @@
+"""Per-endpoint request profiling.
+
+ProfilingMiddleware measures every request and adds it to the stats of
+its URL name. Each figure is kept as a histogram over fixed buckets, so
+memory stays bounded however many requests are served. The middleware is
+only installed when PROFILING_ENABLED is set.
+"""
+import bisect
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = tuple(2 ** n for n in range(8, 25, 2))
+# Requests that match no URL pattern share one entry
+UNRESOLVED = '<unresolved>'
+
+current = ContextVar('profiling_request', default=None)
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed values"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Yield (upper bound, count of values at or below it)"""
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+    def quantile(self, q):
+        """Return the upper bound of the bucket holding quantile `q`"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+
+# Metric name -> (help text, buckets)
+METRICS = {
+    'duration_seconds': ('Wall time of the request', TIME_BUCKETS),
+    'db_seconds': ('Time spent in database queries', TIME_BUCKETS),
+    'queries': ('Database queries per request', COUNT_BUCKETS),
+    'duplicate_queries': (
+        'Queries repeating the SQL of an earlier query of the request',
+        COUNT_BUCKETS,
+    ),
+    'serializer_seconds': ('Time spent in DRF serializers', TIME_BUCKETS),
+    'response_bytes': ('Size of non-streaming response bodies',
+                       SIZE_BUCKETS),
+}
+
+
+class EndpointStats:
+    """Histograms of every metric of one URL name"""
+
+    def __init__(self):
+        self.statuses = Counter()
+        self.histograms = {
+            name: Histogram(buckets)
+            for name, (_, buckets) in METRICS.items()
+        }
+
+    def as_dict(self):
+        data = {name: histogram.as_dict()
+                for name, histogram in self.histograms.items()}
+        data['statuses'] = dict(self.statuses)
+        return data
+
+
+class Registry:
+    """Per-process stats of every profiled endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, view_name, status, values):
+        with self._lock:
+            stats = self.endpoints.get(view_name)
+            if stats is None:
+                stats = self.endpoints[view_name] = EndpointStats()
+            stats.statuses[status] += 1
+            for name, value in values.items():
+                if value is not None:
+                    stats.histograms[name].observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+
+    def as_dict(self):
+        with self._lock:
+            return {name: stats.as_dict()
+                    for name, stats in sorted(self.endpoints.items())}
+
+    def prometheus(self):
+        """Render the stats in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            for metric, (help_text, _) in METRICS.items():
+                name = f'http_request_{metric}'
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for view_name, stats in endpoints:
+                    histogram = stats.histograms[metric]
+                    view = escape_label(view_name)
+                    for bound, total in histogram.cumulative():
+                        lines.append(
+                            f'{name}_bucket{{view="{view}",le="{bound}"}} '
+                            f'{total}'
+                        )
+                    lines.append(
+                        f'{name}_sum{{view="{view}"}} {histogram.sum}'
+                    )
+                    lines.append(
+                        f'{name}_count{{view="{view}"}} {histogram.count}'
+                    )
+            lines.append('# HELP http_responses_total Responses by status')
+            lines.append('# TYPE http_responses_total counter')
+            for view_name, stats in endpoints:
+                view = escape_label(view_name)
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(
+                        f'http_responses_total{{view="{view}",'
+                        f'status="{status}"}} {count}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+registry = Registry()
+
+
+class RequestProfile:
+    """Figures collected while one request is served"""
+
+    def __init__(self):
+        self.db_time = 0
+        self.serializer_time = 0
+        self.serializer_depth = 0
+        self.queries = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper timing every query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries[sql] += 1
+
+
+class ProfilingMiddleware:
+    """Time requests, their queries and serializers per URL name"""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = current.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        queries = sum(profile.queries.values())
+        registry.record(
+            match.view_name if match else UNRESOLVED,
+            response.status_code,
+            {
+                'duration_seconds': duration,
+                'db_seconds': profile.db_time,
+                'queries': queries,
+                'duplicate_queries': queries - len(profile.queries),
+                'serializer_seconds': profile.serializer_time,
+                'response_bytes': None if response.streaming
+                else len(response.content),
+            },
+        )
+        return response
+
+
+class ProfiledSerializerMixin:
+    """Add the time a serializer spends converting data to the profile of
+    the current request. Nested serializers are counted once."""
+
+    def to_representation(self, instance):
+        return self._profiled(super().to_representation, instance)
+
+    def to_internal_value(self, data):
+        return self._profiled(super().to_internal_value, data)
+
+    def _profiled(self, method, value):
+        profile = current.get()
+        if profile is None:
+            return method(value)
+        profile.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return method(value)
+        finally:
+            profile.serializer_depth -= 1
+            if not profile.serializer_depth:
+                profile.serializer_time += time.perf_counter() - start
@@ -0,0 +1,48 @@
+"""Storage that names files after their content"""
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+def content_digest(content):
+    """Return the sha256 of a file, or the digest computed while it was
+    streamed in when the upload carries one"""
+    digest = getattr(content, 'content_hash', None)
+    if digest:
+        return digest
+    sha = hashlib.sha256()
+    for chunk in content.chunks():
+        sha.update(chunk)
+    return sha.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores each distinct content once.
+
+    The name chosen by upload_to only contributes its directory and
+    extension; the file is saved as <dir>/<ab>/<sha256>.<ext>. Saving
+    content that is already stored writes nothing and returns the
+    existing name.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = content_digest(content)
+        directory, basename = os.path.split(name)
+        ext = os.path.splitext(basename)[1].lower()
+        name = os.path.join(directory, digest[:2], digest + ext)
+        if self.exists(name):
+            # A new reference; keeps gc_images from taking the file for
+            # an orphan before the referencing post is counted
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+
+def blog_image_storage():
+    return ContentAddressedStorage()
@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core import bench
+from core.models import Tag, Post
+
+
+class BenchTests(TestCase):
+    """Test the benchmark corpus and harness"""
+
+    def seed(self, **options):
+        return bench.seed(users=3, tags=10, categories=4, posts=30,
+                          body_words=20, batch_size=7, **options)
+
+    def test_seed(self):
+        """Test the corpus is inserted with links and counts"""
+        rows = self.seed()
+
+        self.assertEqual(rows['posts'], 30)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Post.tags.through.objects.count(), 90)
+        self.assertEqual(rows['links'], 120)
+        self.assertTrue(get_user_model().objects.get(
+            email=bench.user_email('bench', 0)
+        ).check_password(bench.PASSWORD))
+        self.assertFalse(bench.counts.drifted(Tag).exists())
+
+    def test_seed_is_reproducible(self):
+        """Test the same seed produces the same corpus"""
+        def corpus():
+            return list(Post.objects.order_by('slug').values_list(
+                'slug', 'title', 'published', 'tags__name'
+            ))
+
+        self.seed()
+        first = corpus()
+        bench.flush()
+        self.assertFalse(Post.objects.exists())
+        self.seed()
+
+        self.assertEqual(corpus(), first)
+
+    def test_percentile(self):
+        """Test the nearest-rank percentile"""
+        values = list(range(1, 101))
+
+        self.assertEqual(bench.percentile(values, 0.5), 50)
+        self.assertEqual(bench.percentile(values, 0.99), 99)
+        self.assertEqual(bench.percentile([7], 0.95), 7)
+
+    def test_seed_command_refuses_existing_corpus(self):
+        """Test seeding twice needs --flush"""
+        options = {'users': 2, 'tags': 2, 'categories': 1, 'posts': 3,
+                   'stdout': StringIO()}
+        call_command('seed_bench', **options)
+
+        with self.assertRaises(CommandError):
+            call_command('seed_bench', **options)
+        call_command('seed_bench', flush=True, **options)
+        self.assertEqual(Post.objects.count(), 3)
+
+    def test_bench_command(self):
+        """Test every scenario is measured and saved as JSON"""
+        self.seed()
+        out = StringIO()
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        call_command('bench', requests=5, warmup=1, output=path,
+                     compare=path, stdout=out)
+
+        with open(path) as f:
+            data = json.load(f)
+        self.assertEqual(set(data['results']),
+                         {'list', 'detail', 'feed', 'create', 'login'})
+        for stats in data['results'].values():
+            self.assertEqual(stats['requests'], 5)
+            self.assertEqual(stats['errors'], 0)
+            self.assertGreater(stats['queries_per_request'], 0)
+        self.assertFalse(Post.objects.filter(
+            slug__startswith='bench-create-'
+        ).exists())
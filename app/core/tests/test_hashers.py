@@ -0,0 +1,48 @@
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import TestCase, override_settings
+
+from core.hashers import ScryptPasswordHasher, TunedPBKDF2PasswordHasher
+
+
+SCRYPT_FIRST = [
+    'core.hashers.ScryptPasswordHasher',
+    'core.hashers.TunedPBKDF2PasswordHasher',
+]
+
+
+@override_settings(PASSWORD_SCRYPT_N=2 ** 10, PASSWORD_PBKDF2_ITERATIONS=1000)
+class HasherTests(TestCase):
+
+    def test_scrypt_round_trip(self):
+        """Test scrypt hashes verify and reject wrong passwords"""
+        hasher = ScryptPasswordHasher()
+        encoded = hasher.encode('testpass123', hasher.salt())
+
+        self.assertTrue(encoded.startswith('scrypt$1024$'))
+        self.assertTrue(hasher.verify('testpass123', encoded))
+        self.assertFalse(hasher.verify('wrong', encoded))
+
+    def test_scrypt_must_update_on_cost_change(self):
+        """Test a hash made with other parameters is flagged as stale"""
+        hasher = ScryptPasswordHasher()
+        encoded = hasher.encode('testpass123', hasher.salt(), n=2 ** 8)
+
+        self.assertTrue(hasher.must_update(encoded))
+        self.assertFalse(hasher.must_update(
+            hasher.encode('testpass123', hasher.salt())
+        ))
+
+    def test_pbkdf2_iterations_from_settings(self):
+        """Test the PBKDF2 cost follows the settings"""
+        self.assertEqual(TunedPBKDF2PasswordHasher().iterations, 1000)
+
+    def test_old_hasher_upgraded(self):
+        """Test a PBKDF2 hash is re-encoded when scrypt is preferred"""
+        encoded = make_password('testpass123', hasher='pbkdf2_sha256')
+        updated = []
+
+        with override_settings(PASSWORD_HASHERS=SCRYPT_FIRST):
+            self.assertTrue(check_password('testpass123', encoded,
+                                           setter=updated.append))
+
+        self.assertEqual(updated, ['testpass123'])
@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+HASHED = 'uploads/blog/ab/' + 'ab' * 32 + '.png'
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, MEDIA_SENDFILE='')
+class MediaViewTests(TestCase):
+    """Test serving files below MEDIA_ROOT"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name, content in (('plain.txt', b'0123456789'),
+                              (HASHED, b'image bytes')):
+            path = os.path.join(MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(content)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_serves_file(self):
+        """Test a file is streamed with validators and caching headers"""
+        res = self.client.get('/media/plain.txt')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b''.join(res.streaming_content), b'0123456789')
+        self.assertTrue(res['ETag'].startswith('"'))
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('max-age=86400', res['Cache-Control'])
+
+    def test_content_addressed_immutable(self):
+        """Test hashed names are cached for a year"""
+        res = self.client.get('/media/' + HASHED)
+
+        self.assertIn('immutable', res['Cache-Control'])
+        self.assertIn('max-age=31536000', res['Cache-Control'])
+
+    def test_content_addressed_etag_survives_touch(self):
+        """Test a hashed file keeps its validators when its mtime is
+        refreshed by a repeated upload"""
+        etag = self.client.get('/media/' + HASHED)['ETag']
+        os.utime(os.path.join(MEDIA_ROOT, HASHED), (0, 0))
+
+        res = self.client.get('/media/' + HASHED, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertNotIn('Last-Modified', res)
+
+        res = self.client.get('/media/' + HASHED, HTTP_RANGE='bytes=0-4',
+                              HTTP_IF_RANGE=etag)
+        self.assertEqual(res.status_code, 206)
+
+    def test_not_modified(self):
+        """Test a matching If-None-Match returns 304"""
+        etag = self.client.get('/media/plain.txt')['ETag']
+
+        res = self.client.get('/media/plain.txt', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_range(self):
+        """Test a byte range returns 206 with the slice"""
+        res = self.client.get('/media/plain.txt', HTTP_RANGE='bytes=2-5')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(res['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(res.streaming_content), b'2345')
+
+    def test_suffix_range(self):
+        """Test a suffix range returns the end of the file"""
+        res = self.client.get('/media/plain.txt', HTTP_RANGE='bytes=-3')
+
+        self.assertEqual(b''.join(res.streaming_content), b'789')
+
+    def test_unsatisfiable_range(self):
+        """Test a range past the end returns 416"""
+        res = self.client.get('/media/plain.txt', HTTP_RANGE='bytes=20-')
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], 'bytes */10')
+
+    def test_stale_if_range_sends_whole_file(self):
+        """Test a range on an old ETag falls back to the full file"""
+        res = self.client.get('/media/plain.txt', HTTP_RANGE='bytes=2-5',
+                              HTTP_IF_RANGE='"old"')
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_path_traversal(self):
+        """Test paths outside MEDIA_ROOT are not served"""
+        res = self.client.get('/media/..%2F..%2Fetc%2Fpasswd')
+
+        self.assertEqual(res.status_code, 404)
+
+    @override_settings(MEDIA_SENDFILE='x-accel-redirect',
+                       MEDIA_ACCEL_PREFIX='/protected/')
+    def test_accel_redirect(self):
+        """Test nginx offload sends only the internal location"""
+        res = self.client.get('/media/plain.txt')
+
+        self.assertEqual(res['X-Accel-Redirect'], '/protected/plain.txt')
+        self.assertEqual(res.content, b'')
+
+    @override_settings(MEDIA_SENDFILE='x-sendfile')
+    def test_sendfile(self):
+        """Test X-Sendfile carries the absolute path"""
+        res = self.client.get('/media/plain.txt')
+
+        self.assertEqual(res['X-Sendfile'],
+                         os.path.join(MEDIA_ROOT, 'plain.txt'))
@@ -1,6 +1,7 @@
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 
 from core import models
@@ -64,6 +65,38 @@ class ModelTests(TestCase):
 
         self.assertTrue(user.is_staff)
 
+    def test_create_staffuser_saves_once(self):
+        """Test the staff helper inserts the user with a single query"""
+        with self.assertNumQueries(1):
+            get_user_model().objects.create_staffuser(
+                'teststaff@gmail.com', 'testpass123'
+            )
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.MD5PasswordHasher'
+    ])
+    def test_bulk_create_users(self):
+        """Test creating users in bulk with hashed passwords"""
+        users = get_user_model().objects.bulk_create_users(
+            [{'email': f'user{i}@GMAIL.com', 'password': f'testpass{i}'}
+             for i in range(20)],
+            workers=2,
+        )
+
+        self.assertEqual(get_user_model().objects.count(), 20)
+        self.assertTrue(all(user.pk for user in users))
+        user = get_user_model().objects.get(email='user3@gmail.com')
+        self.assertTrue(user.check_password('testpass3'))
+
+    def test_bulk_create_users_requires_email(self):
+        """Test a user without email fails the whole batch"""
+        with self.assertRaises(ValueError):
+            get_user_model().objects.bulk_create_users(
+                [{'email': 'a@gmail.com'}, {'password': 'x'}]
+            )
+
+        self.assertFalse(get_user_model().objects.exists())
+
     def test_create_new_tag(self):
         """Tag to be used for a blog"""
         tag = models.Tag.objects.create(
@@ -100,3 +133,11 @@ class ModelTests(TestCase):
 
         exp_path = f'uploads/blog/{uuid}.jpg'
         self.assertEqual(file_path, exp_path)
+
+    def test_tag_name_unique_ignoring_case(self):
+        """Test that the database rejects tags differing only in case"""
+        user = sample_user()
+        models.Tag.objects.create(user=user, name='news')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='News')
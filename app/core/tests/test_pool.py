@@ -0,0 +1,178 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db import pool
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+        self.resets = 0
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**options):
+    return ConnectionPool(
+        check=lambda connection: connection.healthy,
+        reset=lambda connection: setattr(connection, 'resets',
+                                         connection.resets + 1),
+        **options
+    )
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the bounded connection pool"""
+
+    def test_reuses_returned_connection(self):
+        """Test a returned connection is reset and handed out again"""
+        connections = make_pool()
+
+        first = connections.getconn(FakeConnection)
+        connections.putconn(first)
+        second = connections.getconn(FakeConnection)
+
+        self.assertIs(first, second)
+        self.assertEqual(first.resets, 1)
+        stats = connections.stats()
+        self.assertEqual((stats['created'], stats['checkouts']), (1, 2))
+
+    def test_replaces_unhealthy_connection(self):
+        """Test a connection failing its checkout check is closed"""
+        connections = make_pool()
+        first = connections.getconn(FakeConnection)
+        connections.putconn(first)
+        first.healthy = False
+
+        second = connections.getconn(FakeConnection)
+
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertEqual(connections.stats()['failed_checks'], 1)
+
+    def test_pings_connections_idle_too_long(self):
+        """Test idle connections are pinged before reuse"""
+        pinged = []
+        connections = make_pool(ping_after=0, ping=pinged.append)
+        first = connections.getconn(FakeConnection)
+        connections.putconn(first)
+
+        connections.getconn(FakeConnection)
+
+        self.assertEqual(pinged, [first])
+
+    def test_closes_connections_past_lifetime(self):
+        """Test old connections are closed instead of reused"""
+        connections = make_pool(max_lifetime=0)
+        first = connections.getconn(FakeConnection)
+
+        connections.putconn(first)
+
+        self.assertTrue(first.closed)
+        self.assertEqual(connections.stats()['idle'], 0)
+
+    def test_discard(self):
+        """Test a connection given back with discard is closed"""
+        connections = make_pool()
+        first = connections.getconn(FakeConnection)
+
+        connections.putconn(first, discard=True)
+
+        self.assertTrue(first.closed)
+        self.assertEqual(connections.size(), 0)
+
+    def test_max_size_times_out(self):
+        """Test checkout gives up when the pool stays full"""
+        connections = make_pool(max_size=1, timeout=0.01)
+        connections.getconn(FakeConnection)
+
+        with self.assertRaises(PoolTimeout):
+            connections.getconn(FakeConnection)
+        stats = connections.stats()
+        self.assertEqual((stats['timeouts'], stats['created']), (1, 1))
+
+    def test_waits_for_returned_connection(self):
+        """Test a full pool hands over the next connection given back"""
+        connections = make_pool(max_size=1, timeout=5)
+        first = connections.getconn(FakeConnection)
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(
+                connections.getconn(FakeConnection)
+            )
+        )
+
+        thread.start()
+        connections.putconn(first)
+        thread.join()
+
+        self.assertEqual(results, [first])
+        self.assertEqual(connections.stats()['created'], 1)
+
+    def test_failed_connect_frees_slot(self):
+        """Test a failing factory does not use up the pool"""
+        connections = make_pool(max_size=1, timeout=0.01)
+
+        def fail():
+            raise OSError('refused')
+
+        with self.assertRaises(OSError):
+            connections.getconn(fail)
+        self.assertIsInstance(connections.getconn(FakeConnection),
+                              FakeConnection)
+
+    def test_prometheus(self):
+        """Test pool stats render as Prometheus metrics"""
+        connections = make_pool()
+        connections.getconn(FakeConnection)
+        entries = [{'alias': 'default', 'database': 'blog',
+                    **connections.stats()}]
+
+        text = pool.prometheus(entries)
+
+        self.assertIn('db_pool_in_use{alias="default",database="blog"} 1',
+                      text)
+        self.assertIn('# TYPE db_pool_created_total counter', text)
+
+
+class DatabasePoolApiTests(TestCase):
+    """Test the pool stats endpoint"""
+
+    def test_staff_only(self):
+        """Test only staff can read pool stats"""
+        user = get_user_model().objects.create_user(
+            email='user@gmail.com', password='testpass123'
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        res = client.get(reverse('db-pools'))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_lists_pools(self):
+        """Test every pool of the process is reported"""
+        user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com', password='testpass123'
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        connections = make_pool()
+        key = ('default', 'blog', None, None, None)
+
+        with patch.dict('core.db.backends.postgresql_pool.base.pools',
+                        {key: connections}):
+            res = client.get(reverse('db-pools'))
+
+        self.assertEqual(res.data[0]['alias'], 'default')
+        self.assertEqual(res.data[0]['max_size'], 10)
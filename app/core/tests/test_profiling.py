@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import profiling
+from core.models import Tag
+
+
+STATS_URL = reverse('profiling-stats')
+METRICS_URL = reverse('profiling-metrics')
+TAG_URL = reverse('blog:tag-list')
+
+
+class HistogramTests(TestCase):
+    """Test the bounded histogram"""
+
+    def test_observe(self):
+        """Test values land in the first bucket that holds them"""
+        histogram = profiling.Histogram((1, 10))
+        for value in (0.5, 1, 5, 50):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(list(histogram.cumulative()),
+                         [(1, 2), (10, 3), ('+Inf', 4)])
+        self.assertEqual(histogram.quantile(0.5), 1)
+        self.assertEqual(histogram.quantile(0.99), '+Inf')
+
+
+@override_settings(PROFILING_ENABLED=True)
+class ProfilingMiddlewareTests(TestCase):
+    """Test profiling requests per endpoint"""
+
+    def setUp(self):
+        profiling.registry.reset()
+        self.user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_disabled_by_default(self):
+        """Test the middleware removes itself unless enabled"""
+        with override_settings(PROFILING_ENABLED=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                profiling.ProfilingMiddleware(lambda request: None)
+
+    def test_records_request_by_view_name(self):
+        """Test a request is recorded under its URL name"""
+        Tag.objects.create(user=self.user, name='news')
+
+        self.client.get(TAG_URL)
+        self.client.get(TAG_URL)
+
+        stats = profiling.registry.as_dict()['blog:tag-list']
+        self.assertEqual(stats['statuses'], {200: 2})
+        self.assertEqual(stats['duration_seconds']['count'], 2)
+        self.assertGreater(stats['queries']['sum'], 0)
+        self.assertGreater(stats['db_seconds']['sum'], 0)
+        self.assertGreater(stats['serializer_seconds']['sum'], 0)
+        self.assertGreater(stats['response_bytes']['sum'], 0)
+
+    def test_counts_duplicate_queries(self):
+        """Test queries repeating earlier SQL are counted"""
+        profile = profiling.RequestProfile()
+        with connection.execute_wrapper(profile):
+            for pk in range(3):
+                list(Tag.objects.filter(pk=pk))
+            Tag.objects.count()
+
+        self.assertEqual(sum(profile.queries.values()), 4)
+        self.assertEqual(len(profile.queries), 2)
+
+    def test_unresolved_requests_share_entry(self):
+        """Test paths without a URL name do not add endpoints"""
+        self.client.get('/no/such/page/')
+        self.client.get('/another/missing/page/')
+
+        self.assertEqual(list(profiling.registry.as_dict()),
+                         [profiling.UNRESOLVED])
+
+    def test_stats_endpoint_is_staff_only(self):
+        """Test users who are not staff cannot read the profile"""
+        user = get_user_model().objects.create_user(
+            email='user@gmail.com', password='testpass123'
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        self.assertEqual(client.get(STATS_URL).status_code,
+                         status.HTTP_403_FORBIDDEN)
+        self.assertEqual(client.get(METRICS_URL).status_code,
+                         status.HTTP_403_FORBIDDEN)
+
+    def test_stats_endpoint(self):
+        """Test staff can read and reset the profile"""
+        self.client.get(TAG_URL)
+
+        res = self.client.get(STATS_URL)
+
+        self.assertTrue(res.data['enabled'])
+        self.assertIn('blog:tag-list', res.data['endpoints'])
+
+        self.client.delete(STATS_URL)
+        self.assertNotIn('blog:tag-list', profiling.registry.as_dict())
+
+    def test_metrics_endpoint(self):
+        """Test the profile is exposed in the Prometheus text format"""
+        self.client.get(TAG_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        body = res.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram',
+                      body)
+        self.assertIn('http_request_queries_bucket{view="blog:tag-list",'
+                      'le="+Inf"} 1', body)
+        self.assertIn('http_responses_total{view="blog:tag-list",'
+                      'status="200"} 1', body)
@@ -0,0 +1,183 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.utils import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.db import routers
+from core.models import Post
+
+
+POST_URL = reverse('blog:post-list')
+PROFILE_URL = reverse('user:profile')
+
+
+@override_settings(REPLICA_DATABASES=['replica_0', 'replica_1'])
+@patch('core.db.routers.check')
+class ReplicaRoutingTests(TestCase):
+    """Test routing safe blog requests to read replicas"""
+
+    def setUp(self):
+        cache.clear()
+        routers.health.reset()
+        self.factory = RequestFactory()
+
+    def run_request(self, method, path, status=200, cookies=None,
+                    **headers):
+        """Return the replica the request's reads were routed to"""
+        routed = []
+
+        def get_response(request):
+            middleware.process_view(request, None, (), {})
+            routed.append(routers.current.get())
+            return HttpResponse(status=status)
+
+        middleware = routers.ReplicaMiddleware(get_response)
+        request = self.factory.generic(method, path, **headers)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(path)
+        self.response = middleware(request)
+        self.assertIsNone(routers.current.get())
+        return routed[0]
+
+    def test_safe_blog_requests_use_replica(self, check):
+        """Test blog reads go to a replica and writes to the primary"""
+        self.assertIn(self.run_request('GET', POST_URL),
+                      ('replica_0', 'replica_1'))
+        self.assertIsNone(self.run_request('POST', POST_URL))
+
+    def test_other_namespaces_use_primary(self, check):
+        """Test reads outside the blog stay on the primary"""
+        self.assertIsNone(self.run_request('GET', PROFILE_URL))
+
+    def test_reads_follow_own_writes(self, check):
+        """Test a client that has written reads from the primary"""
+        self.run_request('POST', POST_URL, status=201,
+                         HTTP_AUTHORIZATION='Token abc')
+
+        self.assertIsNone(self.run_request('GET', POST_URL,
+                                           HTTP_AUTHORIZATION='Token abc'))
+        self.assertIsNotNone(self.run_request(
+            'GET', POST_URL, HTTP_AUTHORIZATION='Token other'
+        ))
+
+    def test_sticky_cookie(self, check):
+        """Test the signed cookie set after a write pins the client"""
+        self.run_request('POST', POST_URL, status=201)
+        cookie = self.response.cookies[routers.STICKY_COOKIE].value
+
+        self.assertIsNone(self.run_request(
+            'GET', POST_URL, cookies={routers.STICKY_COOKIE: cookie}
+        ))
+        self.assertIsNotNone(self.run_request(
+            'GET', POST_URL, cookies={routers.STICKY_COOKIE: '1'}
+        ))
+
+    def test_post_detail_cache_filled_from_primary(self, check):
+        """Test a detail cache miss reads the primary, not the replica"""
+        user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com', password='testpass123'
+        )
+        post = Post.objects.create(user=user, title='title', slug='title')
+        client = APIClient()
+        client.force_authenticate(user)
+        url = reverse('blog:post-detail-slug', args=[post.slug])
+        reads = []
+        router = routers.ReplicaRouter()
+
+        def db_for_read(model, **hints):
+            reads.append(routers.current.get())
+            return 'default'
+
+        with override_settings(REPLICA_DATABASES=['replica_0']), \
+                patch.object(routers.ReplicaRouter, 'db_for_read',
+                             side_effect=db_for_read):
+            res = client.get(url)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertTrue(reads)
+        self.assertEqual(set(reads), {None})
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_failed_write_is_not_sticky(self, check):
+        """Test rejected writes do not pin the client to the primary"""
+        self.run_request('PATCH', POST_URL, status=400,
+                         HTTP_AUTHORIZATION='Token abc')
+
+        self.assertIsNotNone(self.run_request(
+            'GET', POST_URL, HTTP_AUTHORIZATION='Token abc'
+        ))
+
+    def test_fails_over_to_healthy_replica(self, check):
+        """Test an unreachable replica is skipped until its retry time"""
+        def connect(alias):
+            if alias == 'replica_0':
+                raise OperationalError('connection refused')
+        check.side_effect = connect
+
+        for _ in range(3):
+            self.assertEqual(self.run_request('GET', POST_URL), 'replica_1')
+        self.assertLessEqual(
+            [call.args[0] for call in check.call_args_list].count(
+                'replica_0'
+            ), 1
+        )
+
+    def test_fails_over_to_primary(self, check):
+        """Test reads use the primary when no replica is healthy"""
+        check.side_effect = OperationalError('connection refused')
+
+        self.assertIsNone(self.run_request('GET', POST_URL))
+        self.assertFalse(routers.health.is_up('replica_0'))
+
+    def test_query_error_marks_replica_down(self, check):
+        """Test a replica whose query failed is left alone"""
+        middleware = routers.ReplicaMiddleware(None)
+        token = routers.current.set('replica_1')
+        try:
+            middleware.process_exception(None, OperationalError('gone'))
+        finally:
+            routers.current.reset(token)
+
+        self.assertFalse(routers.health.is_up('replica_1'))
+        self.assertTrue(routers.health.is_up('replica_0'))
+
+
+class ReplicaRouterTests(TestCase):
+    """Test the database router"""
+
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+
+    def test_reads_follow_request_replica(self):
+        """Test reads use the replica chosen for the request"""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        token = routers.current.set('replica_0')
+        try:
+            self.assertEqual(self.router.db_for_read(Post), 'replica_0')
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            self.assertEqual(self.router.db_for_read(Token), 'default')
+        finally:
+            routers.current.reset(token)
+
+    def test_migrations_run_on_primary(self):
+        """Test replicas are never migrated"""
+        self.assertTrue(self.router.allow_migrate('default', 'core'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'core'))
+
+    def test_api_requests_use_primary_without_replicas(self):
+        """Test the middleware leaves routing alone with no replicas"""
+        user = get_user_model().objects.create_staffuser(
+            email='test@gmail.com', password='testpass123'
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        res = client.get(POST_URL)
+
+        self.assertEqual(res.status_code, 200)
@@ -0,0 +1,177 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, \
+    StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from user.authentication import CachedTokenAuthentication
+from . import profiling
+from .db import pool
+from .db.backends.postgresql_pool.base import pool_stats
+
+
+CHUNK_SIZE = 64 * 1024
+# Files named after their content never change under the same URL
+CONTENT_ADDRESSED = re.compile(r'(^|/)([0-9a-f]{64}(/|\.|$).*)')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def parse_range(header, size):
+    """Return (start, end) of a single byte range, None to send the whole
+    file, or False when the range cannot be satisfied"""
+    match = RANGE.match(header.strip())
+    if not match:
+        # Multiple or malformed ranges; a full response is allowed
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve a file below MEDIA_ROOT.
+
+    Supports conditional requests on a strong ETag, single byte ranges and
+    long-lived caching of content addressed files. Those take their ETag
+    from the hash in their name and send no Last-Modified, since the
+    storage refreshes their mtime when the same content is uploaded
+    again. With MEDIA_SENDFILE set
+    the body is left to the front server through X-Sendfile or
+    X-Accel-Redirect, which then also handles ranges.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found')
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('Not found')
+    if not os.path.isfile(full_path):
+        raise Http404('Not found')
+
+    hashed = CONTENT_ADDRESSED.search(path)
+    if hashed:
+        etag, last_modified = f'"{hashed.group(2)}"', None
+    else:
+        etag = '"%x-%x"' % (stat.st_mtime_ns, stat.st_size)
+        last_modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = file_response(request, path, full_path, stat.st_size, etag)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    if hashed:
+        patch_cache_control(response, public=True, immutable=True,
+                            max_age=IMMUTABLE_MAX_AGE)
+    else:
+        patch_cache_control(response, public=True,
+                            max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
+
+
+def file_response(request, path, full_path, size, etag):
+    content_type = mimetypes.guess_type(full_path)[0] or \
+        'application/octet-stream'
+
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + path
+        return response
+    if settings.MEDIA_SENDFILE == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        return response
+
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and \
+            request.META.get('HTTP_IF_RANGE', etag) == etag:
+        byte_range = parse_range(request.META['HTTP_RANGE'], size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'),
+                                content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(full_path, start, end - start + 1),
+            status=206, content_type=content_type,
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+class ProfilingStatsAPIView(APIView):
+    """Report the request profile of every endpoint; DELETE resets it"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
+
+    def get(self, request, *args, **kwargs):
+        return Response({
+            'enabled': settings.PROFILING_ENABLED,
+            'endpoints': profiling.registry.as_dict(),
+        })
+
+    def delete(self, request, *args, **kwargs):
+        profiling.registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ProfilingMetricsAPIView(APIView):
+    """Expose the request profile in the Prometheus text format"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(
+            profiling.registry.prometheus() + pool.prometheus(pool_stats()),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
+
+
+class DatabasePoolStatsAPIView(APIView):
+    """Report the connection pools of this process"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
+
+    def get(self, request, *args, **kwargs):
+        return Response(pool_stats())
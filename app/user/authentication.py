@@ -0,0 +1,100 @@
+"""Token authentication with an in-process cache of token lookups"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+
+
+def generation_key(user_id):
+    return f'auth:tokens:{user_id}'
+
+
+def get_generation(user_id):
+    return caches[settings.TOKEN_CACHE_ALIAS].get(generation_key(user_id))
+
+
+def mark_changed(user_id):
+    """Make every process drop its cached lookups for the user once the
+    current transaction commits"""
+    transaction.on_commit(lambda: caches[settings.TOKEN_CACHE_ALIAS].set(
+        generation_key(user_id), time.time_ns(), settings.TOKEN_CACHE_TTL
+    ))
+
+
+class TokenCache:
+    """Bounded LRU of token keys to (user, token) with a time to live.
+
+    The cache is per process. Each entry of a user keeps their generation
+    in the TOKEN_CACHE_ALIAS cache, which changes when the user or one of
+    their tokens changes, and is dropped on a hit once it differs. That
+    reaches other processes when the cache is shared; otherwise the TTL
+    bounds how stale a worker can be. The generation only needs to outlive
+    the entries, so it expires after the TTL too.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic() or (
+                    entry[2] is not None
+                    and entry[3] != get_generation(entry[2])):
+                self.entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, user_id=None):
+        generation = None if user_id is None else get_generation(user_id)
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value,
+                                 user_id, generation)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def discard_user(self, user_id):
+        with self.lock:
+            for key in [key for key, entry in self.entries.items()
+                        if entry[2] == user_id]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+
+tokens = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the token and user query for keys
+    seen recently"""
+
+    def authenticate_credentials(self, key):
+        cached = tokens.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            tokens.set(key, cached, cached[0].pk)
+        user, token = cached
+        # Views may change request.user; keep the cached copy pristine
+        return copy.copy(user), token
@@ -0,0 +1,55 @@
+"""Authentication backend that limits concurrent password hashing"""
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+
+
+slots = threading.BoundedSemaphore(settings.LOGIN_HASH_CONCURRENCY)
+
+
+def verify(password, encoded):
+    """Return whether `password` matches and whether its hash is stale"""
+    stale = []
+    valid = check_password(password, encoded, setter=stale.append)
+    return valid, bool(stale)
+
+
+def hash_password(password):
+    with slots:
+        return make_password(password)
+
+
+class HashLimitedModelBackend(ModelBackend):
+    """ModelBackend that lets at most LOGIN_HASH_CONCURRENCY logins per
+    process hash a password at once.
+
+    This is a concurrency limiter, not an asynchronous login: the request
+    thread hashes and waits for a free slot first. hashlib releases the
+    GIL, so without the limit a burst of logins could take every core from
+    other requests. Database reads and writes happen outside the slot.
+    Stale hashes are re-encoded with the preferred hasher.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown emails take as long as bad passwords
+            hash_password(password)
+            return None
+        with slots:
+            valid, stale = verify(password, user.password)
+        if not (valid and self.user_can_authenticate(user)):
+            return None
+        if stale:
+            user.password = hash_password(password)
+            user.save(update_fields=['password'])
+        return user
@@ -3,8 +3,11 @@ from django.utils.translation import ugettext_lazy as _
 
 from rest_framework import serializers
 
+from core.profiling import ProfiledSerializerMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(ProfiledSerializerMixin,
+                     serializers.ModelSerializer):
     """Serializer for the users object"""
 
     class Meta:
@@ -28,6 +31,47 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
+class BulkUserListSerializer(serializers.ListSerializer):
+    """Checks a batch of emails with one query and creates the users with
+    a single bulk insert"""
+
+    def to_internal_value(self, data):
+        attrs = super().to_internal_value(data)
+        manager = get_user_model().objects
+        errors = [{} for _ in attrs]
+        seen = {}
+        for index, item in enumerate(attrs):
+            email = manager.normalize_email(item['email'])
+            if email in seen:
+                errors[index]['email'] = ['Duplicate email in this batch']
+            seen.setdefault(email, index)
+        taken = manager.filter(
+            email__in=list(seen)
+        ).values_list('email', flat=True)
+        for email in taken:
+            errors[seen[email]]['email'] = [
+                'user with this email already exists.'
+            ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        return get_user_model().objects.bulk_create_users(validated_data)
+
+
+class BulkUserSerializer(UserSerializer):
+    """Serializer for users created through the batch endpoint"""
+
+    class Meta(UserSerializer.Meta):
+        list_serializer_class = BulkUserListSerializer
+        # Uniqueness is checked once per batch by the list serializer
+        extra_kwargs = dict(
+            UserSerializer.Meta.extra_kwargs,
+            email={'validators': []},
+        )
+
+
 class AuthTokenSerializer(serializers.Serializer):
     """Serializer for the user authentication object"""
     email = serializers.CharField()
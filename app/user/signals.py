@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import mark_changed, tokens
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    tokens.discard(instance.key)
+    mark_changed(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_user_tokens(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the cached user may keep stale
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    tokens.discard_user(instance.pk)
+    mark_changed(instance.pk)
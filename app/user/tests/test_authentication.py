@@ -0,0 +1,109 @@
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import TokenCache, tokens
+
+
+ME_URL = reverse('user:profile')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test the cached token authentication"""
+
+    def setUp(self):
+        tokens.clear()
+        caches[settings.TOKEN_CACHE_ALIAS].clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_second_request_skips_token_query(self):
+        """Test a cached token needs no authentication query"""
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_rejected(self):
+        """Test deleting a token drops it from the cache"""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating the user drops their tokens"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_reloads_user(self):
+        """Test changing the password refreshes the cached user"""
+        self.client.get(ME_URL)
+        self.user.set_password('newpass123')
+        self.user.save()
+
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+    def test_changes_reach_other_processes(self):
+        """Test a revocation committed elsewhere drops cached lookups"""
+        other = TokenCache(max_size=10, ttl=60)
+        other.set(self.token.key, (self.user, self.token), self.user.pk)
+        self.assertIsNotNone(other.get(self.token.key))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        self.assertIsNone(other.get(self.token.key))
+
+    def test_deleted_token_reaches_other_processes(self):
+        """Test deleting a token drops it from other processes"""
+        other = TokenCache(max_size=10, ttl=60)
+        other.set(self.token.key, (self.user, self.token), self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+
+        self.assertIsNone(other.get(self.token.key))
+
+    def test_entries_expire(self):
+        """Test entries are dropped after their time to live"""
+        cache = TokenCache(max_size=10, ttl=60)
+        with patch('user.authentication.time.monotonic', return_value=0):
+            cache.set('key', ('user', 'token'))
+        with patch('user.authentication.time.monotonic', return_value=61):
+            self.assertIsNone(cache.get('key'))
+
+    def test_least_recently_used_evicted(self):
+        """Test the cache keeps at most max_size entries"""
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(list(cache.entries), ['a', 'c'])
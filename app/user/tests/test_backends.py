@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+TOKEN_URL = reverse('user:token')
+
+
+@override_settings(PASSWORD_SCRYPT_N=2 ** 10, PASSWORD_PBKDF2_ITERATIONS=1000,
+                   PASSWORD_HASHERS=['core.hashers.ScryptPasswordHasher',
+                                     'core.hashers.TunedPBKDF2PasswordHasher'])
+class HashLimitedModelBackendTests(TestCase):
+    """Test logging in through the hash limited authentication backend"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            password='testpass123'
+        )
+
+    def login(self, password):
+        return self.client.post(TOKEN_URL, {
+            'email': 'test@gmail.com', 'password': password
+        })
+
+    def test_login(self):
+        """Test a valid login returns a token"""
+        res = self.login('testpass123')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', res.data)
+
+    def test_wrong_password(self):
+        """Test a wrong password is rejected"""
+        res = self.login('wrong')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_inactive_user(self):
+        """Test an inactive user cannot log in"""
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.login('testpass123')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stale_hash_upgraded_on_login(self):
+        """Test a login re-encodes a hash made by another hasher"""
+        self.user.password = make_password('testpass123',
+                                           hasher='pbkdf2_sha256')
+        self.user.save()
+
+        self.login('testpass123')
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$'))
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_hashing_takes_a_slot(self):
+        """Test password checks run while holding a hashing slot"""
+        with patch('user.backends.slots') as slots:
+            res = self.login('testpass123')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        slots.__enter__.assert_called_once()
+        slots.__exit__.assert_called_once()
@@ -9,6 +9,7 @@ from rest_framework import status
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
 ME_URL = reverse('user:profile')
+BULK_URL = reverse('user:bulk')
 
 
 def create_user(**params):
@@ -147,3 +148,73 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.first_name, payload['first_name'])
         self.assertTrue(self.user.check_password(payload['password']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class BulkUserApiTests(TestCase):
+    """Test provisioning users in batches"""
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_staffuser(
+            email='admin@gmail.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_bulk_create_users(self):
+        """Test creating several users in one request"""
+        payload = [
+            {'email': f'user{i}@gmail.com', 'password': 'testpass123',
+             'first_name': f'name{i}', 'last_name': 'family'}
+            for i in range(3)
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        self.assertNotIn('password', res.data[0])
+        user = get_user_model().objects.get(email='user1@gmail.com')
+        self.assertTrue(user.check_password('testpass123'))
+
+    def test_bulk_duplicate_emails_reported(self):
+        """Test emails taken in the batch or the database are rejected"""
+        payload = [
+            {'email': email, 'password': 'testpass123',
+             'first_name': 'name', 'last_name': 'family'}
+            for email in ('admin@gmail.com', 'new@gmail.com', 'new@gmail.com')
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', res.data[0])
+        self.assertEqual(res.data[1], {})
+        self.assertIn('email', res.data[2])
+        self.assertEqual(get_user_model().objects.count(), 1)
+
+    def test_bulk_requires_staff(self):
+        """Test that regular users cannot provision accounts"""
+        self.admin.is_staff = False
+        self.admin.save()
+
+        res = self.client.post(BULK_URL, [], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_requires_list(self):
+        """Test that a single object is rejected"""
+        res = self.client.post(BULK_URL, {'email': 'x@gmail.com'},
+                               format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_options(self):
+        """Test that the endpoint describes itself to OPTIONS and the
+        browsable API"""
+        res = self.client.options(BULK_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('email', res.data['actions']['POST'])
+
+        res = self.client.get(BULK_URL, HTTP_ACCEPT='text/html')
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -8,6 +8,7 @@ app_name = 'user'
 
 urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
+    path('bulk/', views.BulkCreateUserView.as_view(), name='bulk'),
     path('token/', views.CreateTokenView.as_view(), name='token'),
     path('profile/', views.ManageUserView.as_view(), name='profile'),
 ]
@@ -1,8 +1,12 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 
-from .serializers import UserSerializer, AuthTokenSerializer
+from .authentication import CachedTokenAuthentication
+from .serializers import UserSerializer, BulkUserSerializer, \
+    AuthTokenSerializer
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -10,6 +14,35 @@ class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
 
 
+class BulkCreateUserView(generics.CreateAPIView):
+    """Create a batch of users in one transaction"""
+    serializer_class = BulkUserSerializer
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated, permissions.IsAdminUser)
+    max_batch_size = 1000
+
+    def get_batch(self, request):
+        data = request.data
+        if not isinstance(data, list):
+            raise ValidationError({'non_field_errors': [
+                'Expected a list of items.'
+            ]})
+        if len(data) > self.max_batch_size:
+            raise ValidationError({'non_field_errors': [
+                f'Ensure this batch has no more than '
+                f'{self.max_batch_size} items.'
+            ]})
+        return data
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(
+            data=self.get_batch(request), many=True
+        )
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
 class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for user"""
     serializer_class = AuthTokenSerializer
@@ -19,7 +52,7 @@ class CreateTokenView(ObtainAuthToken):
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):